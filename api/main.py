@@ -1,18 +1,53 @@
 from fastapi import FastAPI
 
+import asyncio
+import os
 import uvicorn
-import json
+from contextlib import asynccontextmanager
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from tradelens.analytics_service import router as analytics_router
 from tradelens.baci_service import router as baci_router # further sorting of routers required
 from tradelens.common_service import router as common_router
+from tradelens.dataset_service import router as dataset_router
 from tradelens.prodcom_service import router as prodcom_router
-
-app = FastAPI()
-
+from tradelens.cache import cache_stats
+from tradelens.database import open_database, close_database, database_is_open, database_stats
+from tradelens.dataset_registry import dataset_paths, start_registry_watcher, stop_registry_watcher
+from tradelens.embedding import embedding_readiness, encoder_stats, shutdown_encoder, skip_warm_up, start_warm_up
+from tradelens.executor import shutdown_executors, executor_stats
+
+
+# Load the embedding model and catalogues in the background after startup - set to 0 to load on first use
+WARM_UP = os.environ.get("TRADELENS_WARM_UP", "1") == "1"
+
+
+# Open the shared DuckDB database on the registry's current datasets and start the warm-up and the
+# registry watcher; drain the executors and encoder and close the database on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    open_database(datasets=dataset_paths())
+    start_registry_watcher()
+    if WARM_UP:
+        start_warm_up()
+    else:
+        skip_warm_up()
+    yield
+    # Draining the pools blocks until running queries finish - keep it off the event loop
+    await asyncio.to_thread(stop_registry_watcher)
+    await asyncio.to_thread(shutdown_executors)
+    await asyncio.to_thread(shutdown_encoder)
+    close_database()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.include_router(analytics_router)
 app.include_router(baci_router)
 app.include_router(common_router)
+app.include_router(dataset_router)
 app.include_router(prodcom_router)
 
 # Add Middleware
@@ -24,12 +59,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Define countries and products globally from locally saved data files
-with open("data/shared/HS6_products.json", "r") as f:
-    PRODUCTS = json.load(f)
-with open("data/shared/countries.json", "r") as f:
-    COUNTRIES = json.load(f)
-
 
 #### End point to define root
 @app.get("/", tags=["root"])
@@ -37,6 +66,26 @@ async def read_root() -> dict:
     return {"message":"this is your root"}
 
 
+#### Readiness probe - 503 until the database is open and the warm-up has finished (or is skipped)
+@app.get("/health/ready", tags=["root"])
+async def read_readiness():
+    embedding = embedding_readiness()
+    ready = database_is_open() and embedding["ready"]
+    content = {"ready": ready, "database": database_is_open(), "embedding": embedding}
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+#### End point exposing runtime metrics
+@app.get("/api/metrics", tags=["root"])
+async def read_metrics() -> dict:
+    return {
+        "duckdb": database_stats(),
+        "executors": executor_stats(),
+        "cache": cache_stats(),
+        "encoder": encoder_stats(),
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
 
@@ -0,0 +1,314 @@
+from tradelens.baci_service import parse_codes, plan_rollup
+from tradelens.cache import RESULTS, canonical_key
+from tradelens.data_models import TopPartnersResponse, TradeMatrixResponse
+from tradelens.database import get_database
+from tradelens.executor import run_query
+from tradelens.paging import fetch_columns
+from tradelens.serialization import timed_response_json
+
+import numpy as np
+import orjson
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import Response
+from typing import Collection, List, Tuple
+from datetime import datetime
+
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["analytics"],
+)
+
+# Trade flow -> (column of the reporting country, column of its partners)
+FLOW_COLUMNS = {
+    "exports": ("exporter", "importer"),
+    "imports": ("importer", "exporter"),
+}
+
+
+#### Validate the product and year filters shared by the analytics end points
+def parse_analytics_filters(product_codes: str, year_from: int, year_to: int) -> List[int]:
+    """Returns the product code list, raising 400 on invalid input."""
+
+    if year_to < year_from:
+        raise HTTPException(status_code=400, detail="year_to must be >= year_from")
+    product_list = parse_codes(product_codes, "product")
+    if not product_list:
+        raise HTTPException(status_code=400, detail="At least one product code required")
+    return product_list
+
+
+def placeholders(values: list) -> str:
+    return ",".join(["?"] * len(values))
+
+
+#### Build the top partners query - one grouped query with the total as a window over the groups
+def build_top_partners_query(
+    flow: str,
+    country_list: List[int],
+    product_list: List[int],
+    year_from: int,
+    year_to: int,
+    limit: int,
+    available_views: Collection[str] = ()
+) -> Tuple[str, list]:
+    """
+    Returns the query ranking the partners of `country_list` for a flow, with
+    their value, quantity, the total over all partners and the partner count.
+
+    Without reporting countries it ranks the exporters (or importers) themselves
+    against the world total, reading the exporter/importer rollup when it is
+    among `available_views`.
+    """
+
+    reporter, partner = FLOW_COLUMNS[flow]
+    source = "baci"
+    if not country_list:
+        partner = reporter
+        source = plan_rollup({"year", "product", partner}, available_views) or "baci"
+
+    where_conditions = ["year BETWEEN ? AND ?", f"product IN ({placeholders(product_list)})"]
+    params = [year_from, year_to] + product_list
+    if country_list:
+        where_conditions.append(f"{reporter} IN ({placeholders(country_list)})")
+        params.extend(country_list)
+
+    query = f"""
+    SELECT
+        {partner} AS partner,
+        COALESCE(CAST(ANY_VALUE({partner}_name) AS VARCHAR), '') AS partner_name,
+        COALESCE(SUM(value), 0.0) AS value,
+        COALESCE(SUM(quantity), 0.0) AS quantity,
+        SUM(SUM(value)) OVER () AS total_value,
+        COUNT(*) OVER () AS partner_count
+    FROM {source}
+    WHERE {' AND '.join(where_conditions)}
+    GROUP BY {partner}
+    ORDER BY value DESC, partner
+    LIMIT ?
+    """
+    params.append(limit)
+    return query, params
+
+
+#### 1. End point ranking the partners of a country (or the countries of the world) for a product set
+@router.get("/top-partners", response_model=TopPartnersResponse)
+async def query_top_partners(
+    country: str = Query("156", description="Comma-separated reporting country codes, or 'world' to rank all countries"),
+    flow: str = Query("exports", pattern="^(exports|imports)$"),
+    product_codes: str = Query("950300", description="Comma-separated product codes"),
+    year_from: int = Query(2022, ge=2000, le=2024),
+    year_to: int = Query(2022, ge=2000, le=2024),
+    limit: int = Query(20, ge=1, le=250)
+):
+    """Returns the top partners by value with their shares of the total, as parallel arrays."""
+
+    product_list = parse_analytics_filters(product_codes, year_from, year_to)
+    country_list = parse_codes(country, "country")
+    content = await run_query(fetch_top_partners, flow, country_list, product_list, year_from, year_to, limit)
+    return Response(content=content, media_type="application/json")
+
+
+#### 2. End point returning the exporter x importer trade matrix for a product set
+@router.get("/matrix", response_model=TradeMatrixResponse)
+async def query_trade_matrix(
+    product_codes: str = Query("950300", description="Comma-separated product codes"),
+    year_from: int = Query(2022, ge=2000, le=2024),
+    year_to: int = Query(2022, ge=2000, le=2024),
+    exporters: str = Query("", description="Comma-separated exporter codes (default: the top `limit` exporters)"),
+    importers: str = Query("", description="Comma-separated importer codes (default: the top `limit` importers)"),
+    limit: int = Query(25, ge=1, le=250, description="Countries per axis when not listed")
+):
+    """
+    Returns bilateral trade values as an exporters x importers matrix. Row and
+    column totals include partners outside the shown axes.
+    """
+
+    product_list = parse_analytics_filters(product_codes, year_from, year_to)
+    content = await run_query(
+        fetch_trade_matrix,
+        product_list,
+        parse_codes(exporters, "exporter"),
+        parse_codes(importers, "importer"),
+        year_from,
+        year_to,
+        limit
+    )
+    return Response(content=content, media_type="application/json")
+
+
+#### Blocking implementations, run on the query executor
+def fetch_top_partners(
+    flow: str,
+    country_list: List[int],
+    product_list: List[int],
+    year_from: int,
+    year_to: int,
+    limit: int
+) -> bytes:
+    """Runs the top partners query and returns the TopPartnersResponse JSON body."""
+
+    start_time = datetime.now()
+
+    try:
+        database = get_database()
+        available_views = database.view_names()
+        query, params = build_top_partners_query(
+            flow, country_list, product_list, year_from, year_to, limit, available_views
+        )
+        cache_key = canonical_key(
+            "analytics-top-partners",
+            version=database.view_version("baci"),
+            rollup_version=None if country_list else database.view_version(f"baci_{FLOW_COLUMNS[flow][0]}_totals"),
+            flow=flow,
+            countries=country_list,
+            products=product_list,
+            year_from=year_from,
+            year_to=year_to,
+            limit=limit,
+        )
+        body = RESULTS.get(cache_key)
+
+        if body is None:
+            with database.cursor() as conn:
+                columns = fetch_columns(conn, query, params)
+
+            total_value = columns["total_value"][0] if columns["partner"] else 0.0
+            values = np.asarray(columns["value"], dtype=np.float64)
+            shares = values / total_value if total_value else np.zeros_like(values)
+            body = orjson.dumps({
+                "countries": country_list,
+                "flow": flow,
+                "partners": columns["partner"],
+                "partner_names": columns["partner_name"],
+                "values": values,
+                "quantities": columns["quantity"],
+                "shares": np.round(shares, 6),
+                "total_value": total_value,
+                "partner_count": columns["partner_count"][0] if columns["partner"] else 0,
+            }, option=orjson.OPT_SERIALIZE_NUMPY)
+            RESULTS.put(cache_key, body)
+
+        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        return timed_response_json(body, round(execution_time, 2))
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Top partners query failed: {str(e)}")
+
+
+def fetch_trade_matrix(
+    product_list: List[int],
+    exporter_list: List[int],
+    importer_list: List[int],
+    year_from: int,
+    year_to: int,
+    limit: int
+) -> bytes:
+    """
+    Runs one query grouping the product set by exporter and importer, then
+    pivots the listed (or top `limit`) exporters and importers into a matrix.
+    """
+
+    start_time = datetime.now()
+
+    try:
+        database = get_database()
+        cache_key = canonical_key(
+            "analytics-matrix",
+            version=database.view_version("baci"),
+            products=product_list,
+            exporters=exporter_list,
+            importers=importer_list,
+            year_from=year_from,
+            year_to=year_to,
+            limit=limit,
+        )
+        body = RESULTS.get(cache_key)
+
+        if body is None:
+            where_conditions = ["year BETWEEN ? AND ?", f"product IN ({placeholders(product_list)})"]
+            params = [year_from, year_to] + product_list
+            if exporter_list:
+                where_conditions.append(f"exporter IN ({placeholders(exporter_list)})")
+                params.extend(exporter_list)
+            if importer_list:
+                where_conditions.append(f"importer IN ({placeholders(importer_list)})")
+                params.extend(importer_list)
+
+            query = f"""
+            SELECT
+                exporter,
+                importer,
+                COALESCE(CAST(ANY_VALUE(exporter_name) AS VARCHAR), '') AS exporter_name,
+                COALESCE(CAST(ANY_VALUE(importer_name) AS VARCHAR), '') AS importer_name,
+                COALESCE(SUM(value), 0.0) AS value
+            FROM baci
+            WHERE {' AND '.join(where_conditions)}
+            GROUP BY exporter, importer
+            """
+            with database.cursor() as conn:
+                columns = fetch_columns(conn, query, params)
+
+            body = orjson.dumps(
+                pivot_matrix(columns, exporter_list, importer_list, limit), option=orjson.OPT_SERIALIZE_NUMPY
+            )
+            RESULTS.put(cache_key, body)
+
+        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        return timed_response_json(body, round(execution_time, 2))
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Trade matrix query failed: {str(e)}")
+
+
+def matrix_axis(codes: np.ndarray, values: np.ndarray, listed: List[int], limit: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Unique codes of one axis with their totals, and the codes to show - the listed
+    ones in request order, or the `limit` largest by total.
+    """
+    unique, inverse = np.unique(codes, return_inverse=True)
+    totals = np.bincount(inverse, weights=values, minlength=len(unique))
+    if listed:
+        shown = np.asarray(listed, dtype=np.int64)
+    else:
+        order = np.lexsort((unique, -totals))[:limit]
+        shown = unique[order]
+    return unique, totals, shown
+
+
+def pivot_matrix(columns: dict, exporter_list: List[int], importer_list: List[int], limit: int) -> dict:
+    """Scatter grouped (exporter, importer) rows into the shown exporters x importers matrix."""
+    exporters = np.asarray(columns["exporter"], dtype=np.int64)
+    importers = np.asarray(columns["importer"], dtype=np.int64)
+    values = np.asarray(columns["value"], dtype=np.float64)
+
+    axes = {}
+    for name, codes, names, listed in [
+        ("exporter", exporters, columns["exporter_name"], exporter_list),
+        ("importer", importers, columns["importer_name"], importer_list),
+    ]:
+        unique, totals, shown = matrix_axis(codes, values, listed, limit)
+        name_of = dict(zip(codes.tolist(), names))
+        total_of = dict(zip(unique.tolist(), totals.tolist()))
+        axes[name] = {
+            "codes": shown.tolist(),
+            "names": [name_of.get(code, "") for code in shown.tolist()],
+            "totals": [total_of.get(code, 0.0) for code in shown.tolist()],
+            "position": {code: i for i, code in enumerate(shown.tolist())},
+        }
+
+    matrix = np.zeros((len(axes["exporter"]["codes"]), len(axes["importer"]["codes"])))
+    rows = np.array([axes["exporter"]["position"].get(code, -1) for code in exporters.tolist()], dtype=np.int64)
+    cols = np.array([axes["importer"]["position"].get(code, -1) for code in importers.tolist()], dtype=np.int64)
+    shown = (rows >= 0) & (cols >= 0)
+    matrix[rows[shown], cols[shown]] = values[shown]
+
+    return {
+        "exporters": axes["exporter"]["codes"],
+        "exporter_names": axes["exporter"]["names"],
+        "importers": axes["importer"]["codes"],
+        "importer_names": axes["importer"]["names"],
+        "values": matrix,
+        "exporter_totals": axes["exporter"]["totals"],
+        "importer_totals": axes["importer"]["totals"],
+        "total_value": float(values.sum()),
+    }
@@ -0,0 +1,216 @@
+"""
+Build the BACI dataset used by the API.
+
+Replaces the `to_parquet` export in data-prep/BACI/baci_merge_files.ipynb with a
+reproducible command that writes a Hive-partitioned dataset, one directory per
+year, with rows sorted by product then exporter so product/exporter lookups can
+skip row groups using parquet min/max statistics.
+
+Alongside the dataset it writes rollup tables of exporter x product x year and
+importer x product x year totals, which baci_service uses to answer "world"
+aggregates without summing the bilateral rows.
+
+Usage (from the api folder):
+
+    # From the raw CEPII release
+    python -m tradelens.baci_build --csv-dir ../data-prep/BACI/data --output data/BACI/baci_hs17
+
+    # From the single-file parquet downloaded by data-setup.py
+    python -m tradelens.baci_build --parquet data/BACI/baci_hs17_2017_2022.parquet --output data/BACI/baci_hs17
+"""
+
+import argparse
+import os
+import shutil
+import time
+from typing import List, Optional
+
+import duckdb
+
+from tradelens.database import dataset_reader
+
+
+# Rows per parquet row group - small enough that a single product's rows span few groups
+DEFAULT_ROW_GROUP_SIZE = 65536
+DEFAULT_COMPRESSION = "zstd"
+
+# Sort order within each year partition
+SORT_ORDER = "product, exporter, importer"
+
+# Rollup tables: file name -> partner column whose flows are totalled
+ROLLUPS = {
+    "exporter_totals": "exporter",
+    "importer_totals": "importer",
+}
+
+# Columns of the BACI fact table (year is carried by the partition directory)
+COLUMNS = [
+    "exporter", "importer", "product", "value", "quantity",
+    "exporter_name", "importer_name", "product_description",
+]
+
+
+def csv_source(csv_dir: str, version: str = "V202501", nomenclature: str = "HS17") -> str:
+    """SQL relation over the raw CEPII CSVs with country and product names joined in."""
+    flows = os.path.join(csv_dir, f"BACI_{nomenclature}_Y*_{version}.csv")
+    countries = os.path.join(csv_dir, f"country_codes_{version}.csv")
+    products = os.path.join(csv_dir, f"product_codes_{nomenclature}_{version}.csv")
+    return f"""
+        SELECT
+            f.t AS year,
+            f.i AS exporter,
+            f.j AS importer,
+            f.k AS product,
+            f.v AS value,
+            TRY_CAST(trim(f.q) AS DOUBLE) AS quantity,
+            e.country_name AS exporter_name,
+            m.country_name AS importer_name,
+            p.description AS product_description
+        FROM read_csv('{flows}', header = true,
+                      columns = {{'t': 'BIGINT', 'i': 'BIGINT', 'j': 'BIGINT', 'k': 'BIGINT', 'v': 'DOUBLE', 'q': 'VARCHAR'}}) f
+        LEFT JOIN read_csv('{countries}', header = true, all_varchar = true) e ON CAST(e.country_code AS BIGINT) = f.i
+        LEFT JOIN read_csv('{countries}', header = true, all_varchar = true) m ON CAST(m.country_code AS BIGINT) = f.j
+        LEFT JOIN read_csv('{products}', header = true, all_varchar = true) p ON CAST(p.code AS BIGINT) = f.k
+    """
+
+
+def parquet_source(path: str) -> str:
+    """SQL relation over an existing BACI parquet file or partitioned dataset."""
+    return f"SELECT * FROM {dataset_reader(path)}"
+
+
+def write_year(
+    conn: duckdb.DuckDBPyConnection,
+    source: str,
+    year: int,
+    output: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = DEFAULT_COMPRESSION
+) -> str:
+    """
+    Write one sorted year partition and move it into the dataset once it is complete.
+
+    Replacing an existing partition takes two renames, so a reader listing the
+    dataset in between sees that year missing - this is not atomic. To change the
+    data behind a running API, publish a new version with tradelens.dataset_registry.
+    """
+    partition = os.path.join(output, f"year={int(year)}")
+    # Stage outside the dataset directory so readers globbing it never see a partial partition
+    staging = os.path.join(f"{output.rstrip(os.sep)}.staging", f"year={int(year)}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    conn.execute(f"""
+        COPY (
+            SELECT {', '.join(COLUMNS)}
+            FROM ({source}) src
+            WHERE year = {int(year)}
+            ORDER BY {SORT_ORDER}
+        ) TO '{os.path.join(staging, 'data_0.parquet')}'
+        (FORMAT PARQUET, COMPRESSION {compression}, ROW_GROUP_SIZE {int(row_group_size)})
+    """)
+
+    if os.path.exists(partition):
+        # Move the old partition aside first - the year is absent until the second rename
+        retired = os.path.join(f"{output.rstrip(os.sep)}.retired", f"year={int(year)}")
+        shutil.rmtree(retired, ignore_errors=True)
+        os.makedirs(os.path.dirname(retired), exist_ok=True)
+        os.rename(partition, retired)
+        os.rename(staging, partition)
+        shutil.rmtree(retired)
+    else:
+        os.rename(staging, partition)
+    return partition
+
+
+def build_rollups(
+    conn: duckdb.DuckDBPyConnection,
+    source: str,
+    rollup_dir: str,
+    compression: str = DEFAULT_COMPRESSION
+) -> List[str]:
+    """Write the exporter and importer x product x year total tables, each replaced atomically."""
+    os.makedirs(rollup_dir, exist_ok=True)
+    paths = []
+    for name, partner in ROLLUPS.items():
+        path = os.path.join(rollup_dir, f"{name}.parquet")
+        staging = path + ".tmp"
+        conn.execute(f"""
+            COPY (
+                SELECT
+                    year,
+                    product,
+                    {partner},
+                    ANY_VALUE({partner}_name) AS {partner}_name,
+                    ANY_VALUE(product_description) AS product_description,
+                    SUM(value) AS value,
+                    SUM(quantity) AS quantity,
+                    COUNT(*) AS flows
+                FROM ({source}) src
+                GROUP BY year, product, {partner}
+                ORDER BY product, {partner}, year
+            ) TO '{staging}' (FORMAT PARQUET, COMPRESSION {compression})
+        """)
+        os.replace(staging, path)
+        paths.append(path)
+    return paths
+
+
+def build_dataset(
+    source: str,
+    output: str,
+    years: Optional[List[int]] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+    rollup_dir: Optional[str] = None,
+    conn: Optional[duckdb.DuckDBPyConnection] = None
+) -> List[str]:
+    """
+    Write every (or the selected) year of `source` as a sorted partition under `output`,
+    then rebuild the rollup tables from the whole dataset if `rollup_dir` is given.
+    """
+    own_conn = conn is None
+    conn = conn or duckdb.connect()
+    try:
+        if years is None:
+            years = [row[0] for row in conn.execute(f"SELECT DISTINCT year FROM ({source}) src ORDER BY year").fetchall()]
+        os.makedirs(output, exist_ok=True)
+        partitions = []
+        for year in years:
+            start = time.perf_counter()
+            partitions.append(write_year(conn, source, year, output, row_group_size, compression))
+            print(f"  ✓ {year} written in {time.perf_counter() - start:.1f}s")
+        if rollup_dir:
+            start = time.perf_counter()
+            build_rollups(conn, parquet_source(output), rollup_dir, compression)
+            print(f"  ✓ rollups written in {time.perf_counter() - start:.1f}s")
+        return partitions
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the partitioned BACI dataset.")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--csv-dir", help="Folder containing the CEPII BACI CSV release")
+    source_group.add_argument("--parquet", help="Existing BACI parquet file or dataset to re-layout")
+    parser.add_argument("--output", default="data/BACI/baci_hs17", help="Output dataset directory")
+    parser.add_argument("--rollups", default="data/BACI/rollups", help="Output directory for the rollup tables")
+    parser.add_argument("--skip-rollups", action="store_true", help="Do not rebuild the rollup tables")
+    parser.add_argument("--version", default="V202501", help="CEPII release version (CSV input only)")
+    parser.add_argument("--years", type=int, nargs="*", help="Only (re)build these years")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION)
+    args = parser.parse_args(argv)
+
+    source = csv_source(args.csv_dir, args.version) if args.csv_dir else parquet_source(args.parquet)
+    print(f"Building BACI dataset in {args.output}")
+    build_dataset(
+        source, args.output, args.years, args.row_group_size, args.compression,
+        rollup_dir=None if args.skip_rollups else args.rollups
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,211 +1,587 @@
-from tradelens.data_models import TradeRecord, TradeDataResponse, ProdcomRecord
+from tradelens.cache import RESULTS, canonical_key
+from tradelens.data_models import TradeBatchRequest, TradeBatchResponse, TradeDataResponse
+from tradelens.database import get_database
+from tradelens.executor import run_query
+from tradelens.export import export_response, start_export
+from tradelens.paging import fetch_columns, fetch_page
+from tradelens.serialization import paged_response_json, records_json
 
+import orjson
 from fastapi import APIRouter, Query, HTTPException
-from typing import List
+from fastapi.responses import Response
+from typing import Collection, List, Optional, Set, Tuple
 from datetime import datetime
-import duckdb
 
 router = APIRouter(
     prefix="/api/trade-query",
     tags=["baci"],
 )
 
+# Deterministic page order - (year, value, exporter, importer, product) is unique per BACI row
+TRADE_ORDER_BY = [
+    ("year", True),
+    ("value", True),
+    ("exporter_id", False),
+    ("importer_id", False),
+    ("product_code", False),
+]
+
+# TradeRecord field -> column of the trade query holding it, in response order
+TRADE_FIELDS = {
+    "product_code": "product_code",
+    "product": "product_description",
+    "year": "year",
+    "exporter_name": "exporter_name",
+    "exporter_id": "exporter_id",
+    "importer_name": "importer_name",
+    "importer_id": "importer_id",
+    "trade_flow": "trade_flow",
+    "value": "value",
+    "quantity": "quantity",
+    "unit": "unit",
+}
+
+# Rollup views written by tradelens.baci_build and the dimensions each one keeps
+ROLLUP_VIEWS = {
+    "baci_exporter_totals": {"year", "product", "exporter"},
+    "baci_importer_totals": {"year", "product", "importer"},
+}
+
+WORLD_TOTALS_DESCRIPTION = "Side to_country=world totals are kept per: exporter (default) or importer"
+
+
+#### Pick a pre-aggregated rollup able to answer an aggregate query
+def plan_rollup(dimensions: Set[str], available_views: Collection[str]) -> Optional[str]:
+    """Returns the first registered rollup view keeping every dimension the query groups or filters on, or None."""
+    
+    for view, kept in ROLLUP_VIEWS.items():
+        if view in available_views and dimensions <= kept:
+            return view
+    return None
+
+
+#### Dimensions a "world" aggregate groups or filters on, used to pick its rollup
+def world_dimensions(world_totals: str, exporter_filter: bool) -> Set[str]:
+    """
+    A world aggregate keeps one row per `world_totals` country ("exporter" or
+    "importer"); from_country always filters the exporters, so an exporter filter
+    on importer totals needs the exporter column as well.
+    """
+    dimensions = {"year", "product", world_totals}
+    if exporter_filter:
+        dimensions.add("exporter")
+    return dimensions
+
+
+def party_columns(reporter: Optional[str] = None, grouped: bool = False) -> str:
+    """
+    importer_id/importer_name/exporter_id/exporter_name select list. The side a
+    world aggregate sums over (every side but `reporter`) is reported as World.
+    """
+    columns = []
+    for side in ("importer", "exporter"):
+        if reporter and side != reporter:
+            columns.append(f"0 as {side}_id, 'World' as {side}_name")
+        else:
+            name = f"ANY_VALUE({side}_name)" if grouped else f"CAST({side}_name AS VARCHAR)"
+            columns.append(f"{side} as {side}_id, COALESCE({name}, '') as {side}_name")
+    return ",\n            ".join(columns)
+
+
+#### Parse comma-separated numeric codes once at the API boundary
+def parse_codes(value: str, label: str) -> List[int]:
+    """Parses a comma-separated list of integer codes, skipping the 'everywhere' and 'world' keywords."""
+    
+    codes = []
+    for code in value.split(","):
+        code = code.strip()
+        if not code or code in ["everywhere", "world"]:
+            continue
+        try:
+            codes.append(int(code))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {label} code '{code}'")
+    return codes
+
+
+#### Validate the trade query parameters shared by the query and export end points
+def parse_trade_filters(
+    product_codes: str,
+    from_country: str,
+    to_country: str,
+    year_from: int,
+    year_to: int
+) -> Tuple[List[int], List[int], List[int]]:
+    """Returns the product, origin and destination code lists, raising 400 on invalid input."""
+    
+    if year_to < year_from:
+        raise HTTPException(status_code=400, detail="year_to must be >= year_from")
+    
+    product_list = parse_codes(product_codes, "product")
+    if not product_list:
+        raise HTTPException(status_code=400, detail="At least one product code required")
+    
+    return product_list, parse_codes(from_country, "country"), parse_codes(to_country, "country")
+
+
+#### Build the BACI trade query with typed, pushdown-friendly predicates
+def build_trade_query(
+    trade_type: str,
+    product_list: List[int],
+    from_country_list: List[int],
+    to_country_list: List[int],
+    year_from: int,
+    year_to: int,
+    aggregate_data: bool = False,
+    available_views: Collection[str] = (),
+    world_totals: str = "exporter"
+) -> Tuple[str, list]:
+    """
+    Returns the unordered, unpaginated trade query and its parameters.
+    
+    Columns are already typed and NULL-free as TradeRecord expects, so pages can
+    be serialised straight from the result columns.
+    
+    Filters compare the integer product/exporter/importer columns directly with
+    integer parameters, so DuckDB can skip parquet row groups using their
+    min/max statistics. Aggregate ("world") queries keep one row per
+    `world_totals` country (exporters by default, or importers), read from a
+    rollup when one among `available_views` keeps every dimension they group or
+    filter on, and sum the raw rows otherwise.
+    """
+    
+    params = []
+    source = "baci"
+    reporter = world_totals if aggregate_data else None
+    rollup = plan_rollup(world_dimensions(reporter, bool(from_country_list)), available_views) if reporter else None
+    
+    if rollup:
+        # Rollup already holds one row per reporting country, product and year
+        select_clause = f"""
+        SELECT 
+            CAST(product AS VARCHAR) as product_code,
+            COALESCE(product_description, 'Product ' || CAST(product AS VARCHAR)) as product_description,
+            year,
+            {party_columns(reporter)},
+            ? as trade_flow,
+            COALESCE(value, 0.0) as value,
+            COALESCE(quantity, 0.0) as quantity,
+            'metric tons' as unit
+        """
+        group_clause = ""
+        source = rollup
+    elif reporter:
+        # Aggregated query - one row per reporting country, summed across all of its partners
+        select_clause = f"""
+        SELECT 
+            CAST(product AS VARCHAR) as product_code,
+            COALESCE(ANY_VALUE(product_description), 'Product ' || CAST(product AS VARCHAR)) as product_description,
+            year,
+            {party_columns(reporter, grouped=True)},
+            ? as trade_flow,
+            COALESCE(SUM(value), 0.0) as value,
+            COALESCE(SUM(quantity), 0.0) as quantity,
+            'metric tons' as unit
+        """
+        group_clause = f"GROUP BY product, year, {reporter}"
+    else:
+        select_clause = f"""
+        SELECT 
+            CAST(product AS VARCHAR) as product_code,
+            COALESCE(product_description, 'Product ' || CAST(product AS VARCHAR)) as product_description,
+            year,
+            {party_columns()},
+            ? as trade_flow,
+            COALESCE(value, 0.0) as value,
+            COALESCE(quantity, 0.0) as quantity,
+            'metric tons' as unit  
+        """
+        group_clause = ""
+    params.append(trade_type)
+    
+    # Build WHERE conditions
+    where_conditions = ["year BETWEEN ? AND ?"]
+    params.extend([year_from, year_to])
+    
+    where_conditions.append(f"product IN ({','.join(['?'] * len(product_list))})")
+    params.extend(product_list)
+    
+    if from_country_list:
+        where_conditions.append(f"exporter IN ({','.join(['?'] * len(from_country_list))})")
+        params.extend(from_country_list)
+    
+    if not aggregate_data and to_country_list:
+        where_conditions.append(f"importer IN ({','.join(['?'] * len(to_country_list))})")
+        params.extend(to_country_list)
+    
+    query = f"""
+    {select_clause}
+    FROM {source}
+    WHERE {' AND '.join(where_conditions)}
+    {group_clause}
+    """
+    return query, params
+
 
 #### 4. End point defining main BACI trade data query
 @router.get("", response_model=TradeDataResponse)
 async def query_trade_data(
-    trade_type: str = Query("imports", regex="^(imports|exports|all)$"),
+    trade_type: str = Query("imports", pattern="^(imports|exports|all)$"),
     product_codes: str = Query("950300", description="Comma-separated product codes"),
     from_country: str = Query("156", description="Origin country"),
     to_country: str = Query("everywhere", description="Destination country"),
     year_from: int = Query(2020, ge=2000, le=2024),
     year_to: int = Query(2022, ge=2000, le=2024),
     page: int = Query(1, ge=1),
-    page_size: int = Query(100, ge=10, le=10000)
+    page_size: int = Query(100, ge=10, le=10000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page, for fast deep paging"),
+    world_totals: str = Query("exporter", pattern="^(exporter|importer)$", description=WORLD_TOTALS_DESCRIPTION)
 ):
-    """Returns trade data based on query parameters."""
+    """
+    Returns trade data based on query parameters. With to_country=world the rows
+    are totals across all destinations per exporter, or with world_totals=importer
+    per importing country (from_country still selects the exporters summed).
+    """
     
-    start_time = datetime.now()
+    product_list, from_country_list, to_country_list = parse_trade_filters(
+        product_codes, from_country, to_country, year_from, year_to
+    )
     
-    if year_to < year_from:
-        raise HTTPException(status_code=400, detail="year_to must be >= year_from")
+    # "world" means aggregate across all partners
+    content = await run_query(
+        fetch_trade_data,
+        trade_type,
+        product_list,
+        from_country_list,
+        to_country_list,
+        year_from,
+        year_to,
+        page,
+        page_size,
+        cursor,
+        to_country == "world",
+        world_totals
+    )
+    return Response(content=content, media_type="application/json")
+
+
+#### End point streaming the full filtered BACI result as a file
+@router.get("/export")
+async def export_trade_data(
+    trade_type: str = Query("imports", pattern="^(imports|exports|all)$"),
+    product_codes: str = Query("950300", description="Comma-separated product codes"),
+    from_country: str = Query("156", description="Origin country"),
+    to_country: str = Query("everywhere", description="Destination country"),
+    year_from: int = Query(2020, ge=2000, le=2024),
+    year_to: int = Query(2022, ge=2000, le=2024),
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$", description="csv, parquet or arrow (IPC stream)"),
+    world_totals: str = Query("exporter", pattern="^(exporter|importer)$", description=WORLD_TOTALS_DESCRIPTION)
+):
+    """Streams every record matching the trade query, in the same columns as /api/trade-query."""
     
-    product_list = [code.strip() for code in product_codes.split(",") if code.strip()]
-    if not product_list:
-        raise HTTPException(status_code=400, detail="At least one product code required")
+    product_list, from_country_list, to_country_list = parse_trade_filters(
+        product_codes, from_country, to_country, year_from, year_to
+    )
+    
+    base_query, params = build_trade_query(
+        trade_type, product_list, from_country_list, to_country_list, year_from, year_to, to_country == "world",
+        get_database().view_names(), world_totals
+    )
+    # Unordered, so DuckDB can stream rows as it scans instead of sorting the whole result first
+    columns = ", ".join(f"{column} AS {field}" for field, column in TRADE_FIELDS.items())
+    query = f"SELECT {columns} FROM ({base_query}) export_q"
+    
+    try:
+        stream = await start_export(query, params, format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Export failed: {str(e)}")
+    return export_response(stream, f"trade_{trade_type}_{year_from}_{year_to}")
+
+
+#### End point answering many trade queries with a shared scan
+@router.post("/batch", response_model=TradeBatchResponse)
+async def query_trade_batch(request: TradeBatchRequest):
+    """
+    Returns one /api/trade-query result per query, in request order. Queries are
+    planned into at most three scans (bilateral queries, and "world" queries with
+    exporter and with importer totals) instead of one scan per query.
+    """
+    
+    specs = []
+    for i, query in enumerate(request.queries):
+        try:
+            product_list, from_country_list, to_country_list = parse_trade_filters(
+                query.product_codes, query.from_country, query.to_country, query.year_from, query.year_to
+            )
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Query {i}: {e.detail}")
+        specs.append({
+            "spec": i,
+            "trade_type": query.trade_type,
+            # Repeated codes would join a row to its spec more than once
+            "products": sorted(set(product_list)),
+            "exporters": sorted(set(from_country_list)),
+            "importers": sorted(set(to_country_list)),
+            "year_from": query.year_from,
+            "year_to": query.year_to,
+            "page": query.page,
+            "page_size": query.page_size,
+            # Side kept by a "world" aggregate, None for bilateral queries
+            "aggregate": query.world_totals if query.to_country == "world" else None,
+        })
+    
+    content = await run_query(fetch_trade_batch, specs)
+    return Response(content=content, media_type="application/json")
+
+
+#### Build one query answering a batch of trade queries with a single scan
+def build_batch_query(specs: List[dict], reporter: Optional[str] = None, available_views: Collection[str] = ()) -> Tuple[str, list]:
+    """
+    Returns one query over the union of the specs' filters, tagging each row with
+    every spec it matches and keeping each spec's requested page.
+    
+    Specs are dicts with spec (id), trade_type, products, exporters, importers,
+    year_from, year_to, page and page_size. Rows come back ordered by spec, then in
+    the /api/trade-query page order, with the spec's total_records on every row.
+    Each spec's first row is always kept so its total survives an empty page.
+    With a `reporter` ("exporter" or "importer") the specs are "world" aggregates
+    with that side's totals, grouped per spec, product, year and reporter, or read
+    from a rollup among `available_views` (see world_dimensions).
+    """
+    
+    params = []
+    spec_rows = []
+    for spec in specs:
+        spec_rows.append("(?, ?, ?::BIGINT[], ?::BIGINT[], ?::BIGINT[], ?, ?, ?, ?)")
+        params.extend([
+            spec["spec"], spec["trade_type"], spec["products"], spec["exporters"], spec["importers"],
+            spec["year_from"], spec["year_to"],
+            (spec["page"] - 1) * spec["page_size"] + 1, spec["page"] * spec["page_size"],
+        ])
+    
+    # Union of the specs' filters, pushed down into the single scan
+    products = sorted({product for spec in specs for product in spec["products"]})
+    where_conditions = ["b.year BETWEEN ? AND ?", f"b.product IN ({','.join(['?'] * len(products))})"]
+    params.extend([min(spec["year_from"] for spec in specs), max(spec["year_to"] for spec in specs)])
+    params.extend(products)
+    exporter_filter = any(spec["exporters"] for spec in specs)
+    if all(spec["exporters"] for spec in specs):
+        exporters = sorted({exporter for spec in specs for exporter in spec["exporters"]})
+        where_conditions.append(f"b.exporter IN ({','.join(['?'] * len(exporters))})")
+        params.extend(exporters)
+    if not reporter and all(spec["importers"] for spec in specs):
+        importers = sorted({importer for spec in specs for importer in spec["importers"]})
+        where_conditions.append(f"b.importer IN ({','.join(['?'] * len(importers))})")
+        params.extend(importers)
     
-    # Parse country codes 
-    from_country_list = [code.strip() for code in from_country.split(",") if code.strip() and code.strip() not in ["everywhere", "world"]]
-    to_country_list = [code.strip() for code in to_country.split(",") if code.strip() and code.strip() not in ["everywhere", "world"]]
+    # Per-spec conditions on each scanned row - the scan itself is shared
+    where_conditions.append("b.year BETWEEN s.year_from AND s.year_to")
+    if exporter_filter:
+        where_conditions.append("(len(s.exporters) = 0 OR list_contains(s.exporters, b.exporter))")
+    if not reporter:
+        where_conditions.append("(len(s.importers) = 0 OR list_contains(s.importers, b.importer))")
+    
+    rollup = plan_rollup(world_dimensions(reporter, exporter_filter), available_views) if reporter else None
+    tagged = f"""
+        SELECT s.spec, s.trade_flow, s.row_from, s.row_to, b.*
+        FROM {rollup or 'baci'} b
+        JOIN spec_products sp ON sp.product = b.product
+        JOIN specs s ON s.spec = sp.spec
+        WHERE {' AND '.join(where_conditions)}
+    """
+    
+    if reporter and not rollup:
+        tagged = f"""
+        SELECT
+            spec, ANY_VALUE(trade_flow) AS trade_flow, ANY_VALUE(row_from) AS row_from, ANY_VALUE(row_to) AS row_to,
+            product, year, {reporter},
+            ANY_VALUE(product_description) AS product_description,
+            ANY_VALUE({reporter}_name) AS {reporter}_name,
+            SUM(value) AS value,
+            SUM(quantity) AS quantity
+        FROM ({tagged}) t
+        GROUP BY spec, product, year, {reporter}
+        """
+    
+    order_by = ", ".join(f"{column}{' DESC' if descending else ''}" for column, descending in TRADE_ORDER_BY)
+    query = f"""
+    WITH specs AS (
+        SELECT * FROM (VALUES {', '.join(spec_rows)})
+        s(spec, trade_flow, products, exporters, importers, year_from, year_to, row_from, row_to)
+    ),
+    spec_products AS (SELECT spec, unnest(products) AS product FROM specs),
+    records AS (
+        SELECT
+            spec,
+            row_from,
+            row_to,
+            CAST(product AS VARCHAR) AS product_code,
+            COALESCE(product_description, 'Product ' || CAST(product AS VARCHAR)) AS product_description,
+            year,
+            {party_columns(reporter)},
+            trade_flow,
+            COALESCE(value, 0.0) AS value,
+            COALESCE(quantity, 0.0) AS quantity,
+            'metric tons' AS unit
+        FROM ({tagged}) tagged
+    ),
+    ranked AS (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (PARTITION BY spec ORDER BY {order_by}) AS row_number,
+            COUNT(*) OVER (PARTITION BY spec) AS total_records
+        FROM records
+    )
+    SELECT * FROM ranked
+    WHERE row_number BETWEEN row_from AND row_to OR row_number = 1
+    ORDER BY spec, row_number
+    """
+    return query, params
+
+
+#### Blocking implementation of the trade query, run on the query executor
+def fetch_trade_data(
+    trade_type: str,
+    product_list: List[int],
+    from_country_list: List[int],
+    to_country_list: List[int],
+    year_from: int,
+    year_to: int,
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    aggregate_data: bool = False,
+    world_totals: str = "exporter"
+) -> bytes:
+    """
+    Runs the BACI trade query against the shared database and returns the
+    TradeDataResponse JSON body.
+    
+    The page is fetched column-wise and written with orjson without building a
+    TradeRecord per row; the serialised records are what gets cached.
+    """
+    
+    start_time = datetime.now()
     
     try:
-        # "world" means aggregate across all partners
-        aggregate_data = to_country == "world"
+        database = get_database()
+        available_views = database.view_names()
         
-        params = []
+        # Filters that determine the result, including the version of the files it is computed from
+        reporter = world_totals if aggregate_data else None
+        filters = dict(
+            version=database.view_version("baci"),
+            rollup_version=database.view_version(f"baci_{reporter}_totals") if reporter else None,
+            aggregate=reporter,
+            products=product_list,
+            exporters=from_country_list,
+            importers=to_country_list,
+            year_from=year_from,
+            year_to=year_to,
+        )
+        cache_key = canonical_key(
+            "trade-query", trade_type=trade_type, page=page, page_size=page_size, cursor=cursor, **filters
+        )
+        cached = RESULTS.get(cache_key)
         
-        if aggregate_data:
-            # Aggregated query - sum across all partners for the specified country
-            if trade_type == "exports":
-                # For exports to world: sum all importers for the exporting country
-                select_clause = """
-                SELECT 
-                    CAST(product AS VARCHAR) as product_code,
-                    ANY_VALUE(product_description) as product_description,
-                    year,
-                    'World' as partner,
-                    ? as trade_flow,
-                    SUM(value) as value,
-                    SUM(quantity) as quantity,
-                    'metric tons' as unit
-                """
-                group_clause = "GROUP BY product, year"
-            else:
-                # For imports from world: sum all exporters to the importing country  
-                select_clause = """
-                SELECT 
-                    CAST(product AS VARCHAR) as product_code,
-                    ANY_VALUE(product_description) as product_description,
-                    year,
-                    'World' as partner,
-                    ? as trade_flow,
-                    SUM(value) as value,
-                    SUM(quantity) as quantity,
-                    'metric tons' as unit
-                """
-                group_clause = "GROUP BY product, year"
-                
-            params.append(trade_type)
+        if cached is None:
+            base_query, params = build_trade_query(
+                trade_type, product_list, from_country_list, to_country_list, year_from, year_to, aggregate_data,
+                available_views, world_totals
+            )
             
-        else:
-            select_clause = f""" 
-            SELECT 
-                CAST(product AS VARCHAR) as product_code,
-                product_description,
-                year,
-                CAST(importer AS VARCHAR) as importer_id,
-                CAST(importer_name AS VARCHAR) as importer_name,
-                CAST(exporter AS VARCHAR) as exporter_id,
-                CAST(exporter_name AS VARCHAR) as exporter_name,
-                ? as trade_flow,
-                value as value,
-                quantity as quantity,
-                'metric tons' as unit  
-            """
-            params.append(trade_type)
-            group_clause = ""
-        
-        # Build WHERE conditions
-        where_conditions = []
-        
-        # Year filter  
-        where_conditions.append("year BETWEEN ? AND ?")
-        params.extend([year_from, year_to])
-        
-        # Product codes
-        product_placeholders = ",".join(["?" for _ in product_list])
-        where_conditions.append(f"CAST(product AS VARCHAR) IN ({product_placeholders})")
-        params.extend(product_list)
-        
-        if from_country not in ["everywhere", "world"] and from_country_list:
-            from_placeholders = ",".join(["?" for _ in from_country_list])
-            where_conditions.append(f"CAST(exporter AS VARCHAR) IN ({from_placeholders})")
-            params.extend(from_country_list)
+            # The cached total is shared by every page of a query
+            signature = canonical_key("trade-total", **filters)
             
-        if not aggregate_data and to_country not in ["everywhere", "world"] and to_country_list:
-            to_placeholders = ",".join(["?" for _ in to_country_list])
-            where_conditions.append(f"CAST(importer AS VARCHAR) IN ({to_placeholders})")
-            params.extend(to_country_list)
-        
-        else:  # trade_type == "all"
-            # For "all": include both import and export flows
-            if from_country not in ["everywhere", "world"] and from_country_list:
-                from_placeholders = ",".join(["?" for _ in from_country_list])
-                where_conditions.append(f"(CAST(exporter AS VARCHAR) IN ({from_placeholders}) OR CAST(importer AS VARCHAR) IN ({from_placeholders}))")
-                params.extend(from_country_list * 2)  # Need params twice for OR condition
+            with database.cursor() as conn:
+                columns, total_records, next_cursor = fetch_page(
+                    conn, base_query, params, TRADE_ORDER_BY, page, page_size, signature, cursor
+                )
             
-            if not aggregate_data and to_country not in ["everywhere", "world"] and to_country_list:
-                to_placeholders = ",".join(["?" for _ in to_country_list])
-                where_conditions.append(f"(CAST(importer AS VARCHAR) IN ({to_placeholders}) OR CAST(exporter AS VARCHAR) IN ({to_placeholders}))")
-                params.extend(to_country_list * 2)  # Need params twice for OR condition
+            data_json = records_json({field: columns[column] for field, column in TRADE_FIELDS.items()})
+            cached = (total_records, next_cursor, data_json)
+            RESULTS.put(cache_key, cached)
         
-        # Complete queries
-        base_from = "FROM 'data/BACI/baci_hs17_2017_2022.parquet'"
-        where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
-        
-        # Count query
-        if group_clause:
-            count_query = f"""
-            SELECT COUNT(*) as total FROM (
-                SELECT 1 {base_from} {where_clause} {group_clause}
-            ) subq
-            """
-            #count_params = params[1:]
-        else:
-            count_query = f"SELECT COUNT(*) as total {base_from} {where_clause}"
-        
-        # Remove trade_flow parameter for count query (it's only used in SELECT)
-        count_params = params[1:]
-        
-        # Data query
-        offset = (page - 1) * page_size
-        data_query = f"""
-        {select_clause}
-        {base_from}
-        {where_clause}
-        {group_clause}
-        ORDER BY year DESC, value DESC
-        LIMIT ? OFFSET ?
-        """
+        total_records, next_cursor, data_json = cached
         
-        conn = duckdb.connect()
-        
-        # Use a separate params list for count and data queries
-        data_params = list(params) + [page_size, offset]  # Add LIMIT and OFFSET for data query
+        # Time the query for performance analysis
+        execution_time = (datetime.now() - start_time).total_seconds() * 1000
         
-        total_result = conn.execute(count_query, count_params).fetchone()
-        total_records = total_result[0] if total_result else 0
+        return paged_response_json(
+            total_records, page, page_size, data_json, round(execution_time, 2), next_cursor=next_cursor
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Query failed: {str(e)}")
+
+
+#### Blocking implementation of the batch query, run on the query executor
+def fetch_trade_batch(specs: List[dict]) -> bytes:
+    """
+    Answers each spec from the result cache where possible, runs one batch query
+    for the remaining bilateral specs and one for each side of the remaining
+    "world" specs, and returns the TradeBatchResponse JSON body.
+    """
+    
+    start_time = datetime.now()
+    
+    try:
+        database = get_database()
+        available_views = database.view_names()
+        version = database.view_version("baci")
         
-        data_result = conn.execute(data_query, data_params).fetchall()
+        def spec_key(spec):
+            return canonical_key(
+                "trade-batch",
+                version=version,
+                rollup_version=database.view_version(f"baci_{spec['aggregate']}_totals") if spec["aggregate"] else None,
+                **{k: v for k, v in spec.items() if k != "spec"}
+            )
         
-        conn.close()
+        pages = {}
+        for spec in specs:
+            cached = RESULTS.get(spec_key(spec))
+            if cached is not None:
+                pages[spec["spec"]] = cached
         
-        data = []
-        for row in data_result:
-            try:
-                product_code = str(row[0]) if row[0] is not None else ""
-                product_description = str(row[1]) if row[1] is not None else f"Product {product_code}"
-                 
-                trade_record = TradeRecord(
-                    product_code=product_code,
-                    product=product_description,
-                    year=int(row[2]) if row[2] is not None else 0, 
-                    importer_id=str(row[3]) if row[3] is not None else "",
-                    importer_name=str(row[4]) if row[4] is not None else "",
-                    exporter_id=str(row[5]) if row[5] is not None else "",
-                    exporter_name=str(row[6]) if row[6] is not None else "",
-                    trade_flow=str(row[7]) if row[7] is not None else "",
-                    value=float(row[8]) if row[8] is not None else 0.0,
-                    quantity=float(row[9]) if row[9] is not None else 0.0,
-                    unit=str(row[10]) if row[10] is not None else "metric tons" 
-                )
-                data.append(trade_record)
-            except (IndexError, ValueError, TypeError) as e:
-                print(f"Error converting row {row}: {e}")
+        scans = 0
+        for reporter in [None, "exporter", "importer"]:
+            pending = [spec for spec in specs if spec["aggregate"] == reporter and spec["spec"] not in pages]
+            if not pending:
                 continue
+            query, params = build_batch_query(pending, reporter, available_views)
+            with database.cursor() as conn:
+                columns = fetch_columns(conn, query, params)
+            scans += 1
+            
+            # Rows are ordered by spec - slice each spec's page out of the columns
+            spec_ids = columns["spec"]
+            bounds = {}
+            for row, spec_id in enumerate(spec_ids):
+                start, _ = bounds.get(spec_id, (row, row))
+                bounds[spec_id] = (start, row + 1)
+            for spec in pending:
+                start, end = bounds.get(spec["spec"], (0, 0))
+                total_records = columns["total_records"][start] if end > start else 0
+                if end > start and columns["row_number"][start] < columns["row_from"][start]:
+                    start += 1
+                data_json = records_json({
+                    field: columns[column][start:end] for field, column in TRADE_FIELDS.items()
+                })
+                pages[spec["spec"]] = (total_records, data_json)
+                RESULTS.put(spec_key(spec), pages[spec["spec"]])
         
-        # Time the query for performance analysis
-        execution_time = (datetime.now() - start_time).total_seconds() * 1000
-        total_pages = (total_records + page_size - 1) // page_size
-        
-        return TradeDataResponse(
-            total_records=total_records,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages,
-            data=data,
-            execution_time_ms=round(execution_time, 2)
+        execution_time = round((datetime.now() - start_time).total_seconds() * 1000, 2)
+        results = []
+        for spec in specs:
+            total_records, data_json = pages[spec["spec"]]
+            results.append(paged_response_json(total_records, spec["page"], spec["page_size"], data_json, execution_time))
+        return (
+            b'{"results":[' + b",".join(results) + b'],"scans":' + str(scans).encode()
+            + b',"execution_time_ms":' + orjson.dumps(execution_time) + b"}"
         )
 
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Query failed: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Batch query failed: {str(e)}")
@@ -0,0 +1,706 @@
+"""
+Benchmark and load test for the API hot paths.
+
+`generate` writes synthetic BACI- and PRODCOM-shaped datasets at a chosen scale,
+laid out as tradelens.baci_build and tradelens.prodcom_build write them, plus
+synthetic embedding catalogues in the tradelens.embedding_store format.
+`run` starts the API on that data (or targets a running one with --url), sends
+random requests to /api/trade-query, /api/prodcom-query and /api/products from
+concurrent clients, and writes latency percentiles and throughput as JSON.
+`compare` reports the change between two result files, e.g. from two commits.
+`micro` times in-process hot paths (search indexes and the like) on the generated
+data; the unit tests only check their behaviour.
+
+Usage (from the api folder):
+
+    python -m tradelens.benchmark generate --output bench --baci-rows 10000000
+    python -m tradelens.benchmark run --data bench --concurrency 16 --requests 500 --output bench/results/head.json
+    python -m tradelens.benchmark compare bench/results/base.json bench/results/head.json --threshold 10
+    python -m tradelens.benchmark micro --data bench
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import duckdb
+import httpx
+import numpy as np
+import orjson
+
+from tradelens import baci_build, prodcom_build
+from tradelens.baci_service import TRADE_FIELDS, TRADE_ORDER_BY, build_trade_query
+from tradelens.code_index import CodeIndex
+from tradelens.data_models import TradeDataResponse, TradeRecord
+from tradelens.embedding_store import convert_dump, load_catalogue, store_paths
+from tradelens.lexical_index import BM25Index, item_text
+from tradelens.paging import fetch_columns, order_clause
+from tradelens.serialization import paged_response_json, records_json
+from tradelens.vector_index import benchmark_indexes, normalize
+
+
+# Scale defaults - BACI HS17 has ~230 countries, ~5,000 products and ~11M rows a year
+DEFAULT_BACI_ROWS = 1_000_000
+DEFAULT_COUNTRIES = 230
+DEFAULT_PRODUCTS = 5000
+DEFAULT_YEARS = list(range(2017, 2023))
+DEFAULT_PRODCOM_CODES = 4000
+PRODCOM_YEARS = list(range(2014, 2025))
+DEFAULT_CATALOGUE_ITEMS = 5000
+EMBEDDING_DIM = 384
+
+METADATA_FILE = "bench.json"
+
+# The api folder, where uvicorn finds main:app
+API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Words the synthetic product descriptions (and the autocomplete searches) are drawn from
+VOCABULARY = [
+    "live", "animals", "meat", "fish", "dairy", "vegetables", "fruit", "coffee", "cereals", "flour",
+    "oils", "sugar", "cocoa", "beverages", "tobacco", "salt", "ores", "fuels", "chemicals", "pharmaceutical",
+    "fertilisers", "paints", "soaps", "plastics", "rubber", "leather", "wood", "paper", "books", "silk",
+    "wool", "cotton", "yarn", "fabrics", "apparel", "footwear", "stone", "ceramic", "glass", "pearls",
+    "iron", "steel", "copper", "nickel", "aluminium", "tools", "machinery", "engines", "pumps", "electrical",
+    "vehicles", "aircraft", "ships", "optical", "clocks", "instruments", "furniture", "toys", "games", "parts",
+]
+
+
+#### Synthetic data
+def unit_hash(i: str, salt: str) -> str:
+    """SQL expression mapping a row number to a pseudo-random number in [0, 1)."""
+    return f"(hash({i}, '{salt}') % 1000003) / 1000003.0"
+
+
+def baci_year_source(year: int, rows: int, countries: int, products: int, seed: int = 0) -> str:
+    """
+    SQL relation of `rows` BACI-shaped flows for one year. Exporters, importers and
+    products are skewed towards low codes, as trade is concentrated in few countries
+    and products, and values are log-uniform.
+    """
+    i = f"i + {int(year) * 1_000_000_007 + int(seed)}"
+    exporter = f"CAST(4 * (1 + floor(pow({unit_hash(i, 'e')}, 2) * {int(countries)})) AS BIGINT)"
+    importer = f"CAST(4 * (1 + floor(pow({unit_hash(i, 'i')}, 2) * {int(countries)})) AS BIGINT)"
+    product = f"CAST(100000 + 180 * floor(pow({unit_hash(i, 'p')}, 1.5) * {int(products)}) AS BIGINT)"
+    return f"""
+        SELECT
+            {int(year)} AS year,
+            exporter, importer, product,
+            round(exp({unit_hash(i, 'v')} * 14), 3) AS value,
+            round(exp({unit_hash(i, 'v')} * 14) * (0.05 + {unit_hash(i, 'q')}), 3) AS quantity,
+            'Country ' || CAST(exporter AS VARCHAR) AS exporter_name,
+            'Country ' || CAST(importer AS VARCHAR) AS importer_name,
+            'Product ' || CAST(product AS VARCHAR) AS product_description
+        FROM (
+            SELECT i, {exporter} AS exporter, {importer} AS importer, {product} AS product
+            FROM range({int(rows)}) t(i)
+        ) flows
+    """
+
+
+def prodcom_source(codes: int, years: List[int] = PRODCOM_YEARS) -> str:
+    """SQL relation of PRODCOM-shaped rows - each code has a value, volume and price series."""
+    year_list = ", ".join(str(int(year)) for year in years)
+    return f"""
+        SELECT
+            CAST(10000000 + c * 1000 AS VARCHAR) AS code,
+            'Synthetic product ' || CAST(c AS VARCHAR) AS description,
+            'Synthetic industry ' || CAST(c % 50 AS VARCHAR) AS parent_description,
+            CASE WHEN c % 25 = 0 THEN 'Industry' ELSE 'Product' END AS type,
+            m.unit AS unit,
+            m.measure AS measure,
+            y.year AS year,
+            CAST(hash(c, y.year, m.measure) % 1000000 AS DOUBLE) / 10 AS value,
+            CASE WHEN hash(c, y.year) % 11 = 0 THEN 'e - low response; high level of estimation' END AS flag
+        FROM range({int(codes)}) t(c)
+        CROSS JOIN (SELECT unnest([{year_list}]) AS year) y
+        CROSS JOIN (VALUES ('Value', 'Value £ million'), ('Volume', 'Volume (kg)'),
+                           ('Average price/Other', 'Average price (£/kg)')) m(measure, unit)
+    """
+
+
+def write_catalogue(item_type: str, items: List[dict], store_dir: str, dim: int = EMBEDDING_DIM, seed: int = 0) -> str:
+    """Write an embedding store entry with random unit vectors for `items`."""
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((len(items), dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    os.makedirs(store_dir, exist_ok=True)
+    matrix_path, meta_path = store_paths(item_type, store_dir)
+    np.save(matrix_path, matrix)
+    with open(meta_path, "w") as f:
+        json.dump({"item_type": item_type, "source": "synthetic", "count": len(items), "dim": dim, "items": items}, f)
+    return matrix_path
+
+
+def describe(rng: random.Random, words: int = 4) -> str:
+    return " ".join(rng.sample(VOCABULARY, words)).capitalize()
+
+
+def generate(
+    output: str,
+    baci_rows: int = DEFAULT_BACI_ROWS,
+    countries: int = DEFAULT_COUNTRIES,
+    products: int = DEFAULT_PRODUCTS,
+    years: List[int] = DEFAULT_YEARS,
+    prodcom_codes: int = DEFAULT_PRODCOM_CODES,
+    catalogue_items: int = DEFAULT_CATALOGUE_ITEMS,
+    seed: int = 0
+) -> dict:
+    """Write the synthetic datasets under `output` and return the workload metadata saved with them."""
+    os.makedirs(output, exist_ok=True)
+    paths = {
+        "baci": os.path.join(output, "baci"),
+        "rollups": os.path.join(output, "rollups"),
+        "prodcom": os.path.join(output, "prodcom_typed.parquet"),
+        "embeddings": os.path.join(output, "embeddings"),
+    }
+    timings = {}
+
+    conn = duckdb.connect()
+    try:
+        start = time.perf_counter()
+        rows_per_year = -(-int(baci_rows) // len(years))
+        os.makedirs(paths["baci"], exist_ok=True)
+        for year in years:
+            baci_build.write_year(conn, baci_year_source(year, rows_per_year, countries, products, seed), year, paths["baci"])
+        shutil.rmtree(paths["baci"] + ".staging", ignore_errors=True)
+        timings["baci_s"] = round(time.perf_counter() - start, 2)
+        print(f"  ✓ BACI: {rows_per_year * len(years):,} rows in {timings['baci_s']}s")
+
+        start = time.perf_counter()
+        baci_build.build_rollups(conn, baci_build.parquet_source(paths["baci"]), paths["rollups"])
+        timings["rollups_s"] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        prodcom_build.build_dataset(prodcom_source(prodcom_codes), paths["prodcom"], conn=conn)
+        timings["prodcom_s"] = round(time.perf_counter() - start, 2)
+        print(f"  ✓ PRODCOM: {prodcom_codes * len(PRODCOM_YEARS) * 3:,} rows in {timings['prodcom_s']}s")
+
+        # Workload domain - the codes that actually occur, read from the small exporter rollup
+        totals = f"read_parquet('{os.path.join(paths['rollups'], 'exporter_totals.parquet')}')"
+        product_codes = [row[0] for row in conn.execute(f"SELECT DISTINCT product FROM {totals} ORDER BY product").fetchall()]
+        country_codes = [row[0] for row in conn.execute(f"SELECT DISTINCT exporter FROM {totals} ORDER BY exporter").fetchall()]
+    finally:
+        conn.close()
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    hs6 = [{"code": code, "description": describe(rng)} for code in product_codes[:catalogue_items]]
+    cn8 = [{"code": str(10000000 + c * 1000), "description": describe(rng), "type": "Product"} for c in range(catalogue_items)]
+    countries_items = [
+        {"code": code, "country_name": f"Country {code}", "country_iso2": f"X{i % 26 + 65:c}", "country_iso3": f"X{i // 26 % 26 + 65:c}{i % 26 + 65:c}"}
+        for i, code in enumerate(country_codes)
+    ]
+    for offset, (item_type, items) in enumerate([("hs6_products", hs6), ("cn8_products", cn8), ("countries", countries_items)]):
+        write_catalogue(item_type, items, paths["embeddings"], seed=seed + offset)
+    timings["catalogues_s"] = round(time.perf_counter() - start, 2)
+
+    metadata = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "scale": {
+            "baci_rows": rows_per_year * len(years),
+            "countries": countries,
+            "products": products,
+            "years": list(years),
+            "prodcom_codes": prodcom_codes,
+            "catalogue_items": catalogue_items,
+            "seed": seed,
+        },
+        "paths": {name: os.path.abspath(path) for name, path in paths.items()},
+        "domain": {
+            "products": product_codes,
+            "countries": country_codes,
+            "prodcom_codes": [str(10000000 + c * 1000) for c in range(prodcom_codes)],
+        },
+        "timings": timings,
+    }
+    with open(os.path.join(output, METADATA_FILE), "w") as f:
+        json.dump(metadata, f)
+    return metadata
+
+
+#### Workload - each scenario draws a random request for the generated data
+def year_range(rng: random.Random, years: List[int]) -> Tuple[int, int]:
+    year_from = rng.choice(years)
+    return year_from, rng.randint(year_from, years[-1])
+
+
+def trade_query(rng: random.Random, metadata: dict, world: bool = False) -> Tuple[str, dict]:
+    domain = metadata["domain"]
+    year_from, year_to = year_range(rng, metadata["scale"]["years"])
+    return "/api/trade-query", {
+        "trade_type": "imports",
+        "product_codes": ",".join(str(code) for code in rng.sample(domain["products"], rng.randint(1, 3))),
+        "from_country": str(rng.choice(domain["countries"])),
+        "to_country": "world" if world else "everywhere",
+        "year_from": year_from,
+        "year_to": year_to,
+        "page_size": 100,
+    }
+
+
+def prodcom_query(rng: random.Random, metadata: dict) -> Tuple[str, dict]:
+    year_from, year_to = year_range(rng, PRODCOM_YEARS)
+    return "/api/prodcom-query", {
+        "product_codes": ",".join(rng.sample(metadata["domain"]["prodcom_codes"], rng.randint(1, 3))),
+        "year_from": year_from,
+        "year_to": year_to,
+        "measure": rng.choice(["Value", "Volume", "Other"]),
+    }
+
+
+def products_search(rng: random.Random, metadata: dict, product_type: str = "hs6_products") -> Tuple[str, dict]:
+    # Mostly partially typed words, as the autocomplete box sends them, some multi-word searches
+    if product_type == "prodcom":
+        search = f"synthetic product {rng.randrange(metadata['scale']['prodcom_codes'])}"[:rng.randint(11, 22)]
+    elif rng.random() < 0.7:
+        word = rng.choice(VOCABULARY)
+        search = word[:rng.randint(3, len(word))]
+    else:
+        search = " ".join(rng.sample(VOCABULARY, 2))
+    return "/api/products", {"search": search, "product_type": product_type, "limit": 20}
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, dict], Tuple[str, dict]]] = {
+    "trade-query": trade_query,
+    "trade-query-world": lambda rng, metadata: trade_query(rng, metadata, world=True),
+    "prodcom-query": prodcom_query,
+    "products": products_search,
+    "products-prodcom": lambda rng, metadata: products_search(rng, metadata, "prodcom"),
+}
+
+
+#### Load generation
+def summarise(latencies_ms: List[float], server_ms: List[float], statuses: Dict[str, int], errors: int, duration_s: float) -> dict:
+    """Latency percentiles and throughput of one scenario."""
+    latencies = np.asarray(latencies_ms, dtype=np.float64)
+    total = int(sum(statuses.values()) + errors)
+
+    def percentiles(values):
+        if not len(values):
+            return {}
+        p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+        return {
+            "mean": round(float(np.mean(values)), 3),
+            "p50": round(float(p50), 3),
+            "p90": round(float(p90), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(np.max(values)), 3),
+        }
+
+    return {
+        "requests": total,
+        "errors": errors + sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "status_codes": dict(sorted(statuses.items())),
+        "duration_s": round(duration_s, 3),
+        "throughput_rps": round(total / duration_s, 2) if duration_s else 0.0,
+        "latency_ms": percentiles(latencies),
+        "server_ms": percentiles(np.asarray(server_ms, dtype=np.float64)),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    metadata: dict,
+    requests: int = 200,
+    concurrency: int = 8,
+    warmup: int = 10,
+    seed: int = 0
+) -> dict:
+    """
+    Send `requests` random requests of a scenario from `concurrency` closed-loop
+    clients (each sends its next request when the previous one returns), after
+    `warmup` unrecorded ones.
+    """
+    rng = random.Random(f"{seed}-{name}")
+    workload = [SCENARIOS[name](rng, metadata) for _ in range(warmup + requests)]
+
+    for path, params in workload[:warmup]:
+        try:
+            await client.get(path, params=params)
+        except httpx.HTTPError:
+            pass
+
+    pending = iter(workload[warmup:])
+    latencies, server_ms, statuses = [], [], {}
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for path, params in pending:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            status = str(response.status_code)
+            statuses[status] = statuses.get(status, 0) + 1
+            if response.status_code == 200 and response.content.startswith(b"{"):
+                body = orjson.loads(response.content)
+                if "execution_time_ms" in body:
+                    server_ms.append(body["execution_time_ms"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarise(latencies, server_ms, statuses, errors, time.perf_counter() - start)
+
+
+async def run_scenarios(client: httpx.AsyncClient, metadata: dict, scenarios: List[str], **options) -> Dict[str, dict]:
+    results = {}
+    for name in scenarios:
+        results[name] = await run_scenario(client, name, metadata, **options)
+        summary = results[name]
+        latency = summary["latency_ms"]
+        print(f"  ✓ {name}: {summary['throughput_rps']} req/s, p50 {latency.get('p50')} ms, "
+              f"p95 {latency.get('p95')} ms, p99 {latency.get('p99')} ms, {summary['errors']} errors")
+    return results
+
+
+def server_env(metadata: dict, cache: bool = True) -> Dict[str, str]:
+    """Environment pointing the API at the generated data."""
+    paths = metadata["paths"]
+    env = dict(os.environ)
+    env.pop("TRADELENS_CACHE_DIR", None)
+    env.update({
+        "TRADELENS_BACI_PATH": paths["baci"],
+        "TRADELENS_BACI_ROLLUP_DIR": paths["rollups"],
+        "TRADELENS_PRODCOM_PATH": paths["prodcom"],
+        "TRADELENS_EMBEDDING_STORE": paths["embeddings"],
+        # Keep any real dataset registry out of the benchmark
+        "TRADELENS_REGISTRY_DIR": os.path.join(os.path.dirname(paths["baci"]), "registry"),
+        "TRADELENS_REGISTRY_POLL_SECONDS": "0",
+    })
+    if not cache:
+        env["TRADELENS_CACHE_MAX_MB"] = "0"
+    return env
+
+
+def start_server(metadata: dict, workers: int = 1, cache: bool = True, timeout: float = 120) -> Tuple[subprocess.Popen, str]:
+    """Start uvicorn on a free port with the generated data; returns the process and its URL once it answers."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=API_DIR,
+        env=server_env(metadata, cache),
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode}")
+        try:
+            httpx.get(url + "/", timeout=1)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"API did not start within {timeout}s")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    metadata: dict,
+    scenarios: List[str],
+    url: Optional[str] = None,
+    requests: int = 200,
+    concurrency: int = 8,
+    warmup: int = 10,
+    workers: int = 1,
+    cache: bool = True,
+    seed: int = 0,
+    timeout: float = 60
+) -> dict:
+    """Load-test every scenario against `url`, or a server started on the generated data; returns the results document."""
+    process = None
+    if url is None:
+        process, url = start_server(metadata, workers, cache)
+    try:
+        async def main():
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+                results = await run_scenarios(
+                    client, metadata, scenarios, requests=requests, concurrency=concurrency, warmup=warmup, seed=seed
+                )
+                metrics = await client.get("/api/metrics")
+                return results, metrics.json() if metrics.status_code == 200 else None
+
+        results, server_metrics = asyncio.run(main())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "target": url if process is None else "local",
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "workers": workers,
+            "cache": cache,
+            "seed": seed,
+            "scale": metadata["scale"],
+        },
+        "scenarios": results,
+        "server_metrics": server_metrics,
+    }
+
+
+#### Comparing runs
+COMPARED = [("latency_ms", "p50"), ("latency_ms", "p95"), ("latency_ms", "p99"), ("throughput_rps", None)]
+
+
+def compare(base: dict, head: dict, threshold: float = 10.0) -> List[dict]:
+    """
+    Per scenario and metric, the change from `base` to `head` in percent. A change is a
+    regression when latency grows, or throughput falls, by more than `threshold` percent.
+    """
+    rows = []
+    for name in sorted(set(base["scenarios"]) & set(head["scenarios"])):
+        for group, key in COMPARED:
+            before = base["scenarios"][name][group]
+            after = head["scenarios"][name][group]
+            if key is not None:
+                before, after = before.get(key), after.get(key)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = change < -threshold if group == "throughput_rps" else change > threshold
+            rows.append({
+                "scenario": name,
+                "metric": key or group,
+                "base": before,
+                "head": after,
+                "change_pct": round(change, 1),
+                "regression": worse,
+            })
+    return rows
+
+
+#### In-process micro-benchmarks - timings that depend on the machine stay out of the unit tests
+def per_call_ms(fn: Callable[[], object], repeat: int) -> float:
+    """Mean wall-clock milliseconds of `fn()` over `repeat` calls."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def micro_code_index(metadata: dict, repeat: int) -> dict:
+    """Code autocomplete over the CN8 catalogue codes, short prefixes to full codes."""
+    items, _ = load_catalogue("cn8_products", metadata["paths"]["embeddings"])
+    index = CodeIndex([item["code"] for item in items])
+    queries = ["1", "10", "100", "1000", "10001", "3", "123", "99"]
+    ms = per_call_ms(lambda: [index.search(query, 50) for query in queries], repeat) / len(queries)
+    return {"codes": len(items), "ms_per_query": round(ms, 4)}
+
+
+def micro_bm25(metadata: dict, repeat: int) -> dict:
+    """BM25 keyword search over the HS6 catalogue descriptions, as autocomplete runs it before the encoder."""
+    items, _ = load_catalogue("hs6_products", metadata["paths"]["embeddings"])
+    index = BM25Index([item_text(item) for item in items])
+    queries = [" ".join(VOCABULARY[i:i + n]) for i, n in [(0, 1), (5, 2), (12, 3), (30, 1), (41, 2)]]
+    ms = per_call_ms(lambda: [index.search(query, 50, match_all=True) for query in queries], repeat) / len(queries)
+    return {"items": len(items), "ms_per_query": round(ms, 4)}
+
+
+def micro_embedding_store(metadata: dict, repeat: int) -> dict:
+    """Loading the CN8 catalogue from the binary store versus parsing the JSON dump it replaces."""
+    items, matrix = load_catalogue("cn8_products", metadata["paths"]["embeddings"])
+    work_dir = os.path.join(os.path.dirname(metadata["paths"]["embeddings"]), "micro_embedding_store")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        dump_path = os.path.join(work_dir, "cn8_dump.json")
+        with open(dump_path, "w") as f:
+            json.dump([{**item, "embedding": row.tolist()} for item, row in zip(items, matrix)], f)
+        convert_dump("cn8_products", dump_path, work_dir)
+        no_store = os.path.join(work_dir, "none")
+        json_ms = per_call_ms(lambda: load_catalogue("cn8_products", no_store, {"cn8_products": [dump_path]}), repeat)
+        store_ms = per_call_ms(lambda: load_catalogue("cn8_products", work_dir), repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {"items": len(items), "json_ms": round(json_ms, 2), "store_ms": round(store_ms, 2)}
+
+
+def micro_vector_index(metadata: dict, repeat: int) -> dict:
+    """Exact versus IVF (and HNSW, if installed) search over the CN8 catalogue vectors."""
+    _, matrix = load_catalogue("cn8_products", metadata["paths"]["embeddings"])
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(matrix), min(max(repeat, 1) * 10, len(matrix)), replace=False)
+    queries = normalize(matrix[rows] + rng.normal(0, 0.05, (len(rows), matrix.shape[1])))
+    result = {"items": len(matrix)}
+    for row in benchmark_indexes(np.asarray(matrix), queries):
+        result[f"{row['kind']}_ms_per_query"] = round(row["query_ms"], 4)
+        result[f"{row['kind']}_recall"] = round(row["recall"], 3)
+    return result
+
+
+def micro_serialization(metadata: dict, repeat: int, page_size: int = 10000) -> dict:
+    """One trade page serialised through TradeRecord models versus straight from the result columns."""
+    query, params = build_trade_query("exports", metadata["domain"]["products"], [], [], 2017, 2022)
+    query = f"SELECT * FROM ({query}) q ORDER BY {order_clause(TRADE_ORDER_BY)} LIMIT {page_size}"
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"CREATE VIEW baci AS {baci_build.parquet_source(metadata['paths']['baci'])}")
+        columns = fetch_columns(conn, query, params)
+    finally:
+        conn.close()
+    fields = {field: columns[column] for field, column in TRADE_FIELDS.items()}
+    rows = len(columns["year"])
+
+    def pydantic_page():
+        data = [TradeRecord(**dict(zip(fields, values))) for values in zip(*fields.values())]
+        return TradeDataResponse(
+            total_records=rows, page=1, page_size=page_size, total_pages=1, data=data, execution_time_ms=0.0
+        ).model_dump_json()
+
+    def columnar_page():
+        return paged_response_json(rows, 1, page_size, records_json(fields), 0.0)
+
+    def rows_per_second(build):
+        return round(rows * 1000 / per_call_ms(build, repeat)) if rows else 0
+
+    return {
+        "rows": rows,
+        "pydantic_rows_per_s": rows_per_second(pydantic_page),
+        "columnar_rows_per_s": rows_per_second(columnar_page),
+    }
+
+
+IMPORT_SCRIPT = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+
+def micro_startup(metadata: dict, repeat: int) -> dict:
+    """Seconds to import the app in a fresh interpreter - the model and catalogues must not load at import."""
+    env = server_env(metadata)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(API_DIR, "src"), env.get("PYTHONPATH")]))
+    seconds = []
+    # Each run is a new interpreter, so a few runs are enough
+    for _ in range(max(1, min(repeat, 5))):
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", IMPORT_SCRIPT], cwd=API_DIR, env=env,
+            capture_output=True, text=True, check=True
+        )
+        seconds.append(float(result.stdout.strip().splitlines()[-1]))
+    return {"import_s": round(float(np.median(seconds)), 3)}
+
+
+MICRO_BENCHMARKS: Dict[str, Callable[[dict, int], dict]] = {
+    "code-index": micro_code_index,
+    "bm25": micro_bm25,
+    "embedding-store": micro_embedding_store,
+    "vector-index": micro_vector_index,
+    "serialization": micro_serialization,
+    "startup": micro_startup,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark and load-test the TradeLens API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sub = commands.add_parser("generate", help="Write synthetic datasets and catalogues")
+    sub.add_argument("--output", default="bench", help="Output directory")
+    sub.add_argument("--baci-rows", type=int, default=DEFAULT_BACI_ROWS, help="BACI rows across all years (1M-500M)")
+    sub.add_argument("--countries", type=int, default=DEFAULT_COUNTRIES)
+    sub.add_argument("--products", type=int, default=DEFAULT_PRODUCTS)
+    sub.add_argument("--prodcom-codes", type=int, default=DEFAULT_PRODCOM_CODES)
+    sub.add_argument("--catalogue-items", type=int, default=DEFAULT_CATALOGUE_ITEMS, help="Items per embedding catalogue")
+    sub.add_argument("--seed", type=int, default=0)
+
+    sub = commands.add_parser("run", help="Load-test the API on generated data")
+    sub.add_argument("--data", default="bench", help="Directory written by generate")
+    sub.add_argument("--url", help="Target a running API instead of starting one (it must serve the generated data)")
+    sub.add_argument("--scenarios", nargs="*", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    sub.add_argument("--requests", type=int, default=200, help="Recorded requests per scenario")
+    sub.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    sub.add_argument("--warmup", type=int, default=10, help="Unrecorded requests per scenario")
+    sub.add_argument("--workers", type=int, default=1, help="uvicorn workers of the started API")
+    sub.add_argument("--no-cache", action="store_true", help="Disable the result cache of the started API")
+    sub.add_argument("--timeout", type=float, default=60, help="Seconds before a request counts as an error")
+    sub.add_argument("--seed", type=int, default=0)
+    sub.add_argument("--output", help="Results file (JSON)")
+
+    sub = commands.add_parser("compare", help="Compare two results files")
+    sub.add_argument("base")
+    sub.add_argument("head")
+    sub.add_argument("--threshold", type=float, default=10.0, help="Percent change reported as a regression")
+
+    sub = commands.add_parser("micro", help="Time in-process hot paths on generated data")
+    sub.add_argument("--data", default="bench", help="Directory written by generate")
+    sub.add_argument("--benchmarks", nargs="*", choices=sorted(MICRO_BENCHMARKS), default=list(MICRO_BENCHMARKS))
+    sub.add_argument("--repeat", type=int, default=20, help="Timed repetitions of each benchmark")
+    sub.add_argument("--output", help="Results file (JSON)")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        print(f"Generating benchmark data in {args.output}")
+        generate(args.output, args.baci_rows, args.countries, args.products, DEFAULT_YEARS,
+                 args.prodcom_codes, args.catalogue_items, args.seed)
+    elif args.command == "run":
+        with open(os.path.join(args.data, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        print(f"Running {len(args.scenarios)} scenarios, {args.requests} requests at concurrency {args.concurrency}")
+        results = run(metadata, args.scenarios, args.url, args.requests, args.concurrency, args.warmup,
+                      args.workers, not args.no_cache, args.seed, args.timeout)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"  ✓ results written to {args.output}")
+    elif args.command == "micro":
+        with open(os.path.join(args.data, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        results = {"git_commit": git_commit(), "scale": metadata["scale"], "benchmarks": {}}
+        for name in args.benchmarks:
+            results["benchmarks"][name] = MICRO_BENCHMARKS[name](metadata, args.repeat)
+            print(f"{name:<20} " + "  ".join(f"{key}={value}" for key, value in results["benchmarks"][name].items()))
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"  ✓ results written to {args.output}")
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.head) as f:
+            head = json.load(f)
+        rows = compare(base, head, args.threshold)
+        for row in rows:
+            flag = "  ✗ regression" if row["regression"] else ""
+            print(f"{row['scenario']:<20} {row['metric']:<15} {row['base']:>10} -> {row['head']:>10} "
+                  f"({row['change_pct']:+.1f}%){flag}")
+        if any(row["regression"] for row in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
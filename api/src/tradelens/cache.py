@@ -0,0 +1,237 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+# Result cache settings - set TRADELENS_CACHE_DIR to keep results across worker restarts
+CACHE_MAX_MB = float(os.environ.get("TRADELENS_CACHE_MAX_MB", "256"))
+CACHE_TTL_SECONDS = float(os.environ.get("TRADELENS_CACHE_TTL", "3600"))
+CACHE_DIR = os.environ.get("TRADELENS_CACHE_DIR")
+CACHE_DISK_MAX_MB = float(os.environ.get("TRADELENS_CACHE_DISK_MAX_MB", "2048"))
+
+
+def canonical_key(namespace: str, **params) -> tuple:
+    """
+    Normalise query parameters into a hashable cache key.
+
+    Lists and sets are de-duplicated and sorted so that "950300,870323" and
+    "870323,950300" share an entry; keyword order does not matter.
+    """
+    items = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            value = tuple(sorted(set(value)))
+        items.append((name, value))
+    return (namespace, tuple(items))
+
+
+class ResultCache:
+    """
+    Thread-safe LRU + TTL cache bounded by the pickled size of its values.
+
+    Entries live in memory and, if `disk_dir` is set, are also written to disk so
+    they survive worker restarts and are shared between workers on one host. The
+    disk tier keeps a running byte total and only rescans its directory to trim
+    once that total exceeds `max_disk_bytes`.
+
+    Dataset versions belong in the key, so stale results simply stop being hit and
+    age out.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        ttl_seconds: float,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 0
+    ):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._disk_files = OrderedDict()  # path -> size, oldest first
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    def _disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{self.name}-{digest}.pkl")
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+
+        value, size = self._read_disk(key, now) if self.disk_dir else (None, 0)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+        self._store(key, value, size, time.time() + self.ttl_seconds)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store `value` under `key`, evicting least recently used entries to stay within budget."""
+        if self.max_bytes <= 0 and not self.disk_dir:
+            # Nothing would be kept - skip pickling the value
+            return
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + self.ttl_seconds
+        self._store(key, value, len(payload), expires_at)
+        if self.disk_dir:
+            self._write_disk(key, expires_at, payload)
+
+    def _store(self, key: Hashable, value: Any, size: int, expires_at: float) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def _read_disk(self, key: Hashable, now: float) -> Tuple[Any, int]:
+        """The value stored on disk for `key` and its pickled size, or (None, 0)."""
+        # File layout: pickled (expires_at, key) header followed by the pickled value
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                expires_at, stored_key = pickle.load(f)
+                if expires_at <= now or stored_key != key:
+                    return None, 0
+                header = f.tell()
+                value = pickle.load(f)
+                return value, f.tell() - header
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None, 0
+
+    def _write_disk(self, key: Hashable, expires_at: float, payload: bytes) -> None:
+        path = self._disk_path(key)
+        staging = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(staging, "wb") as f:
+                pickle.dump((expires_at, key), f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(payload)
+                size = f.tell()
+            os.replace(staging, path)
+        except OSError as e:
+            print(f"Warning: Could not write {self.name} cache entry to disk: {e}")
+            return
+
+        with self._disk_lock:
+            self._disk_bytes += size - self._disk_files.pop(path, 0)
+            self._disk_files[path] = size
+            over_budget = self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._trim_disk()
+
+    def _scan_disk(self) -> None:
+        """Rebuild the running total from the files in the disk tier, including other workers' files."""
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.startswith(f"{self.name}-") and entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        with self._disk_lock:
+            self._disk_files = OrderedDict((path, size) for _, path, size in sorted(files))
+            self._disk_bytes = sum(self._disk_files.values())
+
+    def _trim_disk(self) -> None:
+        """Remove the oldest files until the disk tier is within its budget."""
+        self._scan_disk()
+        with self._disk_lock:
+            while self._disk_files and self._disk_bytes > self.max_disk_bytes:
+                path, size = self._disk_files.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        """Drop every in-memory entry and any files in the disk tier."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_dir:
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.startswith(f"{self.name}-"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+            with self._disk_lock:
+                self._disk_files.clear()
+                self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_dir": self.disk_dir,
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+#### Cache of full trade and PRODCOM query responses shared by the routers
+RESULTS = ResultCache(
+    "results",
+    max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=CACHE_TTL_SECONDS,
+    disk_dir=CACHE_DIR,
+    max_disk_bytes=int(CACHE_DISK_MAX_MB * 1024 * 1024),
+)
+
+
+# Total row counts per filter signature, used by the paging engine
+TOTALS = ResultCache("totals", max_bytes=4 * 1024 * 1024, ttl_seconds=CACHE_TTL_SECONDS)
+
+
+def cache_stats() -> dict:
+    return {"results": RESULTS.stats(), "totals": TOTALS.stats()}
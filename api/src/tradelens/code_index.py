@@ -0,0 +1,95 @@
+"""
+In-memory index for numeric code autocomplete (HS6, CN8, PRODCOM and country codes).
+
+Codes are compared with spaces and dots removed. A search returns codes
+starting with the query first, then codes containing it elsewhere; within each
+group shorter codes come first, then codes in ascending order.
+
+Prefix matches are found by bisecting a sorted code list. Substring matches come
+from an n-gram index: every code is posted under each of its 1..NGRAM-character
+substrings, and longer queries intersect the postings of their n-grams before
+checking the candidates.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+# Longest n-gram kept in the substring index
+NGRAM = 3
+
+
+def clean_code(code) -> str:
+    """Code as compared by the index: spaces and dots removed."""
+    return str(code).replace(" ", "").replace(".", "")
+
+
+def is_code_query(search: str) -> bool:
+    """Whether a search term should be treated as a code (digits, spaces and dots only)."""
+    return clean_code(search).isdigit()
+
+
+class CodeIndex:
+    """Prefix and substring index over a list of codes; search results are positions in that list."""
+
+    def __init__(self, codes: Sequence):
+        self.codes = [clean_code(code) for code in codes]
+        n = len(self.codes)
+
+        # Positions in result order (shorter codes first, then by code) and each position's rank in it
+        self._by_rank = np.array(sorted(range(n), key=lambda i: (len(self.codes[i]), self.codes[i])), dtype=np.int64)
+        rank = np.empty(n, dtype=np.int64)
+        rank[self._by_rank] = np.arange(n)
+
+        # Codes in lexicographic order for prefix ranges
+        lexical = sorted(range(n), key=lambda i: self.codes[i])
+        self._lexical_codes = [self.codes[i] for i in lexical]
+        self._lexical_ranks = rank[lexical] if n else np.empty(0, dtype=np.int64)
+
+        # n-gram -> sorted ranks of the codes containing it
+        postings: Dict[str, set] = {}
+        for i, code in enumerate(self.codes):
+            for size in range(1, NGRAM + 1):
+                for start in range(len(code) - size + 1):
+                    postings.setdefault(code[start:start + size], set()).add(int(rank[i]))
+        self._postings = {gram: np.array(sorted(ranks), dtype=np.int64) for gram, ranks in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _prefix_ranks(self, query: str, limit: int) -> np.ndarray:
+        lo = bisect_left(self._lexical_codes, query)
+        hi = bisect_left(self._lexical_codes, query + "\U0010ffff")
+        ranks = self._lexical_ranks[lo:hi]
+        if len(ranks) > limit:
+            ranks = np.partition(ranks, limit - 1)[:limit]
+        return np.sort(ranks)
+
+    def _substring_ranks(self, query: str) -> np.ndarray:
+        if len(query) <= NGRAM:
+            return self._postings.get(query, np.empty(0, dtype=np.int64))
+        candidates = None
+        for start in range(len(query) - NGRAM + 1):
+            posting = self._postings.get(query[start:start + NGRAM])
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+        return candidates
+
+    def search(self, query: str, limit: int = 50) -> List[int]:
+        """Positions of the best `limit` codes matching `query`, prefix matches first."""
+        query = clean_code(query)
+        if not query or limit <= 0:
+            return []
+
+        results = [int(i) for i in self._by_rank[self._prefix_ranks(query, limit)]]
+        for rank in self._substring_ranks(query):
+            if len(results) >= limit:
+                break
+            code = self.codes[self._by_rank[rank]]
+            # Prefix matches are already in; longer queries' candidates still need checking
+            if not code.startswith(query) and query in code:
+                results.append(int(self._by_rank[rank]))
+        return results
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Query, HTTPException
 from typing import Optional, List
 
 from tradelens.embedding import embedding_autocomplete
+from tradelens.executor import run_embedding
 from tradelens.prodcom_service import search_prodcom_products_db
 
 
@@ -22,16 +23,18 @@ async def search_products(
     """Returns products matching search term using embeddings similarity."""
     
     try:
-        # Handle PRODCOM database queries separately for backward compatibility
+        # PRODCOM products come from the in-memory catalogue built from the prodcom dataset
         if product_type.lower() == "prodcom":
-            return await search_prodcom_products_db(search, type, limit)
+            return await run_embedding(search_prodcom_products_db, search, type, limit)
         
         # Validate product type
         if product_type not in ["hs6_products", "cn8_products"]:
             raise ValueError(f"Invalid product_type '{product_type}'. Must be 'hs6_products' or 'cn8_products'")
             
-        return embedding_autocomplete(search, product_type, type, limit)
+        return await run_embedding(embedding_autocomplete, search, product_type, type, limit)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Product search failed: {str(e)}")
 
@@ -45,7 +48,9 @@ async def search_countries(
     """Returns countries matching search term using embeddings similarity."""
     
     try:
-        return embedding_autocomplete(search, "countries", type, limit)
+        return await run_embedding(embedding_autocomplete, search, "countries", type, limit)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Country search failed: {str(e)}")
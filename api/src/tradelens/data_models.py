@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 # Model to define a trade data record object - this will move to a separate model folder
@@ -27,6 +27,32 @@ class TradeDataResponse(BaseModel):
     total_pages: int           # Total pages available
     data: List[TradeRecord]    # Array of trade records for current page
     execution_time_ms: float   # Query execution time in milliseconds
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the following page by keyset
+
+# Model to define one query of a batch - the /api/trade-query parameters as a JSON object
+class TradeQuerySpec(BaseModel):
+    """Filters and page of one trade query in a batch."""
+    trade_type: str = Field("imports", pattern="^(imports|exports|all)$")
+    product_codes: str = "950300"          # Comma-separated product codes
+    from_country: str = "156"              # Comma-separated origin countries
+    to_country: str = "everywhere"         # Comma-separated destinations, "everywhere" or "world"
+    year_from: int = Field(2020, ge=2000, le=2024)
+    year_to: int = Field(2022, ge=2000, le=2024)
+    page: int = Field(1, ge=1)
+    page_size: int = Field(100, ge=10, le=10000)
+    world_totals: str = Field("exporter", pattern="^(exporter|importer)$")  # Side "world" totals are kept per
+
+# Model to define a batch of trade queries
+class TradeBatchRequest(BaseModel):
+    """Trade queries answered together by /api/trade-query/batch."""
+    queries: List[TradeQuerySpec] = Field(..., min_length=1, max_length=100)
+
+# Model to define a batch response - one result per query, in request order
+class TradeBatchResponse(BaseModel):
+    """Results of a batch of trade queries."""
+    results: List[TradeDataResponse]       # Same shape as /api/trade-query, without next_cursor
+    scans: int                             # DuckDB queries run for the queries not already cached
+    execution_time_ms: float
 
 # Model to define a PRODCOM data record object
 class ProdcomRecord(BaseModel):
@@ -47,4 +73,46 @@ class ProdcomDataResponse(BaseModel):
     page_size: int             # Records per page
     total_pages: int           # Total pages available
     data: List[ProdcomRecord]  # Array of PRODCOM records for current page
-    execution_time_ms: float   # Query execution time in milliseconds
\ No newline at end of file
+    execution_time_ms: float   # Query execution time in milliseconds
+
+# Model to define one PRODCOM measure as a codes x years matrix
+class ProdcomSeries(BaseModel):
+    """PRODCOM series of one measure - values[i][j] is codes[i] in years[j], null where not published."""
+    units: List[Optional[str]]               # Unit per code, e.g. "Volume (Tonnes)"
+    values: List[List[Optional[float]]]      # One row per code, one column per year
+
+# Model to define a PRODCOM time-series response
+class ProdcomSeriesResponse(BaseModel):
+    """PRODCOM series for several codes and measures over a range of years."""
+    codes: List[str]                         # Product codes, in request order
+    descriptions: List[Optional[str]]        # Description per code, null for unknown codes
+    years: List[int]                         # Columns of every values matrix
+    series: Dict[str, ProdcomSeries]         # Measure (Value, Volume, Other) -> matrix
+    execution_time_ms: float                 # Query execution time in milliseconds
+
+# Model to define a top partners response - parallel arrays, one entry per partner
+class TopPartnersResponse(BaseModel):
+    """Partners of the reporting countries (or all countries, for 'world') ranked by trade value."""
+    countries: List[int]                     # Reporting countries, empty for a world ranking
+    flow: str                                # "exports" or "imports"
+    partners: List[int]                      # Partner country codes, largest first
+    partner_names: List[str]
+    values: List[float]                      # Trade value in USD
+    quantities: List[float]                  # Quantity in metric tons
+    shares: List[float]                      # Share of total_value
+    total_value: float                       # Total over all partners, not only those returned
+    partner_count: int                       # Number of partners with trade
+    execution_time_ms: float
+
+# Model to define an exporter x importer trade matrix
+class TradeMatrixResponse(BaseModel):
+    """Bilateral trade values - values[i][j] is exporters[i] to importers[j] in USD."""
+    exporters: List[int]
+    exporter_names: List[str]
+    importers: List[int]
+    importer_names: List[str]
+    values: List[List[float]]
+    exporter_totals: List[float]             # Per exporter, over all importers in the query
+    importer_totals: List[float]             # Per importer, over all exporters in the query
+    total_value: float
+    execution_time_ms: float
@@ -0,0 +1,324 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+import duckdb
+
+
+# Partitioned BACI dataset written by tradelens.baci_build, with the single-file download as fallback
+BACI_DATASET_DIR = "data/BACI/baci_hs17"
+BACI_LEGACY_FILE = "data/BACI/baci_hs17_2017_2022.parquet"
+BACI_ROLLUP_DIR = os.environ.get("TRADELENS_BACI_ROLLUP_DIR", "data/BACI/rollups")
+
+# Typed, sorted PRODCOM file written by tradelens.prodcom_build, with the notebook export as fallback
+PRODCOM_DATASET_FILE = "data/prodcom/prodcom_typed.parquet"
+PRODCOM_LEGACY_FILE = "data/prodcom/prodcom.parquet"
+
+# Parquet datasets registered as views on the shared database - paths are relative to the api folder
+DATASET_PATHS = {
+    "baci": os.environ.get("TRADELENS_BACI_PATH", BACI_DATASET_DIR if os.path.isdir(BACI_DATASET_DIR) else BACI_LEGACY_FILE),
+    "prodcom": os.environ.get("TRADELENS_PRODCOM_PATH", PRODCOM_DATASET_FILE if os.path.exists(PRODCOM_DATASET_FILE) else PRODCOM_LEGACY_FILE),
+    # Pre-aggregated totals written by tradelens.baci_build - optional, queries fall back to "baci"
+    "baci_exporter_totals": os.path.join(BACI_ROLLUP_DIR, "exporter_totals.parquet"),
+    "baci_importer_totals": os.path.join(BACI_ROLLUP_DIR, "importer_totals.parquet"),
+}
+
+# Column types the services query with - views cast columns stored as another type,
+# e.g. year stored as text by the PRODCOM notebook export
+VIEW_COLUMN_TYPES = {
+    "prodcom": {"year": "INTEGER"},
+}
+
+# Engine settings - threads and memory limit fall back to DuckDB defaults when unset
+DUCKDB_THREADS = os.environ.get("TRADELENS_DUCKDB_THREADS")
+DUCKDB_MEMORY_LIMIT = os.environ.get("TRADELENS_DUCKDB_MEMORY_LIMIT")
+DUCKDB_POOL_SIZE = int(os.environ.get("TRADELENS_DUCKDB_POOL_SIZE", "8"))
+DUCKDB_POOL_TIMEOUT = float(os.environ.get("TRADELENS_DUCKDB_POOL_TIMEOUT", "30"))
+
+
+def dataset_reader(path: str) -> str:
+    """read_parquet() call for a single parquet file or a Hive-partitioned dataset directory."""
+    if os.path.isdir(path):
+        return f"read_parquet('{os.path.join(path, '**', '*.parquet')}', hive_partitioning = true)"
+    return f"read_parquet('{path}')"
+
+
+def dataset_mtime(path: str) -> int:
+    """Latest modification time (ns) of a parquet file, or of any file or folder in a dataset directory."""
+    if not os.path.isdir(path):
+        return os.stat(path).st_mtime_ns
+    latest = os.stat(path).st_mtime_ns
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+    return latest
+
+
+def dataset_version(path: str) -> str:
+    """Cache-key version of a dataset - its path and latest modification time."""
+    try:
+        return f"{path}@{dataset_mtime(path)}"
+    except OSError:
+        return path
+
+
+class PoolTimeout(Exception):
+    """Raised when no DuckDB cursor becomes available within the pool timeout."""
+
+
+class TradeDatabase:
+    """
+    Process-wide DuckDB database shared by all query routers.
+
+    A single in-memory database holds one view per parquet dataset, so file
+    metadata is read once rather than on every request. Requests borrow a
+    cursor from a bounded pool; cursors are independent DuckDB connections to
+    the same database and are safe to use from any one thread at a time.
+    """
+
+    def __init__(
+        self,
+        datasets: Optional[Dict[str, str]] = None,
+        threads: Optional[int] = None,
+        memory_limit: Optional[str] = None,
+        pool_size: int = DUCKDB_POOL_SIZE,
+        pool_timeout: float = DUCKDB_POOL_TIMEOUT
+    ):
+        self.datasets = dict(datasets if datasets is not None else DATASET_PATHS)
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+
+        self._conn = None
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._views = {}
+        self._versions = {}
+
+        # Pool utilisation counters
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._wait_seconds = 0.0
+
+    def open(self) -> "TradeDatabase":
+        """Create the database and register the dataset views."""
+        config = {"enable_object_cache": True}
+        if self.threads:
+            config["threads"] = int(self.threads)
+        if self.memory_limit:
+            config["memory_limit"] = self.memory_limit
+
+        self._conn = duckdb.connect(":memory:", config=config)
+        for name, path in self.datasets.items():
+            self.register_view(name, path)
+        return self
+
+    def register_view(self, name: str, path: str) -> bool:
+        """(Re)register a parquet file or partitioned dataset as a named view. Returns False if it is missing."""
+        reader = dataset_reader(path)
+        try:
+            self._conn.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT {self._view_columns(name, reader)} FROM {reader}")
+        except (duckdb.IOException, duckdb.InvalidInputException) as e:
+            print(f"Warning: Could not register view '{name}' for {path}: {e}")
+            return False
+        self._views[name] = path
+        self._versions[name] = dataset_version(path)
+        return True
+
+    def swap_views(self, datasets: Dict[str, Optional[str]]) -> None:
+        """
+        Re-point several views at new paths in one transaction, so other cursors see
+        either all old or all new datasets; a None path drops the view. Queries already
+        running finish on the files they started with. Raises, leaving every view as it
+        was, if any new dataset cannot be read.
+        """
+        with self._swap_lock:
+            self._conn.execute("BEGIN TRANSACTION")
+            try:
+                for name, path in datasets.items():
+                    if path is None:
+                        self._conn.execute(f"DROP VIEW IF EXISTS {name}")
+                    else:
+                        reader = dataset_reader(path)
+                        self._conn.execute(
+                            f"CREATE OR REPLACE VIEW {name} AS SELECT {self._view_columns(name, reader)} FROM {reader}"
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            with self._lock:
+                for name, path in datasets.items():
+                    if path is None:
+                        self._views.pop(name, None)
+                        self._versions.pop(name, None)
+                        self.datasets.pop(name, None)
+                    else:
+                        self._views[name] = path
+                        self._versions[name] = dataset_version(path)
+                        self.datasets[name] = path
+
+    def _view_columns(self, name: str, reader: str) -> str:
+        """Select list for a view - casts columns whose stored type differs from VIEW_COLUMN_TYPES."""
+        expected = VIEW_COLUMN_TYPES.get(name)
+        if not expected:
+            return "*"
+        stored = {row[0]: row[1] for row in self._conn.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()}
+        casts = [
+            f"CAST({column} AS {sql_type}) AS {column}"
+            for column, sql_type in expected.items()
+            if column in stored and stored[column] != sql_type
+        ]
+        return f"* REPLACE ({', '.join(casts)})" if casts else "*"
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    def view_source(self, name: str) -> Optional[str]:
+        """Path currently registered for a view, if any."""
+        return self._views.get(name)
+
+    def view_version(self, name: str) -> Optional[str]:
+        """
+        Identifies the contents of a view's files, taken when the view was registered or
+        swapped - files rewritten in place are picked up by refresh_versions().
+        """
+        return self._versions.get(name)
+
+    def refresh_versions(self) -> List[str]:
+        """Re-read the modification times of every view's files; returns the views whose version changed."""
+        changed = []
+        for name, path in list(self._views.items()):
+            version = dataset_version(path)
+            if self._versions.get(name) != version:
+                self._versions[name] = version
+                changed.append(name)
+        return changed
+
+    def view_names(self) -> Set[str]:
+        """Names of the views that were registered successfully."""
+        return set(self._views)
+
+    def _acquire(self) -> duckdb.DuckDBPyConnection:
+        wait_start = time.perf_counter()
+        cursor = None
+
+        with self._lock:
+            try:
+                cursor = self._idle.get_nowait()
+            except queue.Empty:
+                if self._created < self.pool_size:
+                    cursor = self._conn.cursor()
+                    self._created += 1
+
+        if cursor is None:
+            try:
+                cursor = self._idle.get(timeout=self.pool_timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeout(f"No DuckDB cursor available after {self.pool_timeout}s")
+
+        with self._lock:
+            self._acquired += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_seconds += time.perf_counter() - wait_start
+        return cursor
+
+    def _release(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(cursor)
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Borrow a cursor from the pool for the duration of a request."""
+        if self._conn is None:
+            raise RuntimeError("Database is not open")
+        cursor = self._acquire()
+        try:
+            yield cursor
+        finally:
+            self._release(cursor)
+
+    def stats(self) -> dict:
+        """Pool utilisation metrics."""
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "created": self._created,
+                "idle": self._idle.qsize(),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "acquired_total": self._acquired,
+                "timeouts_total": self._timeouts,
+                "wait_ms_total": round(self._wait_seconds * 1000, 2),
+                "views": dict(self._views),
+            }
+
+    def close(self) -> None:
+        """Close all pooled cursors and the database."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+#### Module-level database shared by all routers
+_database: Optional[TradeDatabase] = None
+_database_lock = threading.Lock()
+
+
+def open_database(**kwargs) -> TradeDatabase:
+    """Open the shared database, replacing any existing one. Called from the app lifespan."""
+    global _database
+    kwargs.setdefault("threads", DUCKDB_THREADS)
+    kwargs.setdefault("memory_limit", DUCKDB_MEMORY_LIMIT)
+    with _database_lock:
+        if _database is not None:
+            _database.close()
+        _database = TradeDatabase(**kwargs).open()
+        return _database
+
+
+def get_database() -> TradeDatabase:
+    """Return the shared database, opening it with default settings on first use."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = TradeDatabase(threads=DUCKDB_THREADS, memory_limit=DUCKDB_MEMORY_LIMIT).open()
+    return _database
+
+
+def close_database() -> None:
+    """Close the shared database. Called on app shutdown."""
+    global _database
+    with _database_lock:
+        if _database is not None:
+            _database.close()
+            _database = None
+
+
+def database_is_open() -> bool:
+    return _database is not None and _database.is_open
+
+
+def database_stats() -> dict:
+    """Pool metrics for the shared database, or an empty dict if it has not been opened."""
+    return _database.stats() if _database is not None else {}
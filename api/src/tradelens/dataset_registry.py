@@ -0,0 +1,443 @@
+"""
+Versioned registry of the parquet datasets served by the API.
+
+Every publish writes a new, immutable version directory and commits it by
+atomically replacing registry.json. A running API picks the new version up by
+re-pointing its DuckDB views in one transaction (TradeDatabase.swap_views), so
+there is no restart and queries already running finish on the files they started
+on. Cache keys include the view paths, and each BACI version carries the rollups
+built from it, so results and rollups of the previous version are never served
+against the new one.
+
+Layout:
+
+    data/registry/
+    ├── registry.json                       # current version and history of each dataset
+    ├── registry.lock                       # flock'd around version allocation and manifest updates
+    ├── baci/v0002/data/year=2023/...       # partitioned BACI dataset
+    ├── baci/v0002/rollups/...              # rollup tables built from that version
+    └── prodcom/v0001/prodcom_typed.parquet
+
+Usage (from the api folder):
+
+    python -m tradelens.dataset_registry import-baci --parquet data/BACI/baci_hs17_2017_2022.parquet
+    python -m tradelens.dataset_registry append-baci --csv-dir ../data-prep/BACI/data --year 2023
+    python -m tradelens.dataset_registry import-prodcom --parquet data/prodcom/prodcom.parquet
+    python -m tradelens.dataset_registry list
+    python -m tradelens.dataset_registry activate baci 1
+    python -m tradelens.dataset_registry prune --keep 2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+import duckdb
+
+try:
+    import fcntl
+except ImportError:
+    # Windows - publishes are only serialised within one process
+    fcntl = None
+
+from tradelens import baci_build, prodcom_build
+from tradelens.database import DATASET_PATHS, TradeDatabase, database_is_open, dataset_reader, get_database
+
+
+REGISTRY_DIR = os.environ.get("TRADELENS_REGISTRY_DIR", "data/registry")
+# Seconds between checks of registry.json by the API - 0 disables the watcher
+REGISTRY_POLL_SECONDS = float(os.environ.get("TRADELENS_REGISTRY_POLL_SECONDS", "10"))
+
+MANIFEST_FILE = "registry.json"
+LOCK_FILE = "registry.lock"
+_process_lock = threading.Lock()
+
+# Views owned by each registered dataset - a version that does not provide one drops it
+DATASET_VIEWS = {
+    "baci": ["baci", "baci_exporter_totals", "baci_importer_totals"],
+    "prodcom": ["prodcom"],
+}
+
+
+def link_tree(source: str, target: str) -> None:
+    """Recreate `source` under `target` with hard links, copying where links are not supported."""
+    for root, _, files in os.walk(source):
+        folder = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(folder, exist_ok=True)
+        for name in files:
+            try:
+                os.link(os.path.join(root, name), os.path.join(folder, name))
+            except OSError:
+                shutil.copy2(os.path.join(root, name), os.path.join(folder, name))
+
+
+class DatasetRegistry:
+    """
+    Dataset versions under `root`, with registry.json recording each dataset's
+    versions and the current one. Versions are never modified once committed -
+    appending a year writes a new version that hard-links the unchanged partitions.
+
+    Version allocation and manifest updates hold an exclusive flock on registry.lock,
+    so concurrent publishes from several processes (e.g. a cron import and a manual
+    rollback) never reuse a version number or lose each other's manifest changes.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or REGISTRY_DIR
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the registry's file lock - shared by every process and thread using this root."""
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            with _process_lock:
+                yield
+            return
+        with open(os.path.join(self.root, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _next_version(self, name: str) -> int:
+        # Directories count too - another process may be building a version it has not committed yet
+        folder = os.path.join(self.root, name)
+        on_disk = [
+            int(entry.name[1:5]) for entry in os.scandir(folder)
+            if entry.name.startswith("v") and entry.name[1:5].isdigit()
+        ] if os.path.isdir(folder) else []
+        return max([v["version"] for v in self.versions(name)] + on_disk, default=0) + 1
+
+    def load(self) -> dict:
+        """The registry manifest, empty if nothing has been published yet."""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"datasets": {}}
+
+    def _commit(self, manifest: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        staging = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(staging, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(staging, self.manifest_path)
+
+    def versions(self, name: str) -> List[dict]:
+        return self.load()["datasets"].get(name, {}).get("versions", [])
+
+    def current(self, name: str) -> Optional[dict]:
+        """The current version record of a dataset, if it is registered."""
+        dataset = self.load()["datasets"].get(name)
+        if not dataset:
+            return None
+        return next((v for v in dataset["versions"] if v["version"] == dataset["current"]), None)
+
+    def version_dir(self, name: str, version: int) -> str:
+        return os.path.join(self.root, name, f"v{version:04d}")
+
+    def view_paths(self) -> Dict[str, Optional[str]]:
+        """View name -> path for the current version of every registered dataset (None: drop the view)."""
+        paths = {}
+        for name, dataset in self.load()["datasets"].items():
+            record = next((v for v in dataset["versions"] if v["version"] == dataset["current"]), None)
+            views = record["views"] if record else {}
+            for view in DATASET_VIEWS.get(name, [name]):
+                relative = views.get(view)
+                paths[view] = os.path.join(self.version_dir(name, record["version"]), relative) if relative else None
+        return paths
+
+    def publish(self, name: str, build: Callable[[str], dict], **info) -> dict:
+        """
+        Build a new version of `name` and make it current.
+
+        `build` writes the version's files into the directory it is given and returns
+        the fields to record, including "views" (view name -> path relative to that
+        directory). The version only becomes visible once its directory is complete
+        and the manifest has been replaced.
+        """
+        # Reserve the version number by creating its staging directory, then build without the lock
+        with self._locked():
+            version = self._next_version(name)
+            target = self.version_dir(name, version)
+            staging = target + ".staging"
+            os.makedirs(staging)
+        try:
+            fields = build(staging)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        with self._locked():
+            os.rename(staging, target)
+            record = {
+                "version": version,
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                **info,
+                **fields,
+            }
+            manifest = self.load()
+            dataset = manifest["datasets"].setdefault(name, {"versions": []})
+            dataset["versions"].append(record)
+            dataset["current"] = version
+            self._commit(manifest)
+            return record
+
+    def activate(self, name: str, version: int) -> dict:
+        """Make an existing version current again, e.g. to roll back a bad refresh."""
+        with self._locked():
+            manifest = self.load()
+            dataset = manifest["datasets"].get(name, {"versions": []})
+            record = next((v for v in dataset["versions"] if v["version"] == version), None)
+            if record is None:
+                raise ValueError(f"Dataset '{name}' has no version {version}")
+            dataset["current"] = version
+            self._commit(manifest)
+            return record
+
+    def prune(self, keep: int = 2) -> List[str]:
+        """
+        Delete all but the `keep` newest versions of each dataset, never the current one.
+        Keep at least 2 so queries started on the previous version can finish.
+        """
+        removed = []
+        with self._locked():
+            manifest = self.load()
+            for name, dataset in manifest["datasets"].items():
+                newest = sorted(v["version"] for v in dataset["versions"])[-max(keep, 1):]
+                kept = []
+                for record in dataset["versions"]:
+                    if record["version"] in newest or record["version"] == dataset["current"]:
+                        kept.append(record)
+                    else:
+                        path = self.version_dir(name, record["version"])
+                        shutil.rmtree(path, ignore_errors=True)
+                        removed.append(path)
+                dataset["versions"] = kept
+            self._commit(manifest)
+        return removed
+
+    #### Dataset builders
+    def import_baci(self, source: str, years: Optional[List[int]] = None) -> dict:
+        """Publish a full BACI version from an SQL relation (see baci_build.csv_source / parquet_source)."""
+
+        def build(folder):
+            data, rollups = os.path.join(folder, "data"), os.path.join(folder, "rollups")
+            baci_build.build_dataset(source, data, years, rollup_dir=rollups)
+            return baci_fields(data, rollups, folder)
+
+        return self.publish("baci", build, change="import")
+
+    def append_baci_year(self, source: str, year: int) -> dict:
+        """
+        Publish a BACI version adding (or replacing) one year: the current version's
+        other partitions are hard-linked, the year is written from `source` and the
+        rollups are rebuilt for the new version.
+        """
+        record = self.current("baci")
+        if record is None:
+            raise ValueError("No BACI version to append to - run import-baci first")
+        previous = os.path.join(self.version_dir("baci", record["version"]), record["views"]["baci"])
+
+        def build(folder):
+            data, rollups = os.path.join(folder, "data"), os.path.join(folder, "rollups")
+            for entry in os.scandir(previous):
+                if entry.is_dir() and entry.name != f"year={int(year)}":
+                    link_tree(entry.path, os.path.join(data, entry.name))
+            conn = duckdb.connect()
+            try:
+                baci_build.write_year(conn, source, year, data)
+                baci_build.build_rollups(conn, baci_build.parquet_source(data), rollups)
+            finally:
+                conn.close()
+            return baci_fields(data, rollups, folder)
+
+        return self.publish("baci", build, change=f"append {int(year)}", parent=record["version"])
+
+    def import_prodcom(self, source: str, conn: Optional[duckdb.DuckDBPyConnection] = None) -> dict:
+        """Publish a PRODCOM version built by prodcom_build from an SQL relation."""
+
+        def build(folder):
+            prodcom_build.build_dataset(source, os.path.join(folder, "prodcom_typed.parquet"), conn=conn)
+            return {"views": {"prodcom": "prodcom_typed.parquet"}}
+
+        return self.publish("prodcom", build, change="import")
+
+
+def baci_fields(data: str, rollups: str, folder: str) -> dict:
+    """Version record fields of a BACI build - its views and the years it holds."""
+    # baci_build stages partitions next to the dataset - drop the emptied folder
+    shutil.rmtree(f"{data}.staging", ignore_errors=True)
+    views = {"baci": os.path.relpath(data, folder)}
+    for name in baci_build.ROLLUPS:
+        views[f"baci_{name}"] = os.path.relpath(os.path.join(rollups, f"{name}.parquet"), folder)
+    years = sorted(int(entry.name.split("=", 1)[1]) for entry in os.scandir(data) if entry.name.startswith("year="))
+    return {"views": views, "years": years}
+
+
+#### Serving the registry from the API
+def dataset_paths(registry: Optional[DatasetRegistry] = None) -> Dict[str, str]:
+    """Views to open the database with - DATASET_PATHS overridden by the registry's current versions."""
+    paths = dict(DATASET_PATHS)
+    for view, path in (registry or DatasetRegistry()).view_paths().items():
+        if path is None:
+            paths.pop(view, None)
+        else:
+            paths[view] = path
+    return paths
+
+
+def refresh_database(
+    database: Optional[TradeDatabase] = None,
+    registry: Optional[DatasetRegistry] = None
+) -> Dict[str, Optional[str]]:
+    """Swap the database's views to the registry's current versions; returns the views that changed."""
+    database = database or get_database()
+    changed = {
+        view: path
+        for view, path in (registry or DatasetRegistry()).view_paths().items()
+        if database.view_source(view) != path
+    }
+    if changed:
+        database.swap_views(changed)
+        print(f"Datasets refreshed: {', '.join(sorted(changed))}")
+    return changed
+
+
+class RegistryWatcher:
+    """
+    Background thread refreshing the shared database whenever registry.json is replaced.
+    Each poll also re-reads the view versions, so datasets rewritten in place stop
+    being served from the result cache.
+    """
+
+    def __init__(self, registry: Optional[DatasetRegistry] = None, interval: float = REGISTRY_POLL_SECONDS):
+        self.registry = registry or DatasetRegistry()
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._seen = self._manifest_mtime()
+
+    def _manifest_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.registry.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self) -> None:
+        if database_is_open():
+            get_database().refresh_versions()
+        mtime = self._manifest_mtime()
+        if mtime == self._seen:
+            return
+        try:
+            refresh_database(registry=self.registry)
+            self._seen = mtime
+        except Exception as e:
+            # Keep serving the current version and retry on the next poll
+            print(f"Warning: Could not refresh datasets from {self.registry.manifest_path}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "RegistryWatcher":
+        self._thread = threading.Thread(target=self._run, name="tradelens-registry-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_watcher: Optional[RegistryWatcher] = None
+
+
+def start_registry_watcher() -> Optional[RegistryWatcher]:
+    global _watcher
+    if REGISTRY_POLL_SECONDS > 0 and _watcher is None:
+        _watcher = RegistryWatcher().start()
+    return _watcher
+
+
+def stop_registry_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Publish and manage versions of the TradeLens datasets.")
+    parser.add_argument("--registry", default=None, help=f"Registry directory (default {REGISTRY_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in [("import-baci", "Publish a full BACI version"), ("append-baci", "Publish a BACI version adding one year")]:
+        sub = commands.add_parser(command, help=help_text)
+        source_group = sub.add_mutually_exclusive_group(required=True)
+        source_group.add_argument("--csv-dir", help="Folder containing the CEPII BACI CSV release")
+        source_group.add_argument("--parquet", help="BACI parquet file or dataset")
+        sub.add_argument("--version", default="V202501", help="CEPII release version (CSV input only)")
+        if command == "append-baci":
+            sub.add_argument("--year", type=int, required=True)
+        else:
+            sub.add_argument("--years", type=int, nargs="*", help="Only import these years")
+
+    sub = commands.add_parser("import-prodcom", help="Publish a PRODCOM version")
+    source_group = sub.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--xlsx", help="ONS PRODCOM publication tables workbook")
+    source_group.add_argument("--parquet", help="Existing PRODCOM parquet file")
+
+    commands.add_parser("list", help="Show the versions of each dataset")
+    sub = commands.add_parser("activate", help="Make an existing version current")
+    sub.add_argument("dataset")
+    sub.add_argument("version", type=int)
+    sub = commands.add_parser("prune", help="Delete old versions")
+    sub.add_argument("--keep", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    registry = DatasetRegistry(args.registry)
+    if args.command in ("import-baci", "append-baci"):
+        source = baci_build.csv_source(args.csv_dir, args.version) if args.csv_dir else baci_build.parquet_source(args.parquet)
+        if args.command == "import-baci":
+            record = registry.import_baci(source, args.years)
+        else:
+            record = registry.append_baci_year(source, args.year)
+        print(f"  ✓ baci version {record['version']} is current")
+    elif args.command == "import-prodcom":
+        conn = duckdb.connect()
+        if args.xlsx:
+            conn.register("prodcom_xlsx", prodcom_build.xlsx_frame(args.xlsx))
+            source = "SELECT * FROM prodcom_xlsx"
+        else:
+            source = f"SELECT * FROM {dataset_reader(args.parquet)}"
+        record = registry.import_prodcom(source, conn=conn)
+        conn.close()
+        print(f"  ✓ prodcom version {record['version']} is current")
+    elif args.command == "activate":
+        registry.activate(args.dataset, args.version)
+        print(f"  ✓ {args.dataset} version {args.version} is current")
+    elif args.command == "prune":
+        for path in registry.prune(args.keep):
+            print(f"  ✓ removed {path}")
+    else:
+        for name, dataset in registry.load()["datasets"].items():
+            for record in dataset["versions"]:
+                marker = "*" if record["version"] == dataset["current"] else " "
+                print(f"{marker} {name} v{record['version']}  {record['created']}  {record.get('change', '')}")
+
+
+if __name__ == "__main__":
+    main()
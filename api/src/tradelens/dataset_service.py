@@ -0,0 +1,52 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from tradelens.database import get_database
+from tradelens.dataset_registry import DatasetRegistry, refresh_database
+from tradelens.executor import run_query
+
+
+router = APIRouter(
+    prefix="/api/datasets",
+    tags=["datasets"],
+)
+
+# Token required by POST /api/datasets/refresh in the X-Admin-Token header - the end point is off when unset
+ADMIN_TOKEN = os.environ.get("TRADELENS_ADMIN_TOKEN")
+
+
+#### 1. End point listing the registered dataset versions and the files each view reads
+@router.get("")
+async def list_datasets() -> dict:
+    """Returns the dataset registry manifest and the path currently behind each view."""
+    registry = DatasetRegistry()
+    return {
+        "registry": registry.load(),
+        "views": get_database().stats()["views"],
+    }
+
+
+#### 2. End point swapping the views to the registry's current versions without waiting for the watcher
+@router.post("/refresh")
+async def refresh_datasets(x_admin_token: Optional[str] = Header(None)) -> dict:
+    """
+    Re-points the views at the current dataset versions; returns the views that changed.
+
+    Disabled (403) unless TRADELENS_ADMIN_TOKEN is set, and then only accepted with
+    that token in the X-Admin-Token header (401 otherwise). The registry watcher
+    picks up new versions without it.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Dataset refresh is disabled - set TRADELENS_ADMIN_TOKEN to enable it")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+    try:
+        changed = await run_query(refresh_database)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Dataset refresh failed: {str(e)}")
+    return {"changed": changed}
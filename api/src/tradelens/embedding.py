@@ -1,72 +1,227 @@
+import os
+import threading
+import time
 import numpy as np
-from typing import Optional, List
-import json
-from sentence_transformers import SentenceTransformer
-
-
-# Load BGE embeddings with metadata - organized by product type
-EMBEDDINGS_DATA = {
-    "countries": [],
-    "hs6_products": [],
-    "cn8_products": []
-}
-
-# Load BGE embeddings
-try:
-    with open("data/shared/country_embeddings_bge_dump.json", "r") as f:
-        EMBEDDINGS_DATA["countries"] = json.load(f)
-    with open("data/shared/product_embeddings_bge_dump.json", "r") as f:
-        EMBEDDINGS_DATA["hs6_products"] = json.load(f)
-    with open("data/shared/cn8_division_industry_product_embeddings_bge.json", "r") as f:
-        EMBEDDINGS_DATA["cn8_products"] = json.load(f)
-except FileNotFoundError as e:
-    print(f"Warning: Could not load BGE embeddings: {e}")
-    # Fallback to old embeddings if BGE embeddings are not available
+from typing import Callable, Dict, Optional, List
+
+from tradelens.code_index import CodeIndex, is_code_query
+from tradelens.embedding_store import load_catalogue
+from tradelens.encoder import QueryEncoder
+from tradelens.encoder_backends import ENCODER_BACKEND, load_encoder
+from tradelens.lexical_index import BM25Index, item_text, keyword_search, reciprocal_rank_fusion
+from tradelens.vector_index import build_index, index_kind_for
+
+
+# BGE embedding model for better semantic search performance
+EMBEDDING_MODEL_NAME = os.environ.get("TRADELENS_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+
+ITEM_TYPES = ["countries", "hs6_products", "cn8_products"]
+
+# Candidates taken from each of the BM25 and embedding rankings before fusing them
+SEARCH_DEPTH = int(os.environ.get("TRADELENS_SEARCH_DEPTH", "100"))
+
+
+# Build the nearest-neighbour index configured for a catalogue
+def build_catalogue_index(item_type, matrix, rows=None):
+    """Build the search index for one item type - see tradelens.vector_index for the kinds."""
+    kind = index_kind_for(item_type)
     try:
-        with open("data/shared/country_embeddings.json", "r") as f:
-            EMBEDDINGS_DATA["countries"] = json.load(f)
-        with open("data/shared/HS6_product_embeddings.json", "r") as f:
-            EMBEDDINGS_DATA["hs6_products"] = json.load(f)
-        with open("data/shared/cn8_division_industry_product_embeddings.json", "r") as f:
-            EMBEDDINGS_DATA["cn8_products"] = json.load(f)
-        print("Loaded fallback embeddings (non-BGE)")
-    except FileNotFoundError as fallback_error:
-        print(f"Error: Could not load any embeddings: {fallback_error}")
-
-
-# Prepare numpy arrays for fast similarity search - organized by product type
-def build_embedding_matrices():
-    """Build embedding matrices for fast similarity search."""
-    matrices = {}
-    
-    for item_type, items in EMBEDDINGS_DATA.items():
-        if items:
-            matrices[item_type] = np.array([item['embedding'] for item in items])
-        else:
-            matrices[item_type] = np.array([])
-    
-    return matrices
+        return build_index(matrix, kind, rows=rows)
+    except ImportError as e:
+        print(f"Warning: Could not build {kind} index for {item_type}, using exact search: {e}")
+        return build_index(matrix, "exact", rows=rows)
+
+
+# Code field of an item - try common code field names
+def item_code(item):
+    return item.get('code', item.get('product_code', item.get('country_code', '')))
+
+
+class Catalogue:
+    """
+    Items of one autocomplete item type with their search indexes. Catalogues
+    built from an empty matrix (PRODCOM) have code and BM25 search only.
+
+    Items carrying a 'type' field are also grouped into one sub-catalogue per
+    type value, so filtered searches need no per-request work. Partitions index
+    their rows of the shared matrix rather than holding copies of them.
+    """
+
+    def __init__(
+        self,
+        item_type: str,
+        items: List[dict],
+        matrix: np.ndarray,
+        partition: bool = True,
+        rows: Optional[np.ndarray] = None
+    ):
+        self.item_type = item_type
+        self.items = items
+        self.index = build_catalogue_index(item_type, matrix, rows) if matrix.size else None
+        self.code_index = CodeIndex([item_code(item) for item in items])
+        self.lexical = BM25Index([item_text(item) for item in items])
+
+        self.partitions: Dict[str, Catalogue] = {}
+        if partition:
+            rows_by_type = {}
+            for i, item in enumerate(items):
+                if item.get('type') is not None:
+                    rows_by_type.setdefault(item['type'], []).append(i)
+            for type_value, rows in rows_by_type.items():
+                self.partitions[type_value] = Catalogue(
+                    item_type,
+                    [items[i] for i in rows],
+                    matrix,
+                    partition=False,
+                    rows=np.asarray(rows, dtype=np.int64)
+                )
+
+
+#### Ranked search over one catalogue - codes, keywords, then hybrid BM25 + embeddings
+def search_catalogue(catalogue: Catalogue, search_term: Optional[str], limit: int = 50) -> List[dict]:
+    """
+    Search one catalogue (or type partition). Code queries use the code index;
+    text queries with at least `limit` items containing every query word are
+    ranked by BM25 alone, without encoding the query. Other text queries fuse
+    the BM25 and embedding rankings with reciprocal rank fusion.
+    """
+    items_data = catalogue.items
+    if not items_data:
+        return []
+
+    if not search_term:
+        # Return first N items
+        return [dict(item) for item in items_data[:limit]]
+
+    # Numeric search terms (digits, spaces and dots) are code searches - prefix matches first, then substrings
+    if is_code_query(search_term):
+        return [dict(items_data[i]) for i in catalogue.code_index.search(search_term, limit)]
+
+    # Exact keyword matches fill the page - no need for the encoder
+    keyword_ids = keyword_search(catalogue.lexical, search_term, limit)
+    if keyword_ids is not None:
+        return [dict(items_data[i]) for i in keyword_ids]
+
+    depth = max(limit, SEARCH_DEPTH)
+    lexical_ids, _ = catalogue.lexical.search(search_term, depth)
+    if catalogue.index is None:
+        return [dict(items_data[i]) for i in lexical_ids[:limit]]
+
+    # Semantic similarity search, fused with the keyword ranking
+    search_emb = QUERY_ENCODER.encode(search_term)
+    semantic_ids, _ = catalogue.index.search(search_emb, depth)
+    return [dict(items_data[i]) for i in reciprocal_rank_fusion([lexical_ids, semantic_ids], limit)]
+
+
+#### Lazily loaded state - catalogues and the model load on first use, or during warm-up
+_catalogues: Dict[str, Catalogue] = {}
+_catalogue_locks = {item_type: threading.Lock() for item_type in ITEM_TYPES}
+_model = None
+_model_lock = threading.Lock()
+_warm_up = {"state": "pending", "seconds": None, "error": None}
+
+# Catalogues built from other sources than the embedding store - item type -> loader returning
+# the current catalogue. Loaders keep their own cache and rebuild it when their source changes.
+_catalogue_loaders: Dict[str, Callable[[], Catalogue]] = {}
 
 
-# Load BGE embedding model for better semantic search performance
-EMBEDDING_MODEL = SentenceTransformer('BAAI/bge-small-en-v1.5')
+def register_catalogue(item_type: str, loader: Callable[[], Catalogue]) -> None:
+    """Serve an item type from a loader, e.g. PRODCOM products read from the prodcom dataset."""
+    _catalogue_loaders[item_type] = loader
 
-EMBEDDING_MATRICES = build_embedding_matrices()
+
+def get_catalogue(item_type: str) -> Catalogue:
+    """The catalogue for an item type, loading it from the embedding store (or its loader) on first use."""
+    if item_type in _catalogue_loaders:
+        return _catalogue_loaders[item_type]()
+    catalogue = _catalogues.get(item_type)
+    if catalogue is None:
+        if item_type not in _catalogue_locks:
+            raise ValueError(f"Embeddings data not found for item_type '{item_type}'")
+        with _catalogue_locks[item_type]:
+            catalogue = _catalogues.get(item_type)
+            if catalogue is None:
+                catalogue = Catalogue(item_type, *load_catalogue(item_type))
+                _catalogues[item_type] = catalogue
+                _note_lazy_load()
+    return catalogue
+
+
+def get_model():
+    """The query encoder backend (see tradelens.encoder_backends), loaded on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_encoder(EMBEDDING_MODEL_NAME, ENCODER_BACKEND)
+                _note_lazy_load()
+    return _model
+
+
+# Memoised, micro-batched query encoding shared by all autocomplete requests
+QUERY_ENCODER = QueryEncoder(lambda texts: get_model().encode(texts))
+
+
+#### Background warm-up started from the app lifespan
+def warm_up() -> None:
+    """Load the model and every catalogue, and encode one query so the first search is fast."""
+    start = time.perf_counter()
+    _warm_up["state"] = "running"
+    try:
+        for item_type in ITEM_TYPES + list(_catalogue_loaders):
+            get_catalogue(item_type)
+        QUERY_ENCODER.encode("warm up")
+        _warm_up["state"] = "ready"
+    except Exception as e:
+        print(f"Warning: Embedding warm-up failed: {e}")
+        _warm_up["state"] = "failed"
+        _warm_up["error"] = str(e)
+    _warm_up["seconds"] = round(time.perf_counter() - start, 2)
+
+
+def skip_warm_up() -> None:
+    """Load on first use instead - the service counts as ready without a warm-up."""
+    _warm_up["state"] = "skipped"
+
+
+def _note_lazy_load() -> None:
+    # Once first-use loads have brought in everything a failed warm-up could not, it is ready after all
+    if _warm_up["state"] == "failed" and _model is not None and all(t in _catalogues for t in ITEM_TYPES):
+        _warm_up["state"] = "ready"
+        _warm_up["error"] = None
+
+
+def start_warm_up() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name="tradelens-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def embedding_readiness() -> dict:
+    """Warm-up progress for the readiness probe - ready once warmed up, or when the warm-up is skipped."""
+    return {
+        "ready": _warm_up["state"] in ("ready", "skipped"),
+        "warm_up": dict(_warm_up),
+        "model_loaded": _model is not None,
+        "encoder_backend": ENCODER_BACKEND,
+        "catalogues": {item_type: item_type in _catalogues for item_type in ITEM_TYPES},
+        "catalogue_loaders": sorted(_catalogue_loaders),
+    }
 
 
 #### Core autocomplete function using embeddings
 def embedding_autocomplete(
     search_term: Optional[str],
-    item_type: str,  # "hs6_products", "cn8_products", or "countries"
+    item_type: str,  # "hs6_products", "cn8_products", "countries" or "prodcom"
     type_filter: Optional[str] = None,
     limit: int = 50
 ) -> List[dict]:
     """
-    Core function for autocomplete using embeddings similarity search.
+    Core function for autocomplete - hybrid keyword and embeddings similarity search.
     
     Args:
         search_term: The search query (None returns first N items)
-        item_type: Type of items to search ("hs6_products", "cn8_products", or "countries")
+        item_type: Type of items to search ("hs6_products", "cn8_products", "countries" or "prodcom")
         type_filter: Optional filter by type field
         limit: Maximum number of results
     
@@ -74,71 +229,19 @@ def embedding_autocomplete(
         List of matching items without embedding data
     """
     
-    # Get the embeddings data for the specified item type
-    if item_type not in EMBEDDINGS_DATA:
-        raise ValueError(f"Embeddings data not found for item_type '{item_type}'")
-    
-    items_data = EMBEDDINGS_DATA[item_type]
-    if not items_data:
-        return []
-    
-    # Apply type filter if specified
-    if type_filter:
-        items_data = [item for item in items_data if item.get('type') == type_filter]
-    
-    if not search_term:
-        # Return first N items without embeddings
-        return [
-            {k: v for k, v in item.items() if k != "embedding"}
-            for item in items_data[:limit]
-        ]
-    
-    # Get embedding matrix for similarity search
-    if item_type not in EMBEDDING_MATRICES:
-        return []
-    
-    embedding_matrix = EMBEDDING_MATRICES[item_type]
-    if embedding_matrix.size == 0:
-        return []
-    
-    # If we applied type filter, we need to rebuild the embedding matrix
+    # Get the catalogue for the specified item type - type filters use its precomputed partitions
+    catalogue = get_catalogue(item_type)
     if type_filter:
-        embedding_matrix = np.array([item['embedding'] for item in items_data])
-        if embedding_matrix.size == 0:
+        catalogue = catalogue.partitions.get(type_filter)
+        if catalogue is None:
             return []
     
-    # Check if search term is numeric (code search) - allow digits, spaces, and dots
-    is_code_search = search_term.replace(" ", "").replace(".", "").isdigit()
-    
-    if is_code_search:
-        # Code-based substring search
-        matching_items = []
-        search_clean = search_term.replace(" ", "").replace(".", "")
-        
-        for item in items_data:
-            # Get the code field - try common code field names
-            code = str(item.get('code', item.get('product_code', item.get('country_code', ''))))
-            code_clean = code.replace(" ", "").replace(".", "")
-            
-            # Check if search term is a substring of the code
-            if search_clean in code_clean:
-                matching_items.append({k: v for k, v in item.items() if k != "embedding"})
-        
-        # Sort by code length (shorter codes first) and then by code value
-        matching_items.sort(key=lambda x: (
-            len(str(x.get('code', x.get('product_code', x.get('country_code', ''))))),
-            str(x.get('code', x.get('product_code', x.get('country_code', ''))))
-        ))
-        
-        return matching_items[:limit]
-    else:
-        # Semantic similarity search for text-based queries
-        search_emb = EMBEDDING_MODEL.encode([search_term])[0]
-        norms = np.linalg.norm(embedding_matrix, axis=1) * np.linalg.norm(search_emb)
-        scores = np.dot(embedding_matrix, search_emb) / norms
-        top_idx = np.argsort(scores)[::-1][:limit]
-        
-        return [
-            {k: v for k, v in items_data[i].items() if k != "embedding"}
-            for i in top_idx
-        ]
+    return search_catalogue(catalogue, search_term, limit)
+
+
+def encoder_stats() -> dict:
+    return QUERY_ENCODER.stats()
+
+
+def shutdown_encoder() -> None:
+    QUERY_ENCODER.shutdown()
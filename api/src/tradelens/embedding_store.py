@@ -0,0 +1,146 @@
+"""
+Binary store for the autocomplete embedding catalogues.
+
+The JSON dumps produced by data-prep/autocomplete hold every item with its
+embedding as a list of floats, which is slow to parse and keeps a Python float
+per dimension in every worker. This module converts each dump into
+
+    <item_type>.npy        L2-normalised float32 matrix, one row per item
+    <item_type>.meta.json  the items without their embeddings, in row order
+
+The matrix is opened with np.load(mmap_mode="r"), so startup does not read it
+and all uvicorn workers on a host share one copy through the page cache.
+
+Usage (from the api folder):
+
+    python -m tradelens.embedding_store
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tradelens.vector_index import normalize
+
+
+EMBEDDING_STORE_DIR = os.environ.get("TRADELENS_EMBEDDING_STORE", "data/shared/embeddings")
+
+# JSON dumps per item type, preferred first - BGE embeddings, then the older ones
+EMBEDDING_DUMPS = {
+    "countries": [
+        "data/shared/country_embeddings_bge_dump.json",
+        "data/shared/country_embeddings.json",
+    ],
+    "hs6_products": [
+        "data/shared/product_embeddings_bge_dump.json",
+        "data/shared/HS6_product_embeddings.json",
+    ],
+    "cn8_products": [
+        "data/shared/cn8_division_industry_product_embeddings_bge.json",
+        "data/shared/cn8_division_industry_product_embeddings.json",
+    ],
+}
+
+
+def store_paths(item_type: str, store_dir: str = EMBEDDING_STORE_DIR) -> Tuple[str, str]:
+    return (
+        os.path.join(store_dir, f"{item_type}.npy"),
+        os.path.join(store_dir, f"{item_type}.meta.json"),
+    )
+
+
+def split_dump(items: List[dict]) -> Tuple[List[dict], np.ndarray]:
+    """Separate a dump into item metadata and a normalised float32 matrix."""
+    metadata = [{k: v for k, v in item.items() if k != "embedding"} for item in items]
+    if not items:
+        return metadata, np.empty((0, 0), dtype=np.float32)
+    return metadata, normalize([item["embedding"] for item in items])
+
+
+def convert_dump(item_type: str, source: str, store_dir: str = EMBEDDING_STORE_DIR) -> Tuple[str, str]:
+    """Write the binary store for one item type from its JSON dump, replacing any previous one atomically."""
+    with open(source, "r") as f:
+        metadata, matrix = split_dump(json.load(f))
+
+    os.makedirs(store_dir, exist_ok=True)
+    matrix_path, meta_path = store_paths(item_type, store_dir)
+
+    with open(matrix_path + ".tmp", "wb") as f:
+        np.save(f, matrix)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump({
+            "item_type": item_type,
+            "source": source,
+            "count": len(metadata),
+            "dim": int(matrix.shape[1]) if matrix.size else 0,
+            "items": metadata,
+        }, f, separators=(",", ":"))
+    # Metadata last - a store is only picked up once both files are in place
+    os.replace(matrix_path + ".tmp", matrix_path)
+    os.replace(meta_path + ".tmp", meta_path)
+    return matrix_path, meta_path
+
+
+def load_store(item_type: str, store_dir: str = EMBEDDING_STORE_DIR) -> Optional[Tuple[List[dict], np.ndarray]]:
+    """Open the binary store for an item type, or return None if it has not been built."""
+    matrix_path, meta_path = store_paths(item_type, store_dir)
+    if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path, "r") as f:
+        items = json.load(f)["items"]
+    matrix = np.load(matrix_path, mmap_mode="r")
+    if len(matrix) != len(items):
+        print(f"Warning: Embedding store for {item_type} is inconsistent ({len(matrix)} rows, {len(items)} items)")
+        return None
+    return items, matrix
+
+
+def load_catalogue(
+    item_type: str,
+    store_dir: str = EMBEDDING_STORE_DIR,
+    dumps: Optional[Dict[str, List[str]]] = None
+) -> Tuple[List[dict], np.ndarray]:
+    """
+    Items and normalised embedding matrix for an item type.
+
+    Reads the binary store when present and falls back to parsing the JSON dumps.
+    """
+    stored = load_store(item_type, store_dir)
+    if stored is not None:
+        return stored
+
+    for source in (dumps or EMBEDDING_DUMPS)[item_type]:
+        if os.path.exists(source):
+            print(f"Loading {item_type} embeddings from {source} - run `python -m tradelens.embedding_store` to convert")
+            with open(source, "r") as f:
+                return split_dump(json.load(f))
+
+    print(f"Warning: Could not load embeddings for {item_type}")
+    return [], np.empty((0, 0), dtype=np.float32)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert the JSON embedding dumps to the binary store.")
+    parser.add_argument("--output", default=EMBEDDING_STORE_DIR, help="Store directory")
+    parser.add_argument("--item-type", choices=sorted(EMBEDDING_DUMPS), help="Only convert this item type")
+    parser.add_argument("--source", help="JSON dump to convert (with --item-type)")
+    args = parser.parse_args(argv)
+
+    item_types = [args.item_type] if args.item_type else list(EMBEDDING_DUMPS)
+    for item_type in item_types:
+        sources = [args.source] if args.source else [p for p in EMBEDDING_DUMPS[item_type] if os.path.exists(p)]
+        if not sources:
+            print(f"  ✗ {item_type}: no JSON dump found")
+            continue
+        start = time.perf_counter()
+        matrix_path, _ = convert_dump(item_type, sources[0], args.output)
+        print(f"  ✓ {item_type} written to {matrix_path} from {sources[0]} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tradelens.vector_index import normalize
+
+
+# Query encoder settings
+ENCODER_CACHE_SIZE = int(os.environ.get("TRADELENS_ENCODER_CACHE_SIZE", "4096"))
+ENCODER_MAX_BATCH = int(os.environ.get("TRADELENS_ENCODER_MAX_BATCH", "32"))
+ENCODER_MAX_WAIT_MS = float(os.environ.get("TRADELENS_ENCODER_MAX_WAIT_MS", "5"))
+
+# Upper bounds (ms) of the latency histogram buckets - the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a search term - case and whitespace do not change the embedding."""
+    return " ".join(text.lower().split())
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of durations in milliseconds."""
+
+    def __init__(self, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        bucket = next((i for i, bound in enumerate(self.buckets_ms) if ms <= bound), len(self.buckets_ms))
+        with self._lock:
+            self._counts[bucket] += 1
+            self._count += 1
+            self._total_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def _quantile(self, q: float) -> Optional[float]:
+        # Upper bound of the bucket holding the q-th observation
+        if not self._count:
+            return None
+        target = q * self._count
+        seen = 0
+        for bound, count in zip(self.buckets_ms, self._counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self._max_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "count": self._count,
+                "mean_ms": round(self._total_ms / self._count, 3) if self._count else None,
+                "max_ms": round(self._max_ms, 3),
+                "p50_ms": self._quantile(0.5),
+                "p95_ms": self._quantile(0.95),
+                "p99_ms": self._quantile(0.99),
+                "buckets": {
+                    **{f"le_{bound}": count for bound, count in zip(self.buckets_ms, self._counts)},
+                    "inf": self._counts[-1],
+                },
+            }
+
+
+class QueryEncoder:
+    """
+    Turns autocomplete search terms into normalised query embeddings.
+
+    Embeddings are memoised by normalised query in a bounded LRU. Cache misses
+    are queued for a single batching thread, which waits up to `max_wait_ms`
+    after the first request for others to arrive and encodes them all in one
+    `encode_fn` call, so concurrent users typing share forward passes.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        cache_size: int = ENCODER_CACHE_SIZE,
+        max_batch: int = ENCODER_MAX_BATCH,
+        max_wait_ms: float = ENCODER_MAX_WAIT_MS
+    ):
+        self.encode_fn = encode_fn
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+
+        self._cache = OrderedDict()  # normalised query -> embedding
+        self._cache_lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._batches = 0
+        self._batched_queries = 0
+        self.request_latency = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+
+    def encode(self, text: str) -> np.ndarray:
+        """Normalised float32 embedding of a search term. Blocks until its batch has been encoded."""
+        start = time.perf_counter()
+        key = normalize_query(text)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+
+        if cached is None:
+            future = Future()
+            self._ensure_thread()
+            self._pending.put((key, future))
+            cached = future.result()
+
+        self.request_latency.observe((time.perf_counter() - start) * 1000)
+        return cached
+
+    def _ensure_thread(self) -> None:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="tradelens-encoder", daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self) -> list:
+        batch = [self._pending.get()]
+        if batch[0] is None:
+            return batch
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+            if batch[-1] is None:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            stop = batch[-1] is None
+            requests = [request for request in batch if request is not None]
+            if requests:
+                self._encode_batch(requests)
+            if stop:
+                return
+
+    def _encode_batch(self, requests: list) -> None:
+        # The same query typed by several users is encoded once
+        texts = list(dict.fromkeys(key for key, _ in requests))
+        start = time.perf_counter()
+        try:
+            embeddings = normalize(self.encode_fn(texts))
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+        self.batch_latency.observe((time.perf_counter() - start) * 1000)
+
+        by_text = dict(zip(texts, embeddings))
+        with self._cache_lock:
+            self._batches += 1
+            self._batched_queries += len(texts)
+            for text, embedding in by_text.items():
+                self._cache[text] = embedding
+                self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for key, future in requests:
+            future.set_result(by_text[key])
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self._hits + self._misses
+            return {
+                "cache_entries": len(self._cache),
+                "cache_size": self.cache_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "batches": self._batches,
+                "mean_batch_size": round(self._batched_queries / self._batches, 2) if self._batches else 0.0,
+                "request_latency": self.request_latency.stats(),
+                "batch_latency": self.batch_latency.stats(),
+            }
+
+    def shutdown(self) -> None:
+        """Stop the batching thread once queued queries are encoded. It restarts on next use."""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._pending.put(None)
+            thread.join()
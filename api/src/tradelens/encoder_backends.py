@@ -0,0 +1,183 @@
+"""
+Inference backends for the autocomplete query encoder.
+
+    torch      - SentenceTransformer in PyTorch (default)
+    onnx       - the same model exported to ONNX, run with ONNX Runtime
+    onnx-int8  - the ONNX export with dynamically int8-quantised weights
+
+Select with TRADELENS_ENCODER_BACKEND. The ONNX backends read the export
+written by (from the api folder):
+
+    python -m tradelens.encoder_backends --output data/shared/onnx/bge-small-en-v1.5
+
+which needs torch, sentence-transformers and onnx; serving it only needs
+onnxruntime and tokenizers. Install both with `pip install -e ".[onnx]"`.
+"""
+
+import argparse
+import inspect
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+
+ENCODER_BACKEND = os.environ.get("TRADELENS_ENCODER_BACKEND", "torch")
+ONNX_MODEL_DIR = os.environ.get("TRADELENS_ONNX_MODEL_DIR", "data/shared/onnx/bge-small-en-v1.5")
+
+# ONNX backend -> model file inside the export directory
+ONNX_MODEL_FILES = {
+    "onnx": "model.onnx",
+    "onnx-int8": "model_int8.onnx",
+}
+
+
+class TorchEncoder:
+    """SentenceTransformer running in PyTorch."""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts)
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime session over an exported transformer, with the pooling of the
+    original SentenceTransformer applied in numpy.
+    """
+
+    def __init__(self, model_dir: str, backend: str = "onnx", threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.backend = backend
+        with open(os.path.join(model_dir, "encoder_config.json"), "r") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+        self.tokenizer.enable_truncation(max_length=self.config["max_length"])
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILES[backend]), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self._inputs})[0]
+
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0].astype(np.float32)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return ((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+
+def load_encoder(model_name: str, backend: str = ENCODER_BACKEND, onnx_dir: str = ONNX_MODEL_DIR):
+    """Create the encoder for a backend name."""
+    if backend == "torch":
+        return TorchEncoder(model_name)
+    if backend in ONNX_MODEL_FILES:
+        return OnnxEncoder(onnx_dir, backend)
+    raise ValueError(f"Unknown encoder backend '{backend}', expected torch, {' or '.join(ONNX_MODEL_FILES)}")
+
+
+def export_onnx(model, output_dir: str, quantize: bool = True, opset: int = 17) -> List[str]:
+    """
+    Export a SentenceTransformer (or model name) to ONNX, plus its tokenizer and
+    pooling settings, and optionally an int8-quantised copy. Returns the written model files.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if isinstance(model, str):
+        model = SentenceTransformer(model)
+    transformer, pooling = model[0], model[1]
+    auto_model, tokenizer = transformer.auto_model, transformer.tokenizer
+
+    # Traced SDPA attention bakes in the example's mask handling; eager attention exports correctly
+    if hasattr(auto_model, "set_attn_implementation"):
+        auto_model.set_attn_implementation("eager")
+    else:
+        auto_model.config._attn_implementation = "eager"
+    auto_model.eval()
+
+    # Older sentence-transformers expose pooling_mode_cls_token, newer ones a pooling_mode string
+    pooling_config = pooling.get_config_dict()
+    cls_pooling = pooling_config.get("pooling_mode") == "cls" or pooling_config.get("pooling_mode_cls_token", False)
+    pooling_mode = "cls" if cls_pooling else "mean"
+
+    input_names = ["input_ids", "attention_mask"]
+    if "token_type_ids" in tokenizer.model_input_names:
+        input_names.append("token_type_ids")
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    example = tokenizer(["example search term", "steel"], padding=True, return_tensors="pt")
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx"])
+    # Newer torch releases default to the dynamo exporter - keep the TorchScript one where the option exists
+    options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    torch.onnx.export(
+        HiddenStates(auto_model),
+        tuple(example[name] for name in input_names),
+        model_path,
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+        opset_version=opset,
+        **options,
+    )
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, "encoder_config.json"), "w") as f:
+        json.dump({
+            "pooling": pooling_mode,
+            "max_length": int(model.max_seq_length),
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": int(tokenizer.pad_token_id),
+        }, f, indent=2)
+
+    written = [model_path]
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx-int8"])
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        written.append(quantized_path)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export the query encoder to ONNX (and int8).")
+    parser.add_argument("--model", default=os.environ.get("TRADELENS_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5"))
+    parser.add_argument("--output", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+    args = parser.parse_args(argv)
+
+    for path in export_onnx(args.model, args.output, quantize=not args.no_quantize):
+        print(f"  ✓ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
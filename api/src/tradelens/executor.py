@@ -0,0 +1,171 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+
+class ExecutorBusy(Exception):
+    """Raised when an executor's queue is full."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard limit on queued work.
+
+    Blocking DuckDB and embedding calls are dispatched here so they never run
+    on the asyncio event loop. Once `max_workers + max_queue` calls are in
+    flight, further submissions are rejected immediately instead of piling up.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"tradelens-{self.name}")
+        return self._pool
+
+    def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn` on the pool and await its result, or raise ExecutorBusy if the queue is full."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorBusy(f"{self.name} executor is at capacity")
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            future = self._get_pool().submit(self._call, fn, *args, **kwargs)
+        # The slot is freed when the work itself finishes (or is cancelled before starting),
+        # not when the awaiting request goes away - a cancelled request's query keeps its thread
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def reserve(self) -> Callable[[], None]:
+        """
+        Hold one slot for work that runs outside the pool, such as a response streamed
+        from a cursor. Returns the function releasing it (safe to call more than once),
+        or raises ExecutorBusy if the queue is full.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorBusy(f"{self.name} executor is at capacity")
+            self._in_flight += 1
+            self._running += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        released = threading.Event()
+
+        def release() -> None:
+            with self._lock:
+                if released.is_set():
+                    return
+                released.set()
+                self._in_flight -= 1
+                self._running -= 1
+                self._completed += 1
+
+        return release
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(self._in_flight - self._running, 0),
+                "peak_in_flight": self._peak_in_flight,
+                "completed_total": self._completed,
+                "rejected_total": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads. The pool is recreated on next use."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+#### Executors shared by all routers - analytical queries and embedding inference are kept apart
+# so a burst of heavy trade queries cannot starve autocomplete
+EXECUTORS: Dict[str, BoundedExecutor] = {
+    "query": BoundedExecutor(
+        "query",
+        max_workers=int(os.environ.get("TRADELENS_QUERY_WORKERS", "4")),
+        max_queue=int(os.environ.get("TRADELENS_QUERY_QUEUE", "32")),
+    ),
+    # Embedding workers mostly wait on the query encoder's batching thread, so more of them
+    # lets concurrent searches share a forward pass
+    "embedding": BoundedExecutor(
+        "embedding",
+        max_workers=int(os.environ.get("TRADELENS_EMBEDDING_WORKERS", "8")),
+        max_queue=int(os.environ.get("TRADELENS_EMBEDDING_QUEUE", "64")),
+    ),
+    # Streaming exports hold a pooled cursor for as long as the client keeps reading, outside
+    # the query executor - they get their own bound so they cannot take every cursor
+    "export": BoundedExecutor(
+        "export",
+        max_workers=int(os.environ.get("TRADELENS_EXPORT_STREAMS", "2")),
+        max_queue=0,
+    ),
+}
+
+
+async def _dispatch(executor: BoundedExecutor, fn: Callable, *args, **kwargs) -> Any:
+    try:
+        return await executor.run(fn, *args, **kwargs)
+    except ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+
+
+async def run_query(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking DuckDB call on the query executor. Raises HTTP 503 when saturated."""
+    return await _dispatch(EXECUTORS["query"], fn, *args, **kwargs)
+
+
+async def run_embedding(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking embedding/autocomplete call on the embedding executor. Raises HTTP 503 when saturated."""
+    return await _dispatch(EXECUTORS["embedding"], fn, *args, **kwargs)
+
+
+def reserve_export() -> Callable[[], None]:
+    """Hold an export slot while a response streams. Raises HTTP 503 when every slot is taken."""
+    try:
+        return EXECUTORS["export"].reserve()
+    except ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+
+
+def executor_stats() -> dict:
+    return {name: executor.stats() for name, executor in EXECUTORS.items()}
+
+
+def shutdown_executors() -> None:
+    for executor in EXECUTORS.values():
+        executor.shutdown()
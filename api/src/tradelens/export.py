@@ -0,0 +1,173 @@
+import io
+import threading
+from contextlib import ExitStack
+from typing import Callable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from tradelens.database import get_database
+from tradelens.executor import reserve_export, run_query
+
+
+# Rows fetched from DuckDB per record batch - each batch is one CSV chunk, IPC message or parquet row group
+EXPORT_BATCH_ROWS = 65536
+
+# Export format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file that hands back whatever was written since the last drain.
+
+    Keeps counting the logical position so writers that record offsets (the
+    parquet footer) still see a continuous file.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _open_writer(fmt: str, sink: _ChunkSink, schema: pa.Schema):
+    if fmt == "csv":
+        return pa_csv.CSVWriter(sink, schema)
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+class ExportStream:
+    """
+    Streams the result of a query as CSV, Parquet or Arrow IPC bytes.
+
+    The query runs on a cursor borrowed from the shared pool and is read back in
+    record batches, each of which is encoded and handed to the client before the
+    next is fetched, so server memory stays at about one batch whatever the
+    size of the result. The cursor (and the export slot, via `release`) is
+    returned when the stream is exhausted or closed.
+
+    Batches are read under a lock that close() also takes, so closing from another
+    thread (the response's background task after a disconnect) waits for a read in
+    progress and never hands the cursor back while it is still in use.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        params: list,
+        fmt: str,
+        batch_rows: int = EXPORT_BATCH_ROWS,
+        release: Optional[Callable[[], None]] = None
+    ):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'")
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._closed = False
+        self._resources = ExitStack()
+        if release is not None:
+            self._resources.callback(release)
+        try:
+            conn = self._resources.enter_context(get_database().cursor())
+            result = conn.execute(query, params)
+            # to_arrow_reader replaces fetch_record_batch in newer DuckDB releases
+            to_reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+            self._reader = to_reader(batch_rows)
+        except Exception:
+            self._resources.close()
+            raise
+
+    def __iter__(self) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        try:
+            writer = _open_writer(self.fmt, sink, self._reader.schema)
+            batches = iter(self._reader)
+            while True:
+                with self._lock:
+                    if self._closed:
+                        return
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                writer.write_batch(batch)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+            writer.close()
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Close the reader, then return the cursor and export slot. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._reader.close()
+            finally:
+                self._resources.close()
+
+
+def export_response(stream: ExportStream, filename: str) -> StreamingResponse:
+    """Wrap an export stream in a download response."""
+    media_type, extension = EXPORT_FORMATS[stream.fmt]
+    return StreamingResponse(
+        iter(stream),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+        # Also returns the cursor if the client goes away before the stream is read
+        background=BackgroundTask(stream.close),
+    )
+
+
+def open_export(
+    query: str,
+    params: list,
+    fmt: str,
+    batch_rows: Optional[int] = None,
+    release: Optional[Callable[[], None]] = None
+) -> ExportStream:
+    """Blocking - start an export. Dispatch via run_query so query errors surface before the response starts."""
+    return ExportStream(query, params, fmt, batch_rows or EXPORT_BATCH_ROWS, release)
+
+
+async def start_export(query: str, params: list, fmt: str) -> ExportStream:
+    """
+    Open an export on the query executor, holding an export slot until the stream is
+    closed. Raises HTTP 503 when every export slot or the query executor is busy.
+    """
+    release = reserve_export()
+    try:
+        return await run_query(open_export, query, params, fmt, release=release)
+    except BaseException:
+        release()
+        raise
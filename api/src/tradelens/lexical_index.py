@@ -0,0 +1,138 @@
+"""
+In-memory BM25 index for text autocomplete, and rank fusion with semantic results.
+
+Descriptions are split into lower-cased word tokens. The last word of a query
+is matched as a prefix, since autocomplete queries are usually still being
+typed: "stainless ste" matches "stainless steel". Prefixes are expanded by
+bisecting the sorted vocabulary, and each expanded word is scored as a query term.
+
+A document is a keyword match when it contains every word of the query. When a
+catalogue has at least `limit` keyword matches, autocomplete ranks them by BM25
+and never calls the encoder; otherwise the BM25 and embedding rankings are
+merged with reciprocal rank fusion.
+"""
+
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# BM25 term-frequency saturation and length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal rank fusion constant - score = sum of 1 / (RRF_K + rank)
+RRF_K = 60
+
+# Item fields indexed for text search
+TEXT_FIELDS = ("description", "name", "country_name", "country_iso2", "country_iso3")
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset({"a", "an", "and", "for", "in", "of", "on", "or", "the", "to", "with"})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of a text, without stopwords."""
+    return [token for token in _TOKEN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+def item_text(item: dict) -> str:
+    """Searchable text of an autocomplete item, without repeating identical fields."""
+    values = []
+    for field in TEXT_FIELDS:
+        value = item.get(field)
+        if value and value not in values:
+            values.append(str(value))
+    return " ".join(values)
+
+
+class BM25Index:
+    """BM25 inverted index over a list of texts; search results are positions in that list."""
+
+    def __init__(self, texts: Sequence[str]):
+        docs = [tokenize(text) for text in texts]
+        self.size = len(docs)
+        lengths = np.array([len(doc) for doc in docs], dtype=np.float32)
+        average = float(lengths.mean()) if self.size and lengths.sum() else 1.0
+        # Per-document part of the BM25 denominator
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average)
+
+        counts: Dict[str, Dict[int, int]] = {}
+        for i, doc in enumerate(docs):
+            for token in doc:
+                postings = counts.setdefault(token, {})
+                postings[i] = postings.get(i, 0) + 1
+
+        # term -> (document positions, term frequencies), and the vocabulary sorted for prefix ranges
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            term: (np.fromiter(p.keys(), np.int64, len(p)), np.fromiter(p.values(), np.float32, len(p)))
+            for term, p in counts.items()
+        }
+        self._idf = {
+            term: float(np.log(1 + (self.size - len(positions) + 0.5) / (len(positions) + 0.5)))
+            for term, (positions, _) in self._postings.items()
+        }
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _expand(self, prefix: str) -> List[str]:
+        lo = bisect_left(self._vocabulary, prefix)
+        hi = bisect_left(self._vocabulary, prefix + "\U0010ffff")
+        return self._vocabulary[lo:hi]
+
+    def _query_terms(self, query: str) -> List[List[str]]:
+        """Index terms for each query word - the last word also matches as a prefix."""
+        words = tokenize(query)
+        terms = [[word] if word in self._postings else [] for word in words[:-1]]
+        if words:
+            terms.append(self._expand(words[-1]))
+        return terms
+
+    def search(self, query: str, limit: int = 50, match_all: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and BM25 scores of the best `limit` documents for a query, best first.
+        With match_all only documents containing every query word are returned.
+        """
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        terms = self._query_terms(query)
+        if not terms or limit <= 0 or (match_all and not all(terms)):
+            return empty
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        matched = np.zeros(self.size, dtype=np.int32)
+        for expansions in terms:
+            seen = np.zeros(self.size, dtype=bool)
+            for term in expansions:
+                docs, tf = self._postings[term]
+                scores[docs] += self._idf[term] * tf * (BM25_K1 + 1) / (tf + self._norm[docs])
+                seen[docs] = True
+            matched += seen
+
+        candidates = np.flatnonzero(matched == len(terms) if match_all else matched > 0)
+        if not len(candidates):
+            return empty
+        # Highest score first, ties broken by position so results are stable
+        order = np.lexsort((candidates, -scores[candidates]))[:limit]
+        return candidates[order], scores[candidates[order]]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], limit: int, k: int = RRF_K) -> List[int]:
+    """Merge ranked position lists, best first, scoring each position by the sum of 1 / (k + rank)."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            position = int(position)
+            scores[position] = scores.get(position, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda position: (-scores[position], position))[:limit]
+
+
+def keyword_search(index: BM25Index, query: str, limit: int) -> Optional[List[int]]:
+    """Positions for a query answered by keyword matches alone, or None if there are fewer than `limit`."""
+    positions, _ = index.search(query, limit, match_all=True)
+    if len(positions) < limit:
+        return None
+    return [int(i) for i in positions]
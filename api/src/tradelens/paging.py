@@ -0,0 +1,122 @@
+import base64
+import json
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import duckdb
+
+from tradelens.cache import TOTALS
+
+
+# Ordering used by the paging engine: (column, descending)
+OrderBy = Sequence[Tuple[str, bool]]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, length: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, checking it matches the sort key length."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Invalid cursor: sort key does not match this query")
+    return values
+
+
+def keyset_predicate(order_by: OrderBy, values: Sequence[Any]) -> Tuple[str, list]:
+    """
+    Build a predicate selecting rows strictly after `values` in `order_by` order.
+
+    Expands to (a < ?) OR (a = ? AND b < ?) OR ... with the comparison flipped
+    for ascending columns, which DuckDB can push down into the scan.
+    """
+    clauses = []
+    params = []
+    for i, (column, descending) in enumerate(order_by):
+        parts = [f"{prev} = ?" for prev, _ in order_by[:i]]
+        parts.append(f"{column} {'<' if descending else '>'} ?")
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def order_clause(order_by: OrderBy) -> str:
+    return ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, descending in order_by)
+
+
+def fetch_columns(conn: duckdb.DuckDBPyConnection, query: str, params: list) -> Dict[str, list]:
+    """Run a query and return its result column by column as Python lists (NULLs as None)."""
+    result = conn.execute(query, params).fetchnumpy()
+    return {name: values.tolist() for name, values in result.items()}
+
+
+def fetch_page(
+    conn: duckdb.DuckDBPyConnection,
+    base_query: str,
+    params: list,
+    order_by: OrderBy,
+    page: int,
+    page_size: int,
+    signature: Hashable,
+    cursor: Optional[str] = None
+) -> Tuple[Dict[str, list], int, Optional[str]]:
+    """
+    Fetch one page of `base_query` together with the total number of matching rows.
+
+    The first request for a filter signature returns the page and the total in a
+    single scan using a window count; the total is then cached so later pages only
+    fetch their rows. If a cursor is given the page is located by keyset
+    (rows after the cursor's sort key) instead of OFFSET, so deep pages cost the
+    same as the first one.
+
+    Returns (columns, total, next_cursor), where columns maps each of the base
+    query's column names to its values on this page.
+    """
+    order_sql = order_clause(order_by)
+    total = TOTALS.get(signature)
+
+    if cursor:
+        after, after_params = keyset_predicate(order_by, decode_cursor(cursor, len(order_by)))
+        columns = fetch_columns(
+            conn,
+            f"SELECT * FROM ({base_query}) page_q WHERE {after} ORDER BY {order_sql} LIMIT ?",
+            list(params) + after_params + [page_size]
+        )
+    elif total is not None:
+        columns = fetch_columns(
+            conn,
+            f"SELECT * FROM ({base_query}) page_q ORDER BY {order_sql} LIMIT ? OFFSET ?",
+            list(params) + [page_size, (page - 1) * page_size]
+        )
+    else:
+        columns = fetch_columns(
+            conn,
+            f"SELECT *, COUNT(*) OVER () AS __total FROM ({base_query}) page_q ORDER BY {order_sql} LIMIT ? OFFSET ?",
+            list(params) + [page_size, (page - 1) * page_size]
+        )
+        totals = columns.pop("__total")
+        if totals:
+            total = totals[0]
+        elif page == 1:
+            total = 0
+
+    if total is None:
+        # Page past the end or a cursor on a new signature - count once and remember it
+        total = conn.execute(f"SELECT COUNT(*) FROM ({base_query}) count_q", list(params)).fetchone()[0]
+    TOTALS.put(signature, total)
+
+    row_count = len(next(iter(columns.values()), []))
+    next_cursor = None
+    if row_count == page_size:
+        next_cursor = encode_cursor([columns[column][-1] for column, _ in order_by])
+
+    return columns, total, next_cursor
@@ -0,0 +1,215 @@
+"""
+Build the PRODCOM dataset used by the API.
+
+Replaces the `to_parquet` export in data-prep/manufacturers_sales/prodcom_prep.ipynb,
+which stores year as text and leaves rows in spreadsheet order, so every query
+has to cast and scan the whole file. The build writes a single parquet file with
+typed columns (integer year, double value) sorted by code, measure then year, in
+small row groups, so code/measure/year filters skip most row groups using
+parquet min/max statistics.
+
+Usage (from the api folder):
+
+    # From the ONS publication tables
+    python -m tradelens.prodcom_build --xlsx ../data-prep/manufacturers_sales/prodcom_accessiblepublicationtables2024.xlsx
+
+    # From the parquet file downloaded by data-setup.py
+    python -m tradelens.prodcom_build --parquet data/prodcom/prodcom.parquet --benchmark
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import duckdb
+
+from tradelens.database import PRODCOM_DATASET_FILE, dataset_reader
+
+
+# Rows per parquet row group - a product has ~30 rows, so a lookup touches one or two groups
+DEFAULT_ROW_GROUP_SIZE = 8192
+DEFAULT_COMPRESSION = "zstd"
+
+SORT_ORDER = "code, measure, year"
+
+# Columns of the PRODCOM fact table and their types
+COLUMNS = {
+    "code": "VARCHAR",
+    "description": "VARCHAR",
+    "parent_description": "VARCHAR",
+    "type": "VARCHAR",
+    "unit": "VARCHAR",
+    "measure": "VARCHAR",
+    "year": "INTEGER",
+    "value": "DOUBLE",
+    "flag": "VARCHAR",
+}
+
+# Sheets of the ONS PRODCOM publication tables, as read by prodcom_prep.ipynb
+SHEETS = [
+    {"name": "Table 2", "type": "Division", "skiprows": 6, "cols": ["description", "code"], "measure": "Value £ million"},
+    {"name": "Table 3", "type": "Industry", "skiprows": 6, "cols": ["parent_description", "code", "description"], "measure": "Value £ million"},
+    {"name": "Table 5", "type": "Product", "skiprows": 5, "cols": ["code", "description", "measure"]},
+]
+
+FLAGS = {"e": "e - low response; high level of estimation"}
+
+
+def xlsx_frame(path: str):
+    """The publication tables reshaped to one row per code, unit and year (needs pandas and openpyxl)."""
+    import numpy as np
+    import pandas as pd
+
+    frames = []
+    for sheet in SHEETS:
+        df = pd.read_excel(path, sheet_name=sheet["name"], skiprows=sheet["skiprows"])
+        df["type"] = sheet["type"]
+        df.columns = sheet["cols"] + list(df.columns[len(sheet["cols"]):])
+        if "measure" in sheet:
+            df["measure"] = sheet["measure"]
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+
+    years = [col for col in df.columns if str(col).startswith("20")]
+    df = df[["description", "code", "parent_description", "type", "measure"] + years]
+    df = df.rename(columns={"measure": "unit"})
+    df = df.melt(id_vars=["description", "code", "parent_description", "type", "unit"], var_name="year", value_name="value")
+
+    # Values carry [bracketed] flags; suppressed values ([c], [x]) are dropped
+    df["flag"] = df["value"].str.extract(r"\[(.*?)\]")[0].map(FLAGS)
+    df["value"] = pd.to_numeric(df["value"].astype(str).str.replace(r"\[.*?\]", "", regex=True), errors="coerce")
+    df = df.dropna(subset=["value"])
+
+    df["measure"] = np.where(df["unit"].str.contains("Value", case=False), "Value",
+                             np.where(df["unit"].str.contains("Volume", case=False), "Volume", "Average price/Other"))
+    df["code"] = df["code"].astype(str)
+    # Product descriptions repeat the code - strip it as the notebook did
+    df["description"] = df.apply(lambda row: str(row["description"]).strip(row["code"] + ","), axis=1)
+    return df
+
+
+def typed_source(source: str) -> str:
+    """SQL relation casting a PRODCOM source to the dataset's column types."""
+    columns = ", ".join(f"TRY_CAST({name} AS {sql_type}) AS {name}" for name, sql_type in COLUMNS.items())
+    return f"SELECT {columns} FROM ({source}) src"
+
+
+def build_dataset(
+    source: str,
+    output: str = PRODCOM_DATASET_FILE,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+    conn: Optional[duckdb.DuckDBPyConnection] = None
+) -> str:
+    """Write the typed, sorted dataset from `source`, replacing any previous file atomically."""
+    own_conn = conn is None
+    conn = conn or duckdb.connect()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        staging = output + ".tmp"
+        conn.execute(f"""
+            COPY (
+                SELECT * FROM ({typed_source(source)}) typed
+                WHERE year IS NOT NULL AND value IS NOT NULL
+                ORDER BY {SORT_ORDER}
+            ) TO '{staging}'
+            (FORMAT PARQUET, COMPRESSION {compression}, ROW_GROUP_SIZE {int(row_group_size)})
+        """)
+        os.replace(staging, output)
+        return output
+    finally:
+        if own_conn:
+            conn.close()
+
+
+#### Benchmark - rows the PRODCOM query reads from each layout
+def scan_profile(conn: duckdb.DuckDBPyConnection, query: str, params: list) -> Dict[str, float]:
+    """Run a query with profiling on; returns its result size, the rows its table scans read, and its time."""
+    profile = os.path.join(tempfile.mkdtemp(), "profile.json")
+    conn.execute("PRAGMA enable_profiling='json'")
+    conn.execute(f"PRAGMA profiling_output='{profile}'")
+    start = time.perf_counter()
+    rows = conn.execute(query, params).fetchall()
+    elapsed = time.perf_counter() - start
+    conn.execute("PRAGMA disable_profiling")
+
+    with open(profile) as f:
+        root = json.load(f)
+    os.remove(profile)
+    scanned, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        if node.get("operator_type") == "TABLE_SCAN":
+            scanned += int(node.get("operator_cardinality", 0))
+        stack.extend(node.get("children", []))
+    return {"rows": len(rows), "rows_read": scanned, "ms": elapsed * 1000}
+
+
+def benchmark(paths: Dict[str, str], queries: int = 20, codes_per_query: int = 3, seed: int = 0) -> Dict[str, dict]:
+    """
+    Run the /api/prodcom-query filter for random codes and year ranges against each
+    layout (name -> parquet path); returns the mean result rows, rows read and latency.
+    """
+    from tradelens.database import TradeDatabase
+    from tradelens.prodcom_service import build_prodcom_query
+
+    rng = random.Random(seed)
+    first = TradeDatabase(datasets={"prodcom": next(iter(paths.values()))}, pool_size=1).open()
+    with first.cursor() as conn:
+        codes = [row[0] for row in conn.execute("SELECT DISTINCT code FROM prodcom ORDER BY code").fetchall()]
+    first.close()
+    workload = []
+    for _ in range(queries):
+        year_from = rng.randint(2014, 2024)
+        workload.append((rng.sample(codes, min(codes_per_query, len(codes))), year_from, rng.randint(year_from, 2024),
+                         rng.choice(["Value", "Volume", "Other"])))
+
+    results = {}
+    for name, path in paths.items():
+        database = TradeDatabase(datasets={"prodcom": path}, pool_size=1).open()
+        with database.cursor() as conn:
+            profiles = [scan_profile(conn, *build_prodcom_query(*args)) for args in workload]
+        database.close()
+        results[name] = {
+            key: round(sum(p[key] for p in profiles) / len(profiles), 2)
+            for key in ["rows", "rows_read", "ms"]
+        }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the typed, sorted PRODCOM dataset.")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--xlsx", help="ONS PRODCOM publication tables workbook")
+    source_group.add_argument("--parquet", help="Existing PRODCOM parquet file to re-layout")
+    parser.add_argument("--output", default=PRODCOM_DATASET_FILE, help="Output parquet file")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION)
+    parser.add_argument("--benchmark", action="store_true", help="Compare rows read with the --parquet source")
+    args = parser.parse_args(argv)
+
+    conn = duckdb.connect()
+    if args.xlsx:
+        conn.register("prodcom_xlsx", xlsx_frame(args.xlsx))
+        source = "SELECT * FROM prodcom_xlsx"
+    else:
+        source = f"SELECT * FROM {dataset_reader(args.parquet)}"
+
+    print(f"Building PRODCOM dataset {args.output}")
+    start = time.perf_counter()
+    build_dataset(source, args.output, args.row_group_size, args.compression, conn=conn)
+    rows = conn.execute(f"SELECT COUNT(*) FROM read_parquet('{args.output}')").fetchone()[0]
+    print(f"  ✓ {rows} rows written in {time.perf_counter() - start:.1f}s")
+    conn.close()
+
+    if args.benchmark and args.parquet:
+        for name, stats in benchmark({"source": args.parquet, "built": args.output}).items():
+            print(f"  {name}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
+import threading
 
+import numpy as np
+import orjson
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional, List
-import duckdb
-import datetime
+from fastapi.responses import Response
+from typing import Optional, List, Tuple
+from datetime import datetime
 
-from tradelens.data_models import ProdcomRecord, ProdcomDataResponse
+from tradelens.cache import RESULTS, canonical_key
+from tradelens.data_models import ProdcomRecord, ProdcomDataResponse, ProdcomSeriesResponse
+from tradelens.database import get_database
+from tradelens.embedding import Catalogue, embedding_autocomplete, register_catalogue
+from tradelens.executor import run_embedding, run_query
+from tradelens.export import export_response, start_export
+from tradelens.paging import fetch_columns
+from tradelens.serialization import timed_response_json
 
 
 router = APIRouter(
@@ -12,62 +22,80 @@ router = APIRouter(
     tags=["prodcom"],
 )
 
-#### Helper function for PRODCOM products (database-based)
-async def search_prodcom_products_db(
+# Measure parameter -> measure value in the PRODCOM dataset
+PRODCOM_MEASURES = {
+    "Value": "Value",
+    "Volume": "Volume",
+    "Other": "Average price/Other",
+}
+
+# Most codes one series request may chart
+MAX_SERIES_CODES = 500
+
+# Distinct PRODCOM products as a search catalogue, rebuilt when the dataset files change
+_PRODCOM_CATALOGUE = {"version": None, "catalogue": None}
+_PRODCOM_CATALOGUE_LOCK = threading.Lock()
+
+
+# Autocomplete item for a (code, description, type) row
+def prodcom_product(row) -> dict:
+    return {
+        "code": str(row[0]),
+        "name": str(row[1]),
+        "description": str(row[1]),
+        "type": str(row[2]) if len(row) > 2 and row[2] else None
+    }
+
+
+def load_prodcom_products(database) -> List[dict]:
+    """Distinct PRODCOM products, deduplicated from the fact table - empty if the dataset is missing."""
+    if "prodcom" not in database.view_names():
+        return []
+    with database.cursor() as conn:
+        rows = conn.execute("""
+            SELECT DISTINCT code, description, type
+            FROM prodcom
+            WHERE description IS NOT NULL
+            ORDER BY code
+        """).fetchall()
+    return [prodcom_product(row) for row in rows]
+
+
+#### In-memory PRODCOM catalogue shared with HS6/CN8 autocomplete - blocking
+def prodcom_catalogue() -> Catalogue:
+    """
+    The distinct PRODCOM products with their code and keyword indexes, partitioned by type.
+    Built once per version of the dataset files, so autocomplete never scans the parquet.
+    """
+    
+    database = get_database()
+    version = database.view_version("prodcom")
+    catalogue = _PRODCOM_CATALOGUE["catalogue"]
+    if catalogue is not None and _PRODCOM_CATALOGUE["version"] == version:
+        return catalogue
+    
+    with _PRODCOM_CATALOGUE_LOCK:
+        if _PRODCOM_CATALOGUE["catalogue"] is None or _PRODCOM_CATALOGUE["version"] != version:
+            # PRODCOM has no embeddings - text searches are ranked by BM25
+            _PRODCOM_CATALOGUE["catalogue"] = Catalogue(
+                "prodcom", load_prodcom_products(database), np.empty((0, 0), dtype=np.float32)
+            )
+            _PRODCOM_CATALOGUE["version"] = version
+        return _PRODCOM_CATALOGUE["catalogue"]
+
+
+# Autocomplete for item_type "prodcom", and the warm-up, read the catalogue from here
+register_catalogue("prodcom", prodcom_catalogue)
+
+
+#### Helper function for PRODCOM products - blocking, dispatch via run_embedding
+def search_prodcom_products_db(
     search: Optional[str] = None,
     type_filter: Optional[str] = None,
     limit: int = 50
 ) -> List[dict]:
-    """Search PRODCOM products from database."""
-    
-    conn = duckdb.connect()
-    
-    try:
-        # Build base query
-        base_query = """
-        SELECT DISTINCT code, description, type
-        FROM 'data/prodcom/prodcom.parquet' 
-        WHERE description IS NOT NULL
-        """
-        params = []
-        
-        # Add type filter if specified
-        if type_filter:
-            base_query += " AND type = ?"
-            params.append(type_filter)
-        
-        if not search:
-            # Return a sample of products if no search term
-            query = base_query + " ORDER BY code LIMIT ?"
-            params.append(limit)
-        else:
-            # Search by description or code
-            query = base_query + """
-            AND (LOWER(description) LIKE LOWER(?) OR code LIKE ?)
-            ORDER BY 
-                CASE WHEN code LIKE ? THEN 1 ELSE 2 END,
-                LENGTH(description),
-                code
-            LIMIT ?
-            """
-            search_pattern = f"%{search}%"
-            code_pattern = f"{search}%"
-            params.extend([search_pattern, code_pattern, code_pattern, limit])
-        
-        result = conn.execute(query, params).fetchall()
-        
-        return [
-            {
-                "code": str(row[0]),
-                "name": str(row[1]),
-                "description": str(row[1]),
-                "type": str(row[2]) if len(row) > 2 and row[2] else None
-            }
-            for row in result
-        ]
-        
-    finally:
-        conn.close()
+    """Search PRODCOM products - code prefix search, or BM25-ranked description search."""
+    return embedding_autocomplete(search, "prodcom", type_filter, limit)
 
 #### 3. End point to return searched PRODCOM products (for PRODCOM dataset) - DEPRECATED
 @router.get("/products")
@@ -76,7 +104,61 @@ async def search_prodcom_products(
     limit: int = Query(50, le=100)
 ) -> List[dict]:
     """DEPRECATED: Use /api/products?nomenclature=PRODCOM instead."""
-    return await search_prodcom_products_db(search, None, limit)
+    return await run_embedding(search_prodcom_products_db, search, None, limit)
+
+
+#### Validate the PRODCOM query parameters shared by the query and export end points
+def parse_prodcom_filters(product_codes: str, year_from: int, year_to: int) -> List[str]:
+    """Returns the requested product codes, raising 400 on invalid input."""
+    
+    if year_to < year_from:
+        raise HTTPException(status_code=400, detail="year_to must be >= year_from")
+    
+    product_list = [code.strip() for code in product_codes.split(",") if code.strip()]
+    if not product_list:
+        raise HTTPException(status_code=400, detail="At least one product code required")
+    return product_list
+
+
+#### Build the PRODCOM query for a set of products, years and one measure
+def build_prodcom_query(product_list: List[str], year_from: int, year_to: int, measure: str) -> Tuple[str, list]:
+    """Returns the unordered, unpaginated PRODCOM query and its parameters."""
+    
+    # Map measure parameter to database measure values
+    db_measure = PRODCOM_MEASURES[measure]
+    
+    # Build parameters list
+    params = []
+    
+    # Build WHERE conditions
+    where_conditions = []
+    
+    # Year filter - the view exposes year as an integer, so parquet statistics can prune on it
+    where_conditions.append("year BETWEEN ? AND ?")
+    params.extend([year_from, year_to])
+    
+    # Product codes filter
+    product_placeholders = ",".join(["?" for _ in product_list])
+    where_conditions.append(f"code IN ({product_placeholders})")
+    params.extend(product_list)
+    
+    # Measure filter
+    where_conditions.append("measure = ?")
+    params.append(db_measure)
+    
+    query = f"""
+    SELECT 
+        code,
+        description,
+        year,
+        measure,
+        value,
+        unit,
+        flag
+    FROM prodcom
+    WHERE {' AND '.join(where_conditions)}
+    """
+    return query, params
 
 
 #### 5. End point for PRODCOM manufacturer sales data query
@@ -85,84 +167,105 @@ async def query_prodcom_data(
     product_codes: str = Query("16211529", description="Comma-separated product codes"),
     year_from: int = Query(2020, ge=2014, le=2024),
     year_to: int = Query(2024, ge=2014, le=2024),
-    measure: str = Query("Value", regex="^(Value|Volume|Other)$", description="Data measure type"),
+    measure: str = Query("Value", pattern="^(Value|Volume|Other)$", description="Data measure type"),
     page: int = Query(1, ge=1),
     page_size: int = Query(100, ge=10, le=10000)
 ):
     """Returns PRODCOM manufacturer sales data based on query parameters."""
     
-    start_time = datetime.now()
+    return await run_query(fetch_prodcom_data, product_codes, year_from, year_to, measure, page, page_size)
+
+
+#### End point streaming the full filtered PRODCOM result as a file
+@router.get("-query/export")
+async def export_prodcom_data(
+    product_codes: str = Query("16211529", description="Comma-separated product codes"),
+    year_from: int = Query(2020, ge=2014, le=2024),
+    year_to: int = Query(2024, ge=2014, le=2024),
+    measure: str = Query("Value", pattern="^(Value|Volume|Other)$", description="Data measure type"),
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$", description="csv, parquet or arrow (IPC stream)")
+):
+    """Streams every record matching the PRODCOM query, in the same columns as /api/prodcom-query."""
     
-    if year_to < year_from:
-        raise HTTPException(status_code=400, detail="year_to must be >= year_from")
+    product_list = parse_prodcom_filters(product_codes, year_from, year_to)
+    query, params = build_prodcom_query(product_list, year_from, year_to, measure)
     
-    product_list = [code.strip() for code in product_codes.split(",") if code.strip()]
-    if not product_list:
-        raise HTTPException(status_code=400, detail="At least one product code required")
+    try:
+        stream = await start_export(query, params, format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"PRODCOM export failed: {str(e)}")
+    return export_response(stream, f"prodcom_{measure.lower()}_{year_from}_{year_to}")
+
+
+#### End point returning PRODCOM series for charts - one codes x years matrix per measure
+@router.get("-query/series", response_model=ProdcomSeriesResponse)
+async def query_prodcom_series(
+    product_codes: str = Query("16211529", description="Comma-separated product codes"),
+    year_from: int = Query(2014, ge=2014, le=2024),
+    year_to: int = Query(2024, ge=2014, le=2024),
+    measures: str = Query("Value,Volume,Other", description="Comma-separated measures: Value, Volume, Other")
+):
+    """Returns value, volume and price series for many codes at once, pivoted to codes x years."""
+    
+    content = await run_query(fetch_prodcom_series, product_codes, year_from, year_to, measures)
+    return Response(content=content, media_type="application/json")
+
+
+#### Blocking implementation of the PRODCOM query, run on the query executor
+def fetch_prodcom_data(
+    product_codes: str,
+    year_from: int,
+    year_to: int,
+    measure: str,
+    page: int,
+    page_size: int
+) -> ProdcomDataResponse:
+    """Runs the PRODCOM query against the shared database."""
+    
+    start_time = datetime.now()
+    
+    product_list = parse_prodcom_filters(product_codes, year_from, year_to)
     
     try:
-        # Map measure parameter to database measure values
-        measure_mapping = {
-            "Value": "Value",
-            "Volume": "Volume", 
-            "Other": "Average price/Other"
-        }
-        db_measure = measure_mapping[measure]
-        
-        # Build parameters list
-        params = []
-        
-        # Build WHERE conditions
-        where_conditions = []
-        
-        # Year filter with explicit casting
-        where_conditions.append("CAST(year AS INTEGER) BETWEEN ? AND ?")
-        params.extend([year_from, year_to])
-        
-        # Product codes filter
-        product_placeholders = ",".join(["?" for _ in product_list])
-        where_conditions.append(f"code IN ({product_placeholders})")
-        params.extend(product_list)
-        
-        # Measure filter
-        where_conditions.append("measure = ?")
-        params.append(db_measure)
+        database = get_database()
+        cache_key = canonical_key(
+            "prodcom-query",
+            version=database.view_version("prodcom"),
+            products=product_list,
+            year_from=year_from,
+            year_to=year_to,
+            measure=measure,
+            page=page,
+            page_size=page_size,
+        )
+        cached = RESULTS.get(cache_key)
+        if cached is not None:
+            execution_time = (datetime.now() - start_time).total_seconds() * 1000
+            return cached.model_copy(update={"execution_time_ms": round(execution_time, 2)})
         
-        # Build queries
-        base_from = "FROM 'data/prodcom/prodcom.parquet'"
-        where_clause = f"WHERE {' AND '.join(where_conditions)}"
+        base_query, params = build_prodcom_query(product_list, year_from, year_to, measure)
         
         # Count query
-        count_query = f"SELECT COUNT(*) as total {base_from} {where_clause}"
+        count_query = f"SELECT COUNT(*) as total FROM ({base_query}) count_q"
         
         # Data query
         offset = (page - 1) * page_size
         data_query = f"""
-        SELECT 
-            code,
-            description,
-            year,
-            measure,
-            value,
-            unit,
-            flag
-        {base_from}
-        {where_clause}
-        ORDER BY CAST(year AS INTEGER) DESC, value DESC
+        SELECT * FROM ({base_query}) data_q
+        ORDER BY year DESC, value DESC
         LIMIT ? OFFSET ?
         """
         
-        conn = duckdb.connect()
-        
         # Execute queries
         data_params = list(params) + [page_size, offset]
         
-        total_result = conn.execute(count_query, params).fetchone()
-        total_records = total_result[0] if total_result else 0
-        
-        data_result = conn.execute(data_query, data_params).fetchall()
-        
-        conn.close()
+        with database.cursor() as conn:
+            total_result = conn.execute(count_query, params).fetchone()
+            total_records = total_result[0] if total_result else 0
+            
+            data_result = conn.execute(data_query, data_params).fetchall()
         
         # Convert results
         data = [
@@ -182,7 +285,7 @@ async def query_prodcom_data(
         execution_time = (datetime.now() - start_time).total_seconds() * 1000
         total_pages = (total_records + page_size - 1) // page_size
         
-        return ProdcomDataResponse(
+        response = ProdcomDataResponse(
             total_records=total_records,
             page=page,
             page_size=page_size,
@@ -190,6 +293,92 @@ async def query_prodcom_data(
             data=data,
             execution_time_ms=round(execution_time, 2)
         )
+        RESULTS.put(cache_key, response)
+        return response
 
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"PRODCOM query failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"PRODCOM query failed: {str(e)}")
+
+
+#### Blocking implementation of the PRODCOM series query, run on the query executor
+def fetch_prodcom_series(product_codes: str, year_from: int, year_to: int, measures: str) -> bytes:
+    """
+    Runs one grouped query for all codes, measures and years and pivots it into a
+    ProdcomSeriesResponse JSON body. Unpublished cells are null.
+    """
+    
+    start_time = datetime.now()
+    
+    product_list = list(dict.fromkeys(parse_prodcom_filters(product_codes, year_from, year_to)))
+    if len(product_list) > MAX_SERIES_CODES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_CODES} product codes per series request")
+    measure_list = list(dict.fromkeys(m.strip() for m in measures.split(",") if m.strip()))
+    unknown = [m for m in measure_list if m not in PRODCOM_MEASURES]
+    if not measure_list or unknown:
+        raise HTTPException(status_code=400, detail=f"Measures must be among {', '.join(PRODCOM_MEASURES)}")
+    
+    try:
+        database = get_database()
+        cache_key = canonical_key(
+            "prodcom-series",
+            version=database.view_version("prodcom"),
+            products=product_list,
+            year_from=year_from,
+            year_to=year_to,
+            measures=measure_list,
+        )
+        body = RESULTS.get(cache_key)
+        
+        if body is None:
+            query = f"""
+            SELECT
+                code,
+                measure,
+                year,
+                ANY_VALUE(description) AS description,
+                ANY_VALUE(unit) AS unit,
+                -- Values and volumes add up across duplicate rows; prices do not
+                CASE WHEN measure = ? THEN AVG(value) ELSE SUM(value) END AS value
+            FROM prodcom
+            WHERE year BETWEEN ? AND ?
+              AND code IN ({",".join("?" for _ in product_list)})
+              AND measure IN ({",".join("?" for _ in measure_list)})
+            GROUP BY code, measure, year
+            """
+            params = [PRODCOM_MEASURES["Other"], year_from, year_to] + product_list + [PRODCOM_MEASURES[m] for m in measure_list]
+            with database.cursor() as conn:
+                columns = fetch_columns(conn, query, params)
+            
+            body = orjson.dumps(
+                pivot_series(columns, product_list, list(range(year_from, year_to + 1)), measure_list),
+                option=orjson.OPT_SERIALIZE_NUMPY
+            )
+            RESULTS.put(cache_key, body)
+        
+        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        return timed_response_json(body, round(execution_time, 2))
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"PRODCOM series query failed: {str(e)}")
+
+
+def pivot_series(columns: dict, codes: List[str], years: List[int], measures: List[str]) -> dict:
+    """Scatter grouped (code, measure, year) rows into one codes x years matrix per measure."""
+    code_pos = {code: i for i, code in enumerate(codes)}
+    measure_names = {PRODCOM_MEASURES[m]: m for m in measures}
+    descriptions = [None] * len(codes)
+    
+    series = {}
+    for m in measures:
+        series[m] = {"units": [None] * len(codes), "values": np.full((len(codes), len(years)), np.nan)}
+    
+    for code, measure, year, description, unit, value in zip(
+        columns["code"], columns["measure"], columns["year"], columns["description"], columns["unit"], columns["value"]
+    ):
+        i = code_pos[code]
+        target = series[measure_names[measure]]
+        target["values"][i, year - years[0]] = np.nan if value is None else value
+        target["units"][i] = unit
+        descriptions[i] = description
+    
+    return {"codes": codes, "descriptions": descriptions, "years": years, "series": series}
@@ -0,0 +1,39 @@
+from typing import Dict
+
+import orjson
+
+
+def records_json(columns: Dict[str, list]) -> bytes:
+    """
+    Serialise column lists straight to a JSON array of row objects.
+
+    Skips per-row pydantic models: values come out of DuckDB already typed, so
+    the rows only need zipping into dicts before orjson writes them. NaN is
+    written as null, as pydantic does.
+    """
+    names = list(columns)
+    return orjson.dumps([dict(zip(names, row)) for row in zip(*columns.values())])
+
+
+def paged_response_json(
+    total_records: int,
+    page: int,
+    page_size: int,
+    data_json: bytes,
+    execution_time_ms: float,
+    **extra
+) -> bytes:
+    """Assemble a TradeDataResponse/ProdcomDataResponse body around pre-serialised records."""
+    head = orjson.dumps({
+        "total_records": total_records,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total_records + page_size - 1) // page_size,
+    })
+    tail = orjson.dumps({"execution_time_ms": execution_time_ms, **extra})
+    return head[:-1] + b',"data":' + data_json + b"," + tail[1:]
+
+
+def timed_response_json(body_json: bytes, execution_time_ms: float) -> bytes:
+    """Add execution_time_ms to a pre-serialised (cached) JSON object."""
+    return body_json[:-1] + b',"execution_time_ms":' + orjson.dumps(execution_time_ms) + b"}"
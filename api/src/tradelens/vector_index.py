@@ -0,0 +1,254 @@
+"""
+Nearest-neighbour indexes over the embedding catalogues used by autocomplete.
+
+Every index works on L2-normalised float32 vectors, so cosine similarity is a
+plain dot product. Three kinds are available:
+
+    exact  - one matrix-vector product and an argpartition top-k
+    ivf    - inverted file: spherical k-means lists, only the closest lists are scored
+    hnsw   - hnswlib graph index (optional dependency)
+
+The kind is chosen per catalogue with TRADELENS_ANN_INDEX_<ITEM_TYPE>, falling
+back to TRADELENS_ANN_INDEX. Compare recall and latency on a catalogue with:
+
+    python -m tradelens.vector_index data/shared/product_embeddings_bge_dump.json
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_INDEX_KIND = os.environ.get("TRADELENS_ANN_INDEX", "exact")
+
+
+def index_kind_for(item_type: str) -> str:
+    """Index kind configured for a catalogue, e.g. TRADELENS_ANN_INDEX_CN8_PRODUCTS=ivf."""
+    return os.environ.get(f"TRADELENS_ANN_INDEX_{item_type.upper()}", DEFAULT_INDEX_KIND)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copies of the rows scaled to unit length (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first, without sorting the whole array."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def select_rows(vectors: np.ndarray, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Restrict an index to `rows` of a shared (possibly memory-mapped) matrix without
+    copying it: contiguous rows become a slice view, other rows are kept as an index
+    array into the matrix.
+    """
+    if rows is None:
+        return vectors, None
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return vectors[:0], None
+    if rows[-1] - rows[0] + 1 == len(rows) and np.all(np.diff(rows) == 1):
+        return vectors[rows[0]:rows[-1] + 1], None
+    return vectors, rows
+
+
+class ExactIndex:
+    """Brute-force search over a normalised matrix, or over `rows` of it."""
+
+    kind = "exact"
+
+    def __init__(self, vectors: np.ndarray, rows: Optional[np.ndarray] = None):
+        self.vectors, self.rows = select_rows(vectors, rows)
+
+    def __len__(self) -> int:
+        return len(self.vectors) if self.rows is None else len(self.rows)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (row ids, similarities) of the k nearest rows to a normalised query."""
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.vectors @ query
+        if self.rows is not None:
+            # Score the whole matrix in place and pick the partition's scores, rather than
+            # gathering a copy of its rows on every query
+            scores = scores[self.rows]
+        ids = top_k(scores, k)
+        return ids, scores[ids]
+
+
+class IVFIndex:
+    """
+    Inverted-file index built with spherical k-means.
+
+    The matrix is not reordered: each list is a range of `ids`, and probing a
+    list gathers only that list's rows from the shared matrix. Recall is traded
+    against speed with `n_probe`.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        rows: Optional[np.ndarray] = None,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        self.n_probe = n_probe
+        self.vectors, self.rows = select_rows(vectors, rows)
+        # Training works on a temporary copy of the rows; only the centroids and list ids are kept
+        vectors = self.vectors if self.rows is None else self.vectors[self.rows]
+        n = len(vectors)
+        self.n_lists = max(1, min(n_lists or int(np.sqrt(n)), n))
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, self.n_lists, replace=False)] if n else np.empty((0, vectors.shape[1]), np.float32)
+        assignment = np.zeros(n, dtype=np.int64)
+        for _ in range(iterations if n else 0):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            filled = np.bincount(assignment, minlength=self.n_lists) > 0
+            # Empty lists keep their previous centroid
+            centroids[filled] = normalize(sums[filled])
+
+        self.centroids = centroids
+        self.ids = np.argsort(assignment, kind="stable")
+        # Matrix row of each list member, so probing reads the shared matrix directly
+        self.matrix_rows = self.ids if self.rows is None else self.rows[self.ids]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=self.n_lists))])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(self.ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        probes = top_k(self.centroids @ query, self.n_probe)
+        members = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes])
+        scores = self.vectors[self.matrix_rows[members]] @ query
+        best = top_k(scores, k)
+        return self.ids[members[best]], scores[best]
+
+
+class HNSWIndex:
+    """Graph index backed by hnswlib, if it is installed."""
+
+    kind = "hnsw"
+
+    def __init__(self, vectors: np.ndarray, rows: Optional[np.ndarray] = None, m: int = 16, ef_construction: int = 200, ef: int = 64):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("The hnsw index needs hnswlib: pip install hnswlib")
+
+        # hnswlib keeps its own copy of the vectors, so the rows are only read while building
+        vectors, rows = select_rows(vectors, rows)
+        if rows is not None:
+            vectors = vectors[rows]
+
+        self.ef = ef
+        self._size = len(vectors)
+        self._index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        self._index.init_index(max_elements=max(self._size, 1), ef_construction=ef_construction, M=m)
+        if self._size:
+            self._index.add_items(vectors, np.arange(self._size))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self._size)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        self._index.set_ef(max(self.ef, k))
+        labels, distances = self._index.knn_query(query, k=k)
+        # hnswlib's inner-product distance is 1 - similarity
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+
+INDEX_KINDS = {
+    "exact": ExactIndex,
+    "ivf": IVFIndex,
+    "hnsw": HNSWIndex,
+}
+
+
+def build_index(vectors: np.ndarray, kind: str = "exact", rows: Optional[np.ndarray] = None, **options):
+    """
+    Build an index of the given kind over normalised vectors, or over `rows` of
+    them - ids returned by the index are then positions in `rows`.
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind '{kind}', expected one of {sorted(INDEX_KINDS)}")
+    return INDEX_KINDS[kind](vectors, rows=rows, **options)
+
+
+def benchmark_indexes(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 50,
+    kinds: Sequence[str] = ("exact", "ivf", "hnsw")
+) -> List[Dict]:
+    """
+    Recall@k against exact search and mean latency per query for each index kind.
+
+    Kinds whose optional dependency is missing are skipped.
+    """
+    exact = ExactIndex(vectors)
+    truth = [set(exact.search(q, k)[0].tolist()) for q in queries]
+    results = []
+    for kind in kinds:
+        try:
+            start = time.perf_counter()
+            index = build_index(vectors, kind)
+            build_ms = (time.perf_counter() - start) * 1000
+        except ImportError as e:
+            print(f"Skipping {kind}: {e}")
+            continue
+        start = time.perf_counter()
+        found = [index.search(q, k)[0] for q in queries]
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(truth[i] & set(ids.tolist())) / len(truth[i]) for i, ids in enumerate(found)])
+        results.append({"kind": kind, "recall": float(recall), "query_ms": query_ms, "build_ms": build_ms})
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare nearest-neighbour indexes on an embedding catalogue.")
+    parser.add_argument("embeddings", help="Embedding dump (JSON list of items with an 'embedding' field)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of catalogue rows used as queries")
+    parser.add_argument("--noise", type=float, default=0.05, help="Noise added to each query vector")
+    parser.add_argument("-k", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with open(args.embeddings, "r") as f:
+        vectors = normalize([item["embedding"] for item in json.load(f)])
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = normalize(vectors[rows] + rng.normal(0, args.noise, (len(rows), vectors.shape[1])))
+
+    print(f"{'index':<8} {'recall@' + str(args.k):>10} {'ms/query':>10} {'build ms':>10}")
+    for row in benchmark_indexes(vectors, queries, args.k):
+        print(f"{row['kind']:<8} {row['recall']:>10.3f} {row['query_ms']:>10.3f} {row['build_ms']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Fixtures shared by the API tests."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tradelens.database import open_database, close_database
+
+
+@pytest.fixture()
+def api_client():
+    """
+    Factory for a TestClient over an app with the given routers, serving `datasets`
+    from the shared database. Each call reopens the database on its datasets; it is
+    closed when the test ends.
+    """
+    opened = []
+
+    def make(datasets: dict, *routers) -> TestClient:
+        open_database(datasets=datasets)
+        opened.append(datasets)
+        app = FastAPI()
+        for router in routers:
+            app.include_router(router)
+        return TestClient(app)
+
+    yield make
+    if opened:
+        close_database()
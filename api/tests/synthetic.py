@@ -0,0 +1,54 @@
+"""Synthetic BACI- and PRODCOM-shaped parquet files for tests and benchmarks."""
+
+import duckdb
+
+
+def write_baci_parquet(path: str, rows: int = 20000, row_group_size: int = 2048, order_by: str = None) -> str:
+    """Write a BACI-shaped parquet file with deterministic pseudo-random rows."""
+    order_clause = f"ORDER BY {order_by}" if order_by else ""
+    conn = duckdb.connect()
+    conn.execute(f"""
+        COPY (
+            SELECT * FROM (
+                SELECT
+                    CAST(2017 + (i % 6) AS BIGINT) AS year,
+                    CAST(1 + (hash(i, 'e') % 50) * 4 AS BIGINT) AS exporter,
+                    CAST(2 + (hash(i, 'i') % 50) * 4 AS BIGINT) AS importer,
+                    CAST(10000 + (hash(i, 'p') % 400) * 100 AS BIGINT) AS product,
+                    CAST(hash(i, 'v') % 100000 AS DOUBLE) / 10 AS value,
+                    CAST(hash(i, 'q') % 5000 AS DOUBLE) AS quantity,
+                    'Country ' || CAST(1 + (hash(i, 'e') % 50) * 4 AS VARCHAR) AS exporter_name,
+                    'Country ' || CAST(2 + (hash(i, 'i') % 50) * 4 AS VARCHAR) AS importer_name,
+                    'Product ' || CAST(10000 + (hash(i, 'p') % 400) * 100 AS VARCHAR) AS product_description
+                FROM range({int(rows)}) t(i)
+            ) {order_clause}
+        ) TO '{path}' (FORMAT PARQUET, ROW_GROUP_SIZE {int(row_group_size)})
+    """)
+    conn.close()
+    return path
+
+
+def write_prodcom_parquet(path: str, codes: int = 200, years=range(2014, 2025)) -> str:
+    """Write a PRODCOM-shaped parquet file (year stored as text, as the prep notebook does)."""
+    year_list = ",".join(f"'{year}'" for year in years)
+    conn = duckdb.connect()
+    conn.execute(f"""
+        COPY (
+            SELECT
+                CAST(10000000 + c * 1000 AS VARCHAR) AS code,
+                'Synthetic product ' || CAST(c AS VARCHAR) AS description,
+                'Synthetic industry ' || CAST(c % 10 AS VARCHAR) AS parent_description,
+                CASE WHEN c % 10 = 0 THEN 'Industry' ELSE 'Product' END AS type,
+                m.unit AS unit,
+                y.year AS year,
+                CAST(hash(c, y.year, m.measure) % 100000 AS DOUBLE) / 10 AS value,
+                CASE WHEN hash(c, y.year) % 7 = 0 THEN 'e - low response; high level of estimation' END AS flag,
+                m.measure AS measure
+            FROM range({int(codes)}) t(c)
+            CROSS JOIN (SELECT unnest([{year_list}]) AS year) y
+            CROSS JOIN (VALUES ('Value', 'Value £ million'), ('Volume', 'Volume (kg)'),
+                               ('Average price/Other', 'Average price (£/kg)')) m(measure, unit)
+        ) TO '{path}' (FORMAT PARQUET)
+    """)
+    conn.close()
+    return path
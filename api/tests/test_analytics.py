@@ -0,0 +1,95 @@
+import duckdb
+import pytest
+
+from tradelens.analytics_service import build_top_partners_query, router as analytics_router
+from tradelens.baci_build import build_dataset, parquet_source
+from tradelens.cache import RESULTS
+from tradelens.data_models import TopPartnersResponse, TradeMatrixResponse
+from synthetic import write_baci_parquet
+
+
+PRODUCTS = "10000,10100,10200,10300"
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    root = tmp_path_factory.mktemp("analytics")
+    legacy = write_baci_parquet(str(root / "baci.parquet"), rows=40000)
+    build_dataset(parquet_source(legacy), str(root / "baci_hs17"), rollup_dir=str(root / "rollups"))
+    return {
+        "baci": str(root / "baci_hs17"),
+        "baci_exporter_totals": str(root / "rollups" / "exporter_totals.parquet"),
+        "baci_importer_totals": str(root / "rollups" / "importer_totals.parquet"),
+    }
+
+
+@pytest.fixture()
+def client(api_client, built):
+    RESULTS.clear()
+    return api_client(built, analytics_router)
+
+
+def expected_totals(built, group_by, where):
+    conn = duckdb.connect()
+    rows = conn.execute(f"""
+        SELECT {group_by}, SUM(value) AS value
+        FROM read_parquet('{built["baci"]}/**/*.parquet', hive_partitioning = true)
+        WHERE product IN ({PRODUCTS}) AND year BETWEEN 2018 AND 2021 {where}
+        GROUP BY ALL
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def test_top_partners(client, built):
+    params = {"country": "1", "flow": "exports", "product_codes": PRODUCTS, "year_from": 2018, "year_to": 2021, "limit": 5}
+    response = client.get("/api/analytics/top-partners", params=params)
+    assert response.status_code == 200
+    body = TopPartnersResponse.model_validate(response.json())
+
+    expected = sorted(expected_totals(built, "importer", "AND exporter = 1"), key=lambda r: (-r[1], r[0]))
+    assert body.partners == [importer for importer, _ in expected[:5]]
+    assert body.values == pytest.approx([value for _, value in expected[:5]])
+    assert body.total_value == pytest.approx(sum(value for _, value in expected))
+    assert body.partner_count == len(expected)
+    assert body.shares[0] == pytest.approx(expected[0][1] / body.total_value, abs=1e-6)
+    assert body.partner_names[0] == f"Country {body.partners[0]}"
+
+
+def test_world_ranking_reads_the_rollup(client, built):
+    query, _ = build_top_partners_query("imports", [], [10000], 2018, 2021, 10, {"baci", "baci_importer_totals"})
+    assert "FROM baci_importer_totals" in query
+
+    params = {"country": "world", "flow": "imports", "product_codes": PRODUCTS, "year_from": 2018, "year_to": 2021}
+    body = client.get("/api/analytics/top-partners", params=params).json()
+    expected = sorted(expected_totals(built, "importer", ""), key=lambda r: (-r[1], r[0]))
+    assert body["countries"] == []
+    assert body["partners"] == [importer for importer, _ in expected[:20]]
+    assert sum(body["shares"]) <= 1.0
+
+
+def test_trade_matrix(client, built):
+    params = {"product_codes": PRODUCTS, "year_from": 2018, "year_to": 2021, "limit": 4}
+    response = client.get("/api/analytics/matrix", params=params)
+    assert response.status_code == 200
+    body = TradeMatrixResponse.model_validate(response.json())
+
+    pairs = {(e, i): v for e, i, v in expected_totals(built, "exporter, importer", "")}
+    exporter_totals = sorted(expected_totals(built, "exporter", ""), key=lambda r: (-r[1], r[0]))
+    assert body.exporters == [exporter for exporter, _ in exporter_totals[:4]]
+    assert body.exporter_totals == pytest.approx([value for _, value in exporter_totals[:4]])
+    assert len(body.importers) == 4
+    for i, exporter in enumerate(body.exporters):
+        for j, importer in enumerate(body.importers):
+            assert body.values[i][j] == pytest.approx(pairs.get((exporter, importer), 0.0))
+    assert body.total_value == pytest.approx(sum(pairs.values()))
+
+    # Listed axes keep the requested order
+    body = client.get("/api/analytics/matrix", params={**params, "exporters": "9,1", "importers": "2"}).json()
+    assert body["exporters"] == [9, 1] and body["importers"] == [2]
+    assert body["values"] == [[pytest.approx(pairs.get((9, 2), 0.0))], [pytest.approx(pairs.get((1, 2), 0.0))]]
+
+
+def test_invalid_filters(client):
+    assert client.get("/api/analytics/top-partners", params={"product_codes": "abc"}).status_code == 400
+    assert client.get("/api/analytics/matrix", params={"year_from": 2022, "year_to": 2020}).status_code == 400
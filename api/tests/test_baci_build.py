@@ -0,0 +1,95 @@
+import json
+import os
+
+import duckdb
+import pytest
+
+from tradelens.baci_build import build_dataset, csv_source, parquet_source
+from tradelens.baci_service import build_trade_query
+from tradelens.database import dataset_reader
+from synthetic import write_baci_parquet
+
+
+@pytest.fixture(scope="module")
+def legacy_file(tmp_path_factory):
+    return write_baci_parquet(str(tmp_path_factory.mktemp("legacy") / "baci.parquet"), rows=60000)
+
+
+@pytest.fixture(scope="module")
+def dataset(legacy_file, tmp_path_factory):
+    output = str(tmp_path_factory.mktemp("partitioned") / "baci_hs17")
+    build_dataset(parquet_source(legacy_file), output, row_group_size=2048)
+    return output
+
+
+def test_one_partition_per_year(dataset):
+    assert sorted(os.listdir(dataset)) == [f"year={year}" for year in range(2017, 2023)]
+
+
+def test_partitions_are_sorted_and_compressed(dataset):
+    conn = duckdb.connect()
+    path = os.path.join(dataset, "year=2020", "data_0.parquet")
+    rows = conn.execute(f"SELECT product, exporter FROM read_parquet('{path}')").fetchall()
+    assert rows == sorted(rows)
+
+    meta = conn.execute(
+        "SELECT DISTINCT compression, row_group_num_rows <= 2048 FROM parquet_metadata(?)", [path]
+    ).fetchall()
+    assert {(compression.upper(), small) for compression, small in meta} == {("ZSTD", True)}
+
+
+def test_dataset_matches_source(legacy_file, dataset):
+    conn = duckdb.connect()
+    columns = "year, exporter, importer, product, value, quantity, exporter_name, importer_name, product_description"
+    source = conn.execute(f"SELECT {columns} FROM {dataset_reader(legacy_file)} ORDER BY ALL").fetchall()
+    rebuilt = conn.execute(f"SELECT {columns} FROM {dataset_reader(dataset)} ORDER BY ALL").fetchall()
+    assert source == rebuilt
+
+
+def test_year_filter_prunes_partitions(dataset, tmp_path):
+    conn = duckdb.connect()
+    conn.execute(f"CREATE VIEW baci AS SELECT * FROM {dataset_reader(dataset)}")
+    query, params = build_trade_query("exports", [10000, 10100], [], [], 2021, 2022)
+
+    profile = str(tmp_path / "profile.json")
+    conn.execute("PRAGMA enable_profiling='json'")
+    conn.execute(f"PRAGMA profiling_output='{profile}'")
+    rows = conn.execute(query, params).fetchall()
+    conn.execute("PRAGMA disable_profiling")
+
+    def scans(node):
+        if node.get("operator_type") == "TABLE_SCAN":
+            yield node
+        for child in node.get("children", []):
+            yield from scans(child)
+
+    with open(profile) as f:
+        scan = next(scans(json.load(f)))
+    assert rows and {row[2] for row in rows} == {2021, 2022}
+    assert scan["extra_info"]["Total Files Read"] == "2"
+
+
+def test_rebuilding_a_year_replaces_it(legacy_file, dataset):
+    build_dataset(parquet_source(legacy_file), dataset, years=[2022], row_group_size=2048)
+    assert sorted(os.listdir(dataset))[-1] == "year=2022"
+    assert not os.path.exists(dataset + ".staging/year=2022")
+
+
+def test_csv_source(tmp_path):
+    (tmp_path / "BACI_HS17_Y2020_V202501.csv").write_text(
+        "t,i,j,k,v,q\n2020,4,8,10121,1.5,           NA\n2020,8,4,10121,2.5,3.0\n"
+    )
+    (tmp_path / "country_codes_V202501.csv").write_text(
+        "country_code,country_name,country_iso2,country_iso3\n4,Afghanistan,AF,AFG\n8,Albania,AL,ALB\n"
+    )
+    (tmp_path / "product_codes_HS17_V202501.csv").write_text(
+        'code,description\n010121,"Horses: live, pure-bred breeding animals"\n'
+    )
+    rows = duckdb.connect().execute(
+        f"SELECT year, exporter_name, importer_name, product, product_description, quantity "
+        f"FROM ({csv_source(str(tmp_path))}) ORDER BY exporter"
+    ).fetchall()
+    assert rows == [
+        (2020, "Afghanistan", "Albania", 10121, "Horses: live, pure-bred breeding animals", None),
+        (2020, "Albania", "Afghanistan", 10121, "Horses: live, pure-bred breeding animals", 3.0),
+    ]
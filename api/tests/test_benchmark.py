@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+import duckdb
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from tradelens.baci_service import router as baci_router
+from tradelens.benchmark import MICRO_BENCHMARKS, compare, generate, run_scenarios
+from tradelens.cache import RESULTS
+from tradelens.database import open_database, close_database
+from tradelens.embedding_store import load_store
+from tradelens.prodcom_service import router as prodcom_router
+
+
+@pytest.fixture(scope="module")
+def metadata(tmp_path_factory):
+    output = str(tmp_path_factory.mktemp("bench"))
+    return generate(output, baci_rows=30000, countries=40, products=200, prodcom_codes=100, catalogue_items=300)
+
+
+def test_generated_data(metadata):
+    paths = metadata["paths"]
+    conn = duckdb.connect()
+    rows, years = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT year) FROM read_parquet('{paths['baci']}/**/*.parquet', hive_partitioning = true)"
+    ).fetchone()
+    assert (rows, years) == (metadata["scale"]["baci_rows"], 6)
+    assert os.path.exists(os.path.join(paths["rollups"], "importer_totals.parquet"))
+    assert conn.execute(f"SELECT COUNT(DISTINCT code) FROM read_parquet('{paths['prodcom']}')").fetchone()[0] == 100
+    assert set(metadata["domain"]["countries"]) <= set(range(4, 4 * 41 + 1, 4))
+
+    items, matrix = load_store("hs6_products", paths["embeddings"])
+    assert matrix.shape == (len(items), 384) and len(items) <= 300
+    assert abs(float((matrix[0] ** 2).sum()) - 1.0) < 1e-4
+
+
+def test_scenarios_report_latency_percentiles(metadata):
+    RESULTS.clear()
+    paths = metadata["paths"]
+    open_database(datasets={
+        "baci": paths["baci"],
+        "baci_exporter_totals": os.path.join(paths["rollups"], "exporter_totals.parquet"),
+        "prodcom": paths["prodcom"],
+    })
+    app = FastAPI()
+    app.include_router(baci_router)
+    app.include_router(prodcom_router)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            return await run_scenarios(
+                client, metadata, ["trade-query", "trade-query-world", "prodcom-query"],
+                requests=30, concurrency=4, warmup=2
+            )
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        close_database()
+
+    for summary in results.values():
+        assert summary["requests"] == 30 and summary["errors"] == 0
+        assert summary["status_codes"] == {"200": 30}
+        latency = summary["latency_ms"]
+        assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+        assert summary["throughput_rps"] > 0 and summary["server_ms"]["p50"] >= 0
+
+
+def test_compare_flags_regressions():
+    def results(p95, rps):
+        return {"scenarios": {"trade-query": {"latency_ms": {"p50": 10, "p95": p95, "p99": 30}, "throughput_rps": rps}}}
+
+    rows = compare(results(20, 100), results(25, 95), threshold=10)
+    flagged = {row["metric"]: row["regression"] for row in rows}
+    assert flagged == {"p50": False, "p95": True, "p99": False, "throughput_rps": False}
+    assert [row["change_pct"] for row in rows if row["metric"] == "p95"] == [25.0]
+    assert not any(row["regression"] for row in compare(results(20, 100), results(19, 200)))
+
+
+@pytest.mark.parametrize("name", sorted(MICRO_BENCHMARKS))
+def test_micro_benchmarks_run(metadata, name):
+    result = MICRO_BENCHMARKS[name](metadata, 1)
+    assert result and all(isinstance(value, (int, float)) and value >= 0 for value in result.values())
@@ -0,0 +1,120 @@
+import os
+import time
+
+import pytest
+
+from tradelens.baci_service import router as baci_router
+from tradelens.cache import RESULTS, ResultCache, canonical_key
+from tradelens.database import get_database
+from tradelens.prodcom_service import router as prodcom_router
+from synthetic import write_baci_parquet, write_prodcom_parquet
+
+
+def test_canonical_key_ignores_order_and_duplicates():
+    assert canonical_key("q", products=[950300, 870323], year_from=2020) == \
+        canonical_key("q", year_from=2020, products=[870323, 950300, 950300])
+    assert canonical_key("q", products=[1]) != canonical_key("q", products=[2])
+
+
+def test_lru_eviction_by_size():
+    cache = ResultCache("test", max_bytes=3000, ttl_seconds=60)
+    for i in range(10):
+        cache.put(i, "x" * 1000)
+    stats = cache.stats()
+    assert stats["bytes"] <= 3000
+    assert stats["evictions"] >= 7
+    assert cache.get(9) is not None
+    assert cache.get(0) is None
+
+
+def test_recently_used_entries_survive():
+    cache = ResultCache("test", max_bytes=2500, ttl_seconds=60)
+    cache.put("a", "x" * 1000)
+    cache.put("b", "x" * 1000)
+    cache.get("a")
+    cache.put("c", "x" * 1000)
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+
+
+def test_ttl_expiry():
+    cache = ResultCache("test", max_bytes=10000, ttl_seconds=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    first = ResultCache("test", max_bytes=10000, ttl_seconds=60, disk_dir=str(tmp_path))
+    first.put(("key", 1), {"rows": [1, 2, 3]})
+
+    second = ResultCache("test", max_bytes=10000, ttl_seconds=60, disk_dir=str(tmp_path))
+    assert second.get(("key", 1)) == {"rows": [1, 2, 3]}
+    assert second.stats()["disk_hits"] == 1
+    assert second.get(("key", 1)) == {"rows": [1, 2, 3]}
+    assert second.stats()["hits"] == 1
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = ResultCache("test", max_bytes=100000, ttl_seconds=60, disk_dir=str(tmp_path), max_disk_bytes=5000)
+    for i in range(20):
+        cache.put(i, "x" * 1000)
+    on_disk = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert on_disk <= 5000
+    # The running total matches the directory without rescanning it on every put
+    assert cache.stats()["disk_bytes"] == on_disk
+
+
+def test_disabled_cache_skips_pickling():
+    cache = ResultCache("test", max_bytes=0, ttl_seconds=60)
+    # A value that cannot be pickled shows that put() never serialises it
+    cache.put("a", lambda: None)
+    assert cache.get("a") is None
+
+
+@pytest.fixture()
+def client(api_client, tmp_path):
+    datasets = {
+        "baci": write_baci_parquet(str(tmp_path / "baci.parquet"), rows=5000),
+        "prodcom": write_prodcom_parquet(str(tmp_path / "prodcom.parquet")),
+    }
+    return api_client(datasets, baci_router, prodcom_router), datasets
+
+
+def test_repeat_trade_query_hits_cache(client):
+    client, _ = client
+    params = {"product_codes": "10000,10100", "from_country": "everywhere", "year_from": 2017, "year_to": 2022}
+    before = RESULTS.stats()
+    first = client.get("/api/trade-query", params=params).json()
+    second = client.get("/api/trade-query", params={**params, "product_codes": "10100,10000"}).json()
+    after = RESULTS.stats()
+
+    assert first["data"] == second["data"]
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+
+def test_repeat_prodcom_query_hits_cache(client):
+    client, _ = client
+    params = {"product_codes": "10000000,10001000", "year_from": 2014, "year_to": 2024, "measure": "Value"}
+    before = RESULTS.stats()
+    first = client.get("/api/prodcom-query", params=params)
+    second = client.get("/api/prodcom-query", params=params)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["data"] == second.json()["data"]
+    assert RESULTS.stats()["hits"] == before["hits"] + 1
+
+
+def test_rewriting_parquet_invalidates(client):
+    client, datasets = client
+    params = {"product_codes": "10000", "from_country": "everywhere", "year_from": 2017, "year_to": 2022}
+    first = client.get("/api/trade-query", params=params).json()
+
+    time.sleep(0.01)
+    write_baci_parquet(datasets["baci"], rows=20000)
+    # The registry watcher re-reads the view versions on every poll
+    assert get_database().refresh_versions() == ["baci"]
+    second = client.get("/api/trade-query", params=params).json()
+    assert second["total_records"] > first["total_records"]
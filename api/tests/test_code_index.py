@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from tradelens.code_index import CodeIndex, clean_code, is_code_query
+from tradelens.prodcom_service import router as prodcom_router
+from synthetic import write_prodcom_parquet
+
+
+def brute_force(codes, query, limit):
+    """Reference ranking: prefix matches, then other substring matches, each by (length, code)."""
+    query = clean_code(query)
+    cleaned = [clean_code(code) for code in codes]
+    key = lambda i: (len(cleaned[i]), cleaned[i])
+    prefix = sorted((i for i, code in enumerate(cleaned) if code.startswith(query)), key=key)
+    inner = sorted((i for i, code in enumerate(cleaned) if query in code and not code.startswith(query)), key=key)
+    return (prefix + inner)[:limit]
+
+
+@pytest.fixture(scope="module")
+def cn8_codes():
+    rng = random.Random(7)
+    codes = {f"{rng.randrange(10**7, 10**8)}" for _ in range(20000)}
+    # Chapter/heading-level codes of different lengths, some written with dots
+    codes |= {f"{rng.randrange(10, 100)}.{rng.randrange(10, 100)}" for _ in range(300)}
+    return sorted(codes)
+
+
+def test_matches_brute_force(cn8_codes):
+    index = CodeIndex(cn8_codes)
+    for query in ["8", "84", "847", "8471", "84713", "1234", "0", "99.9", "12 34", "00000000"]:
+        assert index.search(query, 50) == brute_force(cn8_codes, query, 50), query
+
+
+def test_prefix_matches_come_first():
+    codes = ["10203040", "40102030", "1020", "99102099"]
+    index = CodeIndex(codes)
+    assert [codes[i] for i in index.search("102", 10)] == ["1020", "10203040", "40102030", "99102099"]
+    assert index.search("555", 10) == []
+    assert index.search("", 10) == []
+
+
+def test_code_queries():
+    assert is_code_query("84.71")
+    assert is_code_query("8471 30")
+    assert not is_code_query("laptop")
+
+
+def test_prodcom_code_search(api_client, tmp_path):
+    client = api_client({"prodcom": write_prodcom_parquet(str(tmp_path / "prodcom.parquet"))}, prodcom_router)
+
+    results = client.get("/api/prodcom/products", params={"search": "1001"}).json()
+    assert [item["code"] for item in results[:3]] == ["10010000", "10011000", "10012000"]
+    assert all("1001" in item["code"] for item in results)
+    assert set(results[0]) == {"code", "name", "description", "type"}
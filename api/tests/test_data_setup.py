@@ -0,0 +1,158 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def setup_script():
+    spec = importlib.util.spec_from_file_location("data_setup", os.path.join(REPO_DIR, "data-setup.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves `files` with HEAD and Range support; `cut` drops a file's next GET after that many bytes."""
+    files = {}
+    cut = {}
+    requests = []
+    # HEAD responses leave out Content-Length, like servers that do not report sizes
+    hide_length = False
+
+    def log_message(self, *args):
+        pass
+
+    def _resolve(self):
+        name = self.path.lstrip("/")
+        if name not in self.files:
+            self.send_error(404)
+            return None, None
+        return name, self.files[name]
+
+    def do_HEAD(self):
+        name, body = self._resolve()
+        if body is not None:
+            self.send_response(200)
+            if not self.hide_length:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+
+    def do_GET(self):
+        name, body = self._resolve()
+        if body is None:
+            return
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.end_headers()
+                return
+        self.requests.append((name, start))
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        payload = body[start:]
+        if name in self.cut:
+            payload = payload[:self.cut.pop(name)]
+        self.wfile.write(payload)
+
+
+@pytest.fixture()
+def server():
+    StandIn.files = {f"data/file{i}.bin": os.urandom(300_000 + i) for i in range(3)}
+    StandIn.cut = {}
+    StandIn.requests = []
+    StandIn.hide_length = False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def file_list(tmp_path):
+    names = sorted(name for name in StandIn.files if name.startswith("data/"))
+    return [{"remote": name, "local": str(tmp_path / "out" / os.path.basename(name))} for name in names]
+
+
+def publish_manifest(corrupt=None):
+    manifest = {
+        name: {"size": len(body), "sha256": hashlib.sha256(body).hexdigest()}
+        for name, body in StandIn.files.items()
+    }
+    if corrupt:
+        manifest[corrupt]["sha256"] = "0" * 64
+    StandIn.files["manifest.json"] = json.dumps(manifest).encode()
+
+
+def test_concurrent_download_and_resume(setup_script, server, tmp_path):
+    publish_manifest()
+    files = file_list(tmp_path)
+    # The first file's connection drops part way; the retry resumes from the part file
+    StandIn.cut["data/file0.bin"] = 100_000
+
+    counts = setup_script.download_all(server, files, workers=3, retries=2, chunk_size=16_384)
+    assert counts == {"downloaded": 3, "skipped": 0, "failed": 0}
+    for file in files:
+        with open(file["local"], "rb") as f:
+            assert f.read() == StandIn.files[file["remote"]]
+        assert not os.path.exists(file["local"] + ".part")
+    resumed = [start for name, start in StandIn.requests if name == "data/file0.bin" and start]
+    assert resumed and 0 < resumed[0] <= 100_000
+
+    # Complete files are verified and skipped
+    assert setup_script.download_all(server, files, workers=3)["skipped"] == 3
+
+
+def test_partial_and_corrupt_files(setup_script, server, tmp_path):
+    publish_manifest(corrupt="data/file2.bin")
+    files = file_list(tmp_path)
+    os.makedirs(tmp_path / "out")
+
+    # A truncated file at the final path (left by the old script) is fetched again
+    with open(files[0]["local"], "wb") as f:
+        f.write(StandIn.files["data/file0.bin"][:1000])
+    # An interrupted download is resumed with a Range request
+    with open(files[1]["local"] + ".part", "wb") as f:
+        f.write(StandIn.files["data/file1.bin"][:5000])
+
+    counts = setup_script.download_all(server, files, workers=2, retries=2)
+    assert counts == {"downloaded": 2, "skipped": 0, "failed": 1}
+    assert ("data/file1.bin", 5000) in StandIn.requests
+    with open(files[0]["local"], "rb") as f:
+        assert f.read() == StandIn.files["data/file0.bin"]
+    # A download that does not match its hash is never moved into place
+    assert not os.path.exists(files[2]["local"])
+
+
+def test_without_manifest_sizes_are_checked(setup_script, server, tmp_path):
+    files = file_list(tmp_path)[:1]
+    assert setup_script.download_all(server, files, workers=1)["downloaded"] == 1
+
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = setup_script.write_manifest(manifest_path, files)
+    assert manifest["data/file0.bin"]["sha256"] == hashlib.sha256(StandIn.files["data/file0.bin"]).hexdigest()
+    assert setup_script.download_all(server, files, manifest_path=manifest_path)["skipped"] == 1
+
+
+def test_unknown_size_is_not_assumed_complete(setup_script, server, tmp_path):
+    files = file_list(tmp_path)[:1]
+    assert setup_script.download_all(server, files, workers=1)["downloaded"] == 1
+
+    # Without a manifest or a reported size a truncated file cannot pass as complete
+    with open(files[0]["local"], "r+b") as f:
+        f.truncate(1000)
+    StandIn.hide_length = True
+    assert setup_script.download_all(server, files, workers=1)["downloaded"] == 1
+    with open(files[0]["local"], "rb") as f:
+        assert f.read() == StandIn.files["data/file0.bin"]
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from tradelens.baci_service import router as baci_router
+from tradelens.database import TradeDatabase, database_stats
+from synthetic import write_baci_parquet, write_prodcom_parquet
+
+
+@pytest.fixture()
+def datasets(tmp_path):
+    return {
+        "baci": write_baci_parquet(str(tmp_path / "baci.parquet")),
+        "prodcom": write_prodcom_parquet(str(tmp_path / "prodcom.parquet")),
+    }
+
+
+def test_views_registered_once(datasets):
+    db = TradeDatabase(datasets=datasets, threads=2, memory_limit="256MB").open()
+    with db.cursor() as cur:
+        assert cur.execute("SELECT COUNT(*) FROM baci").fetchone()[0] == 20000
+        assert cur.execute("SELECT COUNT(*) FROM prodcom").fetchone()[0] > 0
+        assert cur.execute("SELECT current_setting('threads')").fetchone()[0] == 2
+    assert set(db.stats()["views"]) == {"baci", "prodcom"}
+    db.close()
+
+
+def test_missing_dataset_is_skipped(tmp_path):
+    db = TradeDatabase(datasets={"baci": str(tmp_path / "missing.parquet")}).open()
+    assert db.stats()["views"] == {}
+    db.close()
+
+
+def test_cursors_are_reused(datasets):
+    db = TradeDatabase(datasets=datasets, pool_size=2).open()
+    for _ in range(5):
+        with db.cursor() as cur:
+            cur.execute("SELECT 1").fetchone()
+    stats = db.stats()
+    assert stats["created"] == 1
+    assert stats["acquired_total"] == 5
+    assert stats["in_use"] == 0
+    db.close()
+
+
+def test_pool_is_bounded(datasets):
+    db = TradeDatabase(datasets=datasets, pool_size=2).open()
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        with db.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM baci").fetchone()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = db.stats()
+    assert stats["created"] <= 2
+    assert stats["peak_in_use"] <= 2
+    assert stats["acquired_total"] == 4
+    db.close()
+
+
+def test_trade_query_uses_shared_database(api_client, datasets):
+    client = api_client(datasets, baci_router)
+    response = client.get("/api/trade-query", params={
+        "product_codes": "10000,10100",
+        "from_country": "everywhere",
+        "year_from": 2017,
+        "year_to": 2022,
+    })
+    assert response.status_code == 200
+    assert response.json()["total_records"] > 0
+    assert database_stats()["acquired_total"] == 1
+
+
+def test_trade_query_rejects_non_numeric_codes(api_client, datasets):
+    client = api_client(datasets, baci_router)
+    response = client.get("/api/trade-query", params={"product_codes": "10000,abc"})
+    assert response.status_code == 400
+    assert "abc" in response.json()["detail"]
+    assert database_stats()["acquired_total"] == 0
@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+
+import duckdb
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tradelens.baci_build import parquet_source
+from tradelens.baci_service import router as baci_router
+from tradelens.cache import RESULTS, TOTALS
+from tradelens.database import open_database, close_database, get_database
+from tradelens.dataset_registry import DatasetRegistry, RegistryWatcher, dataset_paths, refresh_database
+from tradelens.dataset_service import router as dataset_router
+from synthetic import write_baci_parquet
+
+
+QUERY = {"product_codes": "10000,10100,10200", "from_country": "everywhere", "year_from": 2017, "year_to": 2022, "page_size": 10}
+
+
+@pytest.fixture()
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr("tradelens.dataset_registry.REGISTRY_DIR", str(tmp_path / "registry"))
+    RESULTS.clear()
+    TOTALS.clear()
+    source = parquet_source(write_baci_parquet(str(tmp_path / "baci.parquet"), rows=12000))
+    registry = DatasetRegistry()
+    registry.import_baci(source, years=[2017, 2018, 2019, 2020, 2021])
+    open_database(datasets=dataset_paths(registry))
+    yield registry, source
+    close_database()
+
+
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setattr("tradelens.dataset_service.ADMIN_TOKEN", ADMIN_HEADERS["X-Admin-Token"])
+    app = FastAPI()
+    app.include_router(baci_router)
+    app.include_router(dataset_router)
+    return TestClient(app)
+
+
+def years_served(client, to_country="everywhere"):
+    body = client.get("/api/trade-query", params={**QUERY, "to_country": to_country, "page_size": 10000}).json()
+    return sorted({row["year"] for row in body["data"]}), body["total_records"]
+
+
+def test_append_year_swaps_views_and_invalidates_results(registry, client):
+    registry, source = registry
+    assert get_database().view_source("baci_exporter_totals").startswith(registry.version_dir("baci", 1))
+    before, total_before = years_served(client)
+    world_before, _ = years_served(client, "world")
+    assert before == world_before == [2017, 2018, 2019, 2020, 2021]
+
+    record = registry.append_baci_year(source, 2022)
+    assert (record["version"], record["parent"], record["years"]) == (2, 1, [2017, 2018, 2019, 2020, 2021, 2022])
+    # Unchanged partitions are shared with the previous version
+    old, new = (os.path.join(registry.version_dir("baci", v), "data", "year=2017", "data_0.parquet") for v in (1, 2))
+    assert os.stat(old).st_ino == os.stat(new).st_ino
+
+    # A query that started before the swap keeps reading the old version
+    with get_database().cursor() as conn:
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute("SELECT COUNT(*) FROM baci").fetchone()
+        changed = refresh_database(registry=registry)
+        assert conn.execute("SELECT MAX(year) FROM baci").fetchone()[0] == 2021
+        conn.execute("COMMIT")
+        assert conn.execute("SELECT MAX(year) FROM baci").fetchone()[0] == 2022
+
+    assert set(changed) == {"baci", "baci_exporter_totals", "baci_importer_totals"}
+    assert refresh_database(registry=registry) == {}
+
+    # Cached results and rollups of version 1 are not served for version 2
+    after, total_after = years_served(client)
+    world_after, _ = years_served(client, "world")
+    assert after == world_after == [2017, 2018, 2019, 2020, 2021, 2022]
+    assert total_after > total_before
+
+
+def test_activate_rollback_and_prune(registry, client):
+    registry, source = registry
+    registry.append_baci_year(source, 2022)
+    registry.activate("baci", 1)
+    watcher = RegistryWatcher(registry, interval=60)
+    os.utime(registry.manifest_path, ns=(0, 0))
+    watcher.poll()
+    assert get_database().view_source("baci").startswith(registry.version_dir("baci", 1))
+
+    # The current version survives pruning even when it is not among the newest
+    assert registry.prune(keep=1) == []
+    registry.activate("baci", 2)
+    assert client.post("/api/datasets/refresh", headers=ADMIN_HEADERS).json()["changed"]
+    assert registry.prune(keep=1) == [registry.version_dir("baci", 1)]
+    listing = client.get("/api/datasets").json()
+    assert [v["version"] for v in listing["registry"]["datasets"]["baci"]["versions"]] == [2]
+    assert listing["views"]["baci"] == get_database().view_source("baci")
+
+    with pytest.raises(ValueError):
+        registry.activate("baci", 1)
+
+
+def test_refresh_needs_the_admin_token(registry, client, monkeypatch):
+    assert client.post("/api/datasets/refresh").status_code == 401
+    assert client.post("/api/datasets/refresh", headers={"X-Admin-Token": "guess"}).status_code == 401
+    assert client.post("/api/datasets/refresh", headers=ADMIN_HEADERS).status_code == 200
+
+    # Without a configured token the end point is off
+    monkeypatch.setattr("tradelens.dataset_service.ADMIN_TOKEN", None)
+    assert client.post("/api/datasets/refresh", headers=ADMIN_HEADERS).status_code == 403
+
+
+def test_failed_swap_keeps_serving_the_current_version(registry, tmp_path):
+    registry, _ = registry
+    database = get_database()
+    current = database.view_source("baci")
+    with pytest.raises(duckdb.Error):
+        database.swap_views({"baci_exporter_totals": None, "baci": str(tmp_path / "missing.parquet")})
+    assert database.view_source("baci") == current
+    assert "baci_exporter_totals" in database.view_names()
+    with database.cursor() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM baci_exporter_totals").fetchone()[0] > 0
+
+
+def publish_marker(root):
+    def build(folder):
+        with open(os.path.join(folder, "marker"), "w") as f:
+            f.write(folder)
+        return {"views": {}}
+    return DatasetRegistry(root).publish("scratch", build)["version"]
+
+
+def test_concurrent_publishes_from_several_processes(tmp_path):
+    root = str(tmp_path / "registry")
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        published = pool.map(publish_marker, [root] * 8)
+
+    # Every process got its own version, and every version reached the manifest
+    assert sorted(published) == list(range(1, 9))
+    registry = DatasetRegistry(root)
+    assert sorted(v["version"] for v in registry.versions("scratch")) == list(range(1, 9))
+    for version in published:
+        assert os.path.exists(os.path.join(registry.version_dir("scratch", version), "marker"))
@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+from tradelens.embedding import Catalogue, embedding_autocomplete, embedding_readiness, get_catalogue
+from tradelens.vector_index import normalize
+
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def cn8_like():
+    rng = np.random.default_rng(1)
+    types = ["division", "industry", "product"]
+    items = [{"code": f"{10000000 + i * 37}", "description": f"Item {i}", "type": types[i % 3]} for i in range(300)]
+    return items, normalize(rng.normal(size=(300, 16)))
+
+
+def test_type_partitions_match_filtered_search(cn8_like):
+    items, matrix = cn8_like
+    catalogue = Catalogue("cn8_products", items, matrix)
+    assert set(catalogue.partitions) == {"division", "industry", "product"}
+
+    industry = catalogue.partitions["industry"]
+    assert industry.items == [item for item in items if item["type"] == "industry"]
+
+    query = matrix[4]
+    rows = [i for i, item in enumerate(items) if item["type"] == "industry"]
+    expected = [items[rows[i]]["code"] for i in np.argsort(matrix[rows] @ query)[::-1][:10]]
+    ids, _ = industry.index.search(query, 10)
+    assert [industry.items[i]["code"] for i in ids] == expected
+    assert industry.items[ids[0]] is items[4]
+    # Partitions index the shared matrix instead of copying their rows
+    assert np.shares_memory(industry.index.vectors, matrix)
+
+
+def test_catalogues_load_lazily(monkeypatch):
+    monkeypatch.chdir(API_DIR)
+    countries = get_catalogue("countries")
+    assert embedding_readiness()["catalogues"]["countries"] is True
+    assert get_catalogue("countries") is countries
+    assert len(countries.items) == len(countries.index)
+
+    # Code searches and listing need no model
+    assert embedding_autocomplete(None, "countries", limit=5) == countries.items[:5]
+    results = embedding_autocomplete("84", "countries", limit=5)
+    assert results and str(results[0]["code"]).startswith("84")
+    assert embedding_readiness()["model_loaded"] is False
+
+    with pytest.raises(ValueError):
+        get_catalogue("unknown")
+
+
+def test_readiness_without_or_after_failed_warm_up(monkeypatch):
+    from tradelens import embedding
+
+    monkeypatch.chdir(API_DIR)
+    monkeypatch.setattr(embedding, "_warm_up", {"state": "pending", "seconds": None, "error": None})
+    monkeypatch.setattr(embedding, "_catalogues", {})
+    monkeypatch.setattr(embedding, "_model", None)
+    assert embedding_readiness()["ready"] is False
+
+    embedding.skip_warm_up()
+    assert embedding_readiness()["ready"] is True
+
+    # A failed warm-up recovers once first-use loading brings in the model and catalogues
+    embedding._warm_up.update(state="failed", error="model download timed out")
+    monkeypatch.setattr(embedding, "load_encoder", lambda name, backend: object())
+    for item_type in embedding.ITEM_TYPES:
+        get_catalogue(item_type)
+    assert embedding_readiness()["ready"] is False
+    embedding.get_model()
+    readiness = embedding_readiness()
+    assert readiness["ready"] is True and readiness["warm_up"]["error"] is None
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+from tradelens.embedding_store import convert_dump, load_catalogue, load_store
+
+
+DIM = 384
+
+
+@pytest.fixture()
+def dump(tmp_path):
+    rng = np.random.default_rng(0)
+    items = [
+        {"code": 100000 + i, "description": f"Product {i}", "type": "product" if i % 3 else "division",
+         "embedding": (rng.normal(size=DIM) * 2).tolist()}
+        for i in range(5000)
+    ]
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(items))
+    return str(path), items
+
+
+def test_convert_and_load_memory_mapped(dump, tmp_path):
+    source, items = dump
+    store_dir = str(tmp_path / "store")
+    convert_dump("hs6_products", source, store_dir)
+
+    metadata, matrix = load_store("hs6_products", store_dir)
+    assert isinstance(matrix, np.memmap)
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (len(items), DIM)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+    assert metadata[42] == {k: v for k, v in items[42].items() if k != "embedding"}
+
+    expected = np.asarray(items[42]["embedding"])
+    assert np.allclose(matrix[42], expected / np.linalg.norm(expected), atol=1e-6)
+
+
+def test_falls_back_to_json(dump, tmp_path):
+    source, items = dump
+    metadata, matrix = load_catalogue("cn8_products", str(tmp_path / "empty"), {"cn8_products": ["missing.json", source]})
+    assert not isinstance(matrix, np.memmap)
+    assert len(metadata) == len(matrix) == len(items)
+    assert "embedding" not in metadata[0]
+
+
+def test_missing_catalogue(tmp_path):
+    metadata, matrix = load_catalogue("countries", str(tmp_path), {"countries": [str(tmp_path / "missing.json")]})
+    assert metadata == [] and matrix.size == 0
+
+
+def test_store_matches_json(dump, tmp_path):
+    source, _ = dump
+    store_dir = str(tmp_path / "store")
+    convert_dump("countries", source, store_dir)
+
+    json_items, json_matrix = load_catalogue("countries", str(tmp_path / "empty"), {"countries": [source]})
+    store_items, store_matrix = load_catalogue("countries", store_dir)
+    assert isinstance(store_matrix, np.memmap)
+    assert store_items == json_items
+    assert np.allclose(store_matrix, json_matrix, atol=1e-6)
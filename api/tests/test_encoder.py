@@ -0,0 +1,87 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from tradelens.encoder import LatencyHistogram, QueryEncoder, normalize_query
+
+
+class HashingEncoder:
+    """Deterministic stand-in for the sentence transformer that records its batch sizes."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return np.array([[hash((text, d)) % 1000 + 1 for d in range(8)] for text in texts], dtype=np.float32)
+
+
+def test_normalize_query():
+    assert normalize_query("  Steel   PIPES ") == "steel pipes"
+
+
+def test_memoises_normalised_queries():
+    model = HashingEncoder()
+    encoder = QueryEncoder(model, cache_size=2)
+    first = encoder.encode("Steel pipes")
+    assert np.isclose(np.linalg.norm(first), 1.0)
+    assert np.array_equal(encoder.encode("  steel   PIPES"), first)
+    assert len(model.batches) == 1
+
+    encoder.encode("copper")
+    encoder.encode("wool")
+    encoder.encode("steel pipes")  # evicted by the LRU bound
+    assert len(model.batches) == 4
+    stats = encoder.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4 and stats["cache_entries"] == 2
+    encoder.shutdown()
+
+
+def test_concurrent_queries_share_a_batch():
+    model = HashingEncoder(delay=0.02)
+    encoder = QueryEncoder(model, max_batch=32, max_wait_ms=20)
+    queries = [f"product {i}" for i in range(16)] + ["product 0"] * 4
+    barrier = threading.Barrier(len(queries))
+    results = {}
+
+    def search(i, query):
+        barrier.wait()
+        results[i] = encoder.encode(query)
+
+    threads = [threading.Thread(target=search, args=(i, q)) for i, q in enumerate(queries)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(model.batches) < len(queries) / 2
+    assert sum(len(batch) for batch in model.batches) <= 16
+    assert np.array_equal(results[0], results[16])
+    assert encoder.stats()["mean_batch_size"] > 1
+    encoder.shutdown()
+
+
+def test_errors_reach_every_caller():
+    def broken(texts):
+        raise RuntimeError("model unavailable")
+
+    encoder = QueryEncoder(broken)
+    with pytest.raises(RuntimeError):
+        encoder.encode("steel")
+    assert encoder.stats()["cache_entries"] == 0
+    encoder.shutdown()
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets_ms=(1, 10, 100))
+    for ms in [0.5, 0.7, 5, 50, 500]:
+        histogram.observe(ms)
+    stats = histogram.stats()
+    assert stats["count"] == 5
+    assert stats["buckets"] == {"le_1": 2, "le_10": 1, "le_100": 1, "inf": 1}
+    assert stats["p50_ms"] == 10
+    assert stats["p99_ms"] == 500
@@ -0,0 +1,105 @@
+"""
+Parity of the ONNX and int8 query encoders with the PyTorch SentenceTransformer.
+
+The export is checked end to end on a small randomly initialised BERT, so it runs
+without downloading anything. The HS6 parity test compares top-k autocomplete
+autocomplete results for the real model and catalogue, and is skipped unless
+the ONNX export and the HS6 embeddings are present.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+torch = pytest.importorskip("torch")
+st = pytest.importorskip("sentence_transformers")
+
+from tradelens import embedding
+from tradelens.encoder import QueryEncoder
+from tradelens.encoder_backends import ONNX_MODEL_DIR, OnnxEncoder, export_onnx
+from tradelens.vector_index import normalize
+
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "steel pipes", "fresh salmon", "laptop computers", "wine", "cotton t-shirts", "tractors",
+    "crude oil", "toys", "frozen vegetables", "pharmaceutical products", "wooden furniture", "copper wire",
+]
+
+WORDS = sorted({word for query in QUERIES for word in query.replace("-", " ").split()})
+
+
+@pytest.fixture(scope="module")
+def small_model(tmp_path_factory):
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    model_dir = tmp_path_factory.mktemp("small_bert")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS
+    (model_dir / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(vocab_file=str(model_dir / "vocab.txt")).save_pretrained(str(model_dir))
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=64
+    )
+    BertModel(config, add_pooling_layer=False).save_pretrained(str(model_dir))
+
+    from sentence_transformers import models
+    transformer = models.Transformer(str(model_dir), max_seq_length=32)
+    pooling = models.Pooling(32, pooling_mode="cls")
+    return st.SentenceTransformer(modules=[transformer, pooling], device="cpu")
+
+
+@pytest.fixture(scope="module")
+def exported(small_model, tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp("onnx"))
+    export_onnx(small_model, output_dir)
+    return output_dir
+
+
+def test_onnx_matches_torch(small_model, exported):
+    expected = small_model.encode(QUERIES)
+    actual = OnnxEncoder(exported, "onnx").encode(QUERIES)
+    assert actual.shape == expected.shape
+    assert np.allclose(actual, expected, atol=1e-4)
+
+
+def test_int8_keeps_similarity_ranking(small_model, exported):
+    expected = normalize(small_model.encode(QUERIES))
+    actual = normalize(OnnxEncoder(exported, "onnx-int8").encode(QUERIES))
+    assert np.all(np.sum(expected * actual, axis=1) > 0.95)
+
+
+def autocomplete_codes(monkeypatch, model, k):
+    """Codes of the top-k HS6 autocomplete results for every query, encoding with `model`."""
+    monkeypatch.setattr(embedding, "_model", model)
+    encoder = QueryEncoder(lambda texts: embedding.get_model().encode(texts))
+    monkeypatch.setattr(embedding, "QUERY_ENCODER", encoder)
+    try:
+        return [[item["code"] for item in embedding.embedding_autocomplete(q, "hs6_products", limit=k)] for q in QUERIES]
+    finally:
+        encoder.shutdown()
+
+
+def test_hs6_top_k_parity(monkeypatch):
+    model_dir = os.path.join(API_DIR, ONNX_MODEL_DIR)
+    if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+        pytest.skip("ONNX export not built - run python -m tradelens.encoder_backends")
+
+    monkeypatch.chdir(API_DIR)
+    if not embedding.get_catalogue("hs6_products").items:
+        pytest.skip("HS6 embeddings not available")
+
+    k = 10
+    reference = st.SentenceTransformer("BAAI/bge-small-en-v1.5", device="cpu")
+    expected = [set(codes) for codes in autocomplete_codes(monkeypatch, reference, k)]
+
+    for backend, min_overlap in [("onnx", 1.0), ("onnx-int8", 0.8)]:
+        found = autocomplete_codes(monkeypatch, OnnxEncoder(model_dir, backend), k)
+        overlap = np.mean([len(expected[i] & set(codes)) / k for i, codes in enumerate(found)])
+        print(f"\n{backend}: top-{k} autocomplete overlap with torch {overlap:.3f}")
+        assert overlap >= min_overlap
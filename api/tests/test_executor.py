@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from tradelens.executor import BoundedExecutor, ExecutorBusy, _dispatch
+
+
+def test_runs_off_event_loop():
+    executor = BoundedExecutor("test", max_workers=2, max_queue=2)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        worker_thread = await executor.run(threading.get_ident)
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(main())
+    assert loop_thread != worker_thread
+    assert executor.stats()["completed_total"] == 1
+    executor.shutdown()
+
+
+def test_event_loop_stays_responsive():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=4)
+
+    async def main():
+        slow = asyncio.ensure_future(executor.run(time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        await slow
+        return elapsed
+
+    assert asyncio.run(main()) < 0.2
+    executor.shutdown()
+
+
+def test_rejects_when_queue_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorBusy):
+            await executor.run(release.wait)
+        with pytest.raises(HTTPException) as excinfo:
+            await _dispatch(executor, release.wait)
+        assert excinfo.value.status_code == 503
+
+        stats = executor.stats()
+        assert stats["running"] == 1
+        assert stats["queued"] == 1
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(main())
+    assert executor.stats()["rejected_total"] == 2
+    executor.shutdown()
+
+
+def test_cancelled_requests_keep_their_slot():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def main():
+        request = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        await asyncio.sleep(0.01)
+        # The cancelled call is still running on the only worker
+        with pytest.raises(ExecutorBusy):
+            await executor.run(release.wait)
+
+        release.set()
+        for _ in range(100):
+            stats = executor.stats()
+            if stats["completed_total"] and not stats["running"] and not stats["queued"]:
+                break
+            await asyncio.sleep(0.01)
+        assert await executor.run(lambda: "done") == "done"
+
+    asyncio.run(main())
+    executor.shutdown()
@@ -0,0 +1,138 @@
+import io
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import pytest
+
+from tradelens.baci_service import router as baci_router
+from tradelens.prodcom_service import router as prodcom_router
+from tradelens.database import database_stats
+from tradelens.executor import EXECUTORS
+from tradelens.export import ExportStream
+from synthetic import write_baci_parquet, write_prodcom_parquet
+
+
+@pytest.fixture()
+def client(api_client, tmp_path):
+    return api_client({
+        "baci": write_baci_parquet(str(tmp_path / "baci.parquet")),
+        "prodcom": write_prodcom_parquet(str(tmp_path / "prodcom.parquet")),
+    }, baci_router, prodcom_router)
+
+
+TRADE_QUERY = {
+    "product_codes": "10000,10100,10200,10300,10400,10500",
+    "from_country": "everywhere",
+    "year_from": 2017,
+    "year_to": 2022,
+}
+
+
+def read_export(content: bytes, fmt: str) -> pa.Table:
+    if fmt == "csv":
+        return pa_csv.read_csv(io.BytesIO(content))
+    if fmt == "parquet":
+        return pq.read_table(io.BytesIO(content))
+    return pa.ipc.open_stream(content).read_all()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "arrow"])
+def test_trade_export_matches_query(client, fmt):
+    total = client.get("/api/trade-query", params={**TRADE_QUERY, "page_size": 10}).json()["total_records"]
+    response = client.get("/api/trade-query/export", params={**TRADE_QUERY, "format": fmt})
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+
+    table = read_export(response.content, fmt)
+    assert table.num_rows == total > 0
+    assert table.column_names[:3] == ["product_code", "product", "year"]
+    assert database_stats()["in_use"] == 0
+
+
+def test_world_export_is_aggregated(client):
+    params = {**TRADE_QUERY, "to_country": "world", "format": "arrow"}
+    total = client.get("/api/trade-query", params={**params, "page_size": 10}).json()["total_records"]
+    table = read_export(client.get("/api/trade-query/export", params=params).content, "arrow")
+    assert table.num_rows == total
+    assert set(table.column("importer_name").to_pylist()) == {"World"}
+
+
+def test_prodcom_export(client):
+    params = {"product_codes": "10000000,10001000", "year_from": 2014, "year_to": 2024, "measure": "Value"}
+    total = client.get("/api/prodcom-query", params={**params, "page_size": 10}).json()["total_records"]
+    table = read_export(client.get("/api/prodcom-query/export", params={**params, "format": "csv"}).content, "csv")
+    assert table.num_rows == total > 0
+
+
+def test_export_validation(client):
+    assert client.get("/api/trade-query/export", params={**TRADE_QUERY, "format": "xlsx"}).status_code == 422
+    assert client.get("/api/trade-query/export", params={**TRADE_QUERY, "product_codes": "abc"}).status_code == 400
+    assert client.get("/api/trade-query/export", params={**TRADE_QUERY, "year_from": 2022, "year_to": 2017}).status_code == 400
+
+
+def test_stream_reads_in_batches(client):
+    stream = ExportStream("SELECT * FROM baci", [], "parquet", batch_rows=2048)
+    chunks = list(stream)
+    assert len(chunks) > 5
+    assert pq.read_table(io.BytesIO(b"".join(chunks))).num_rows == 20000
+    assert database_stats()["in_use"] == 0
+
+
+def test_closed_stream_returns_cursor(client):
+    stream = ExportStream("SELECT * FROM baci", [], "csv", batch_rows=2048)
+    assert database_stats()["in_use"] == 1
+    next(iter(stream))
+    stream.close()
+    assert database_stats()["in_use"] == 0
+
+
+def test_close_waits_for_a_read_in_progress(client):
+    stream = ExportStream("SELECT * FROM baci", [], "csv", batch_rows=2048)
+    reader = stream._reader
+    reading = threading.Event()
+    in_use = []
+
+    class SlowReader:
+        schema = reader.schema
+
+        def __iter__(self):
+            for batch in reader:
+                reading.set()
+                time.sleep(0.2)
+                # The cursor must not be back in the pool while a batch is being read
+                in_use.append(database_stats()["in_use"])
+                yield batch
+
+        def close(self):
+            reader.close()
+
+    stream._reader = SlowReader()
+    chunks = []
+    thread = threading.Thread(target=lambda: chunks.extend(stream))
+    thread.start()
+    reading.wait()
+    stream.close()
+    thread.join()
+
+    assert in_use == [1]
+    assert len(chunks) <= 1
+    assert database_stats()["in_use"] == 0
+    stream.close()
+
+
+def test_exports_are_bounded(client):
+    params = {**TRADE_QUERY, "format": "arrow"}
+    held = [EXECUTORS["export"].reserve() for _ in range(EXECUTORS["export"].max_workers)]
+    try:
+        response = client.get("/api/trade-query/export", params=params)
+        assert response.status_code == 503
+    finally:
+        for release in held:
+            release()
+
+    assert client.get("/api/trade-query/export", params=params).status_code == 200
+    stats = EXECUTORS["export"].stats()
+    assert stats["running"] == 0 and stats["queued"] == 0
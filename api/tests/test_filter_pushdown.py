@@ -0,0 +1,107 @@
+"""
+Benchmark: CAST(... AS VARCHAR) predicates versus typed integer predicates on a
+BACI-shaped parquet file sorted by product with small row groups.
+
+Row groups scanned are counted from the parquet footer statistics: a predicate
+that DuckDB pushes into the scan as a column filter can skip every row group whose
+[min, max] range excludes all requested codes, whereas a filter on a CAST
+expression has to read every row group. The profiler is used to check which kind
+of filter each query produced. Run with `pytest -s` to see the table.
+"""
+
+import json
+import time
+
+import duckdb
+import pytest
+
+from tradelens.baci_service import build_trade_query
+from synthetic import write_baci_parquet
+
+
+ROW_GROUP_SIZE = 2048
+PRODUCTS = [10000, 10100, 25000]
+EXPORTERS = [1, 5, 9]
+
+
+@pytest.fixture(scope="module")
+def baci_file(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("pushdown") / "baci.parquet")
+    return write_baci_parquet(path, rows=200000, row_group_size=ROW_GROUP_SIZE, order_by="product, exporter")
+
+
+def legacy_query(products, exporters):
+    """The WHERE clause as it was before typed parameters were introduced."""
+    return (
+        "SELECT * FROM baci WHERE year BETWEEN ? AND ? "
+        f"AND CAST(product AS VARCHAR) IN ({','.join(['?'] * len(products))}) "
+        f"AND CAST(exporter AS VARCHAR) IN ({','.join(['?'] * len(exporters))})",
+        [2017, 2022] + [str(p) for p in products] + [str(e) for e in exporters],
+    )
+
+
+def scan_filters(conn, query, params, profile_path):
+    """Run a query with profiling and return (rows, filters applied by the parquet scan)."""
+    conn.execute("PRAGMA enable_profiling='json'")
+    conn.execute(f"PRAGMA profiling_output='{profile_path}'")
+    rows = conn.execute(query, params).fetchall()
+    conn.execute("PRAGMA disable_profiling")
+
+    def find_scan(node):
+        if node.get("operator_type") == "TABLE_SCAN":
+            return node
+        for child in node.get("children", []):
+            found = find_scan(child)
+            if found:
+                return found
+
+    with open(profile_path) as f:
+        scan = find_scan(json.load(f))
+    return rows, str(scan["extra_info"].get("Filters", ""))
+
+
+def row_groups_scanned(conn, path, filters):
+    """Row groups that must be read given the filters the scan received."""
+    stats = conn.execute(
+        "SELECT row_group_id, CAST(stats_min_value AS BIGINT), CAST(stats_max_value AS BIGINT) "
+        "FROM parquet_metadata(?) WHERE path_in_schema = 'product'",
+        [path]
+    ).fetchall()
+    if "CAST(product" in filters or "product" not in filters:
+        return len(stats), len(stats)
+    scanned = [rg for rg, lo, hi in stats if any(lo <= p <= hi for p in PRODUCTS)]
+    return len(scanned), len(stats)
+
+
+def timed(conn, query, params, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(query, params).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def test_typed_predicates_skip_row_groups(baci_file, tmp_path):
+    conn = duckdb.connect()
+    conn.execute(f"CREATE VIEW baci AS SELECT * FROM read_parquet('{baci_file}')")
+
+    typed_query, typed_params = build_trade_query("exports", PRODUCTS, EXPORTERS, [], 2017, 2022)
+    old_query, old_params = legacy_query(PRODUCTS, EXPORTERS)
+
+    typed_rows, typed_filters = scan_filters(conn, typed_query, typed_params, str(tmp_path / "typed.json"))
+    old_rows, old_filters = scan_filters(conn, old_query, old_params, str(tmp_path / "cast.json"))
+
+    # Same rows either way
+    assert len(typed_rows) == len(old_rows) > 0
+
+    typed_groups, total_groups = row_groups_scanned(conn, baci_file, typed_filters)
+    old_groups, _ = row_groups_scanned(conn, baci_file, old_filters)
+
+    print()
+    print(f"{'predicate':<10} {'row groups scanned':>20} {'ms/query':>10}")
+    print(f"{'CAST':<10} {f'{old_groups}/{total_groups}':>20} {timed(conn, old_query, old_params):>10.2f}")
+    print(f"{'typed':<10} {f'{typed_groups}/{total_groups}':>20} {timed(conn, typed_query, typed_params):>10.2f}")
+
+    assert "CAST" not in typed_filters
+    assert old_groups == total_groups
+    assert typed_groups < total_groups / 4
+    conn.close()
@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import tradelens.embedding as embedding
+from tradelens.embedding import Catalogue, search_catalogue
+from tradelens.lexical_index import BM25Index, item_text, keyword_search, reciprocal_rank_fusion, tokenize
+from tradelens.prodcom_service import router as prodcom_router
+from tradelens.vector_index import normalize
+from synthetic import write_prodcom_parquet
+
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DESCRIPTIONS = [
+    "Tubes and pipes of stainless steel",
+    "Steel wire",
+    "Copper wire, refined",
+    "Pipes of copper",
+    "Live horses, pure-bred breeding animals",
+    "Wine of fresh grapes",
+]
+
+
+class FixedEncoder:
+    """Stand-in for the query encoder returning one vector, or failing if it must not be used."""
+
+    def __init__(self, vector=None):
+        self.vector = vector
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        if self.vector is None:
+            raise AssertionError("keyword queries should not be encoded")
+        return self.vector
+
+
+def test_tokenize_and_item_text():
+    assert tokenize("Tubes and pipes, of STAINLESS steel") == ["tubes", "pipes", "stainless", "steel"]
+    assert item_text({"code": 276, "country_name": "Germany", "country_iso2": "DE", "country_iso3": "DEU"}) == "Germany DE DEU"
+    assert item_text({"code": "1", "name": "Wine", "description": "Wine"}) == "Wine"
+
+
+def test_bm25_ranking_and_prefixes():
+    index = BM25Index(DESCRIPTIONS)
+    ids, scores = index.search("steel", 10)
+    assert set(ids.tolist()) == {0, 1}
+    assert ids[0] == 1  # the shorter description ranks first
+    assert np.all(np.diff(scores) <= 0)
+
+    # The last word is matched as a prefix while it is being typed
+    assert index.search("stainless ste", 10)[0].tolist()[0] == 0
+    assert set(index.search("cop", 10)[0].tolist()) == {2, 3}
+
+    # match_all keeps only items containing every word
+    assert index.search("copper pipes", 10, match_all=True)[0].tolist() == [3]
+    assert set(index.search("copper pipes", 10)[0].tolist()) == {0, 2, 3}
+    assert len(index.search("titanium", 10)[0]) == 0
+    assert len(index.search("of the", 10)[0]) == 0
+
+
+def test_reciprocal_rank_fusion():
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], 3) == [1, 3, 2]
+    assert reciprocal_rank_fusion([[], [5, 6]], 5) == [5, 6]
+
+
+def test_keyword_queries_skip_the_encoder(monkeypatch):
+    items = [{"code": str(i), "description": text} for i, text in enumerate(DESCRIPTIONS)]
+    catalogue = Catalogue("hs6_products", items, normalize(np.eye(len(items), 8)))
+    encoder = FixedEncoder()
+    monkeypatch.setattr(embedding, "QUERY_ENCODER", encoder)
+
+    assert keyword_search(catalogue.lexical, "wire", 2) == [1, 2]
+    assert [item["code"] for item in search_catalogue(catalogue, "wire", 2)] == ["1", "2"]
+    assert encoder.calls == 0
+
+
+def test_hybrid_fuses_semantic_results(monkeypatch):
+    items = [{"code": str(i), "description": text} for i, text in enumerate(DESCRIPTIONS)]
+    matrix = normalize(np.eye(len(items), 8))
+    catalogue = Catalogue("hs6_products", items, matrix)
+    # The "semantic" neighbour of the query is the wine item, which shares no words with it
+    encoder = FixedEncoder(matrix[5])
+    monkeypatch.setattr(embedding, "QUERY_ENCODER", encoder)
+
+    codes = [item["code"] for item in search_catalogue(catalogue, "grape spirits", 3)]
+    assert encoder.calls == 1
+    assert codes[0] == "5"
+
+
+def test_hs6_keyword_search():
+    path = os.path.join(API_DIR, "data/shared/HS6_products.json")
+    if not os.path.exists(path):
+        pytest.skip("HS6 product list not available")
+    with open(path, "r") as f:
+        items = json.load(f)
+
+    index = BM25Index([item_text(item) for item in items])
+    ids, _ = index.search("horses", 5)
+    assert all("horse" in items[i]["description"].lower() for i in ids)
+
+    # Every match-all result contains each query word
+    ids, _ = index.search("stainless steel", 50, match_all=True)
+    assert len(ids) > 0
+    assert all({"stainless", "steel"} <= set(tokenize(item_text(items[i]))) for i in ids)
+
+
+def test_prodcom_text_search(api_client, tmp_path):
+    client = api_client({"prodcom": write_prodcom_parquet(str(tmp_path / "prodcom.parquet"))}, prodcom_router)
+
+    results = client.get("/api/prodcom/products", params={"search": "Synthetic product 17"}).json()
+    assert results[0]["description"] == "Synthetic product 17"
+    assert {item["description"] for item in results[1:11]} == {f"Synthetic product {c}" for c in range(170, 180)}
+    assert client.get("/api/prodcom/products", params={"search": "nonexistent"}).json() == []
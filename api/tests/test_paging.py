@@ -0,0 +1,90 @@
+import pytest
+
+from tradelens.baci_service import router as baci_router
+from tradelens.cache import TOTALS
+from tradelens.paging import decode_cursor, encode_cursor, keyset_predicate
+from synthetic import write_baci_parquet
+
+
+@pytest.fixture()
+def client(api_client, tmp_path):
+    TOTALS.clear()
+    return api_client({"baci": write_baci_parquet(str(tmp_path / "baci.parquet"))}, baci_router)
+
+
+QUERY = {
+    "product_codes": "10000,10100,10200,10300",
+    "from_country": "everywhere",
+    "year_from": 2017,
+    "year_to": 2022,
+    "page_size": 50,
+}
+
+
+def test_cursor_roundtrip():
+    token = encode_cursor([2022, 12.5, 4, 8, "950300"])
+    assert decode_cursor(token, 5) == [2022, 12.5, 4, 8, "950300"]
+    with pytest.raises(ValueError):
+        decode_cursor(token, 3)
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor", 5)
+
+
+def test_keyset_predicate():
+    sql, params = keyset_predicate([("year", True), ("exporter_id", False)], [2022, 4])
+    assert sql == "((year < ?) OR (year = ? AND exporter_id > ?))"
+    assert params == [2022, 2022, 4]
+
+
+def test_total_is_cached_per_filter_signature(client):
+    first = client.get("/api/trade-query", params=QUERY).json()
+    assert first["total_records"] > QUERY["page_size"]
+    assert TOTALS.stats()["entries"] == 1
+
+    second = client.get("/api/trade-query", params={**QUERY, "page": 2}).json()
+    assert second["total_records"] == first["total_records"]
+    assert TOTALS.stats()["entries"] == 1
+
+    reordered = client.get("/api/trade-query", params={**QUERY, "product_codes": "10300,10200,10100,10000"}).json()
+    assert reordered["total_records"] == first["total_records"]
+    assert TOTALS.stats()["entries"] == 1
+
+
+def test_keyset_pages_match_offset_pages(client):
+    first = client.get("/api/trade-query", params=QUERY).json()
+    total_pages = first["total_pages"]
+
+    offset_rows = []
+    for page in range(1, total_pages + 1):
+        offset_rows += client.get("/api/trade-query", params={**QUERY, "page": page}).json()["data"]
+
+    keyset_rows = list(first["data"])
+    cursor = first["next_cursor"]
+    while cursor:
+        response = client.get("/api/trade-query", params={**QUERY, "cursor": cursor}).json()
+        keyset_rows += response["data"]
+        cursor = response["next_cursor"]
+
+    assert len(offset_rows) == first["total_records"]
+    assert keyset_rows == offset_rows
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/trade-query", params={**QUERY, "cursor": "garbage"})
+    assert response.status_code == 400
+
+
+def test_world_aggregates_per_reporter(client):
+    params = {**QUERY, "from_country": "1,5", "to_country": "world"}
+    response = client.get("/api/trade-query", params=params)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_records"] == len(body["data"]) > 0
+    assert {row["importer_name"] for row in body["data"]} == {"World"}
+    assert {row["exporter_id"] for row in body["data"]} <= {1, 5}
+
+    # Importer totals are asked for explicitly; from_country still selects the exporters summed
+    by_importer = client.get("/api/trade-query", params={**params, "world_totals": "importer"}).json()
+    assert by_importer["total_records"] == len(by_importer["data"]) > 0
+    assert {row["exporter_name"] for row in by_importer["data"]} == {"World"}
+    assert sum(row["value"] for row in by_importer["data"]) == pytest.approx(sum(row["value"] for row in body["data"]))
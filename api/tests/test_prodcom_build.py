@@ -0,0 +1,70 @@
+import os
+
+import duckdb
+import pytest
+
+from tradelens.database import TradeDatabase, dataset_reader
+from tradelens.prodcom_build import COLUMNS, benchmark, build_dataset, xlsx_frame
+from tradelens.prodcom_service import build_prodcom_query
+from synthetic import write_prodcom_parquet
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKBOOK = os.path.join(REPO_DIR, "data-prep/manufacturers_sales/prodcom_accessiblepublicationtables2024.xlsx")
+
+
+@pytest.fixture(scope="module")
+def legacy_file(tmp_path_factory):
+    return write_prodcom_parquet(str(tmp_path_factory.mktemp("legacy") / "prodcom.parquet"), codes=1000)
+
+
+@pytest.fixture(scope="module")
+def built_file(legacy_file, tmp_path_factory):
+    output = str(tmp_path_factory.mktemp("typed") / "prodcom_typed.parquet")
+    return build_dataset(f"SELECT * FROM {dataset_reader(legacy_file)}", output, row_group_size=2048)
+
+
+def test_dataset_is_typed_and_sorted(built_file):
+    conn = duckdb.connect()
+    types = {row[0]: row[1] for row in conn.execute(f"DESCRIBE SELECT * FROM read_parquet('{built_file}')").fetchall()}
+    assert types == COLUMNS
+
+    rows = conn.execute(f"SELECT code, measure, year FROM read_parquet('{built_file}')").fetchall()
+    assert rows == sorted(rows)
+    meta = conn.execute(
+        "SELECT DISTINCT compression, row_group_num_rows <= 2048 FROM parquet_metadata(?)", [built_file]
+    ).fetchall()
+    assert {(compression.upper(), small) for compression, small in meta} == {("ZSTD", True)}
+
+
+def test_legacy_views_expose_an_integer_year(legacy_file, built_file):
+    query, params = build_prodcom_query(["10001000", "10017000"], 2018, 2021, "Value")
+    results = []
+    for path in [legacy_file, built_file]:
+        database = TradeDatabase(datasets={"prodcom": path}, pool_size=1).open()
+        with database.cursor() as conn:
+            assert conn.execute("SELECT typeof(year) FROM prodcom LIMIT 1").fetchone()[0] == "INTEGER"
+            results.append(sorted(conn.execute(query, params).fetchall()))
+        database.close()
+    assert results[0] == results[1]
+    assert len(results[0]) == 8
+
+
+def test_sorted_layout_reads_fewer_rows(legacy_file, built_file):
+    results = benchmark({"legacy": legacy_file, "built": built_file}, queries=10)
+    print(f"\n{results}")
+    assert results["legacy"]["rows"] == results["built"]["rows"]
+    assert results["built"]["rows_read"] * 5 < results["legacy"]["rows_read"]
+
+
+def test_xlsx_source(tmp_path):
+    pytest.importorskip("openpyxl")
+    if not os.path.exists(WORKBOOK):
+        pytest.skip("PRODCOM publication tables not available")
+
+    conn = duckdb.connect()
+    conn.register("prodcom_xlsx", xlsx_frame(WORKBOOK))
+    output = build_dataset("SELECT * FROM prodcom_xlsx", str(tmp_path / "prodcom_typed.parquet"), conn=conn)
+    counts = dict(conn.execute(f"SELECT type, COUNT(DISTINCT code) FROM read_parquet('{output}') GROUP BY type").fetchall())
+    assert set(counts) == {"Division", "Industry", "Product"}
+    assert conn.execute(f"SELECT MIN(year), MAX(year) FROM read_parquet('{output}')").fetchone() == (2014, 2024)
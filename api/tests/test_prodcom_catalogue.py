@@ -0,0 +1,53 @@
+import os
+import time
+
+
+from tradelens.common_service import router as common_router
+from tradelens.database import open_database, close_database
+from tradelens.embedding import embedding_autocomplete, get_catalogue
+from tradelens.prodcom_service import prodcom_catalogue
+from synthetic import write_prodcom_parquet
+
+
+def test_catalogue_is_built_once_per_dataset_version(tmp_path):
+    path = write_prodcom_parquet(str(tmp_path / "prodcom.parquet"), codes=50)
+    database = open_database(datasets={"prodcom": path})
+
+    catalogue = prodcom_catalogue()
+    assert len(catalogue.items) == 50
+    assert set(catalogue.partitions) == {"Industry", "Product"}
+    assert get_catalogue("prodcom") is catalogue
+    embedding_autocomplete("synthetic product 1", "prodcom", limit=5)
+    assert prodcom_catalogue() is catalogue
+
+    # The version is read once per registration, not on every request
+    write_prodcom_parquet(path, codes=80)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert prodcom_catalogue() is catalogue
+
+    # Refreshing the versions picks up the rewrite and rebuilds the catalogue
+    assert database.refresh_versions() == ["prodcom"]
+    assert database.refresh_versions() == []
+    refreshed = prodcom_catalogue()
+    assert refreshed is not catalogue
+    assert len(refreshed.items) == 80
+    close_database()
+
+
+def test_missing_dataset_gives_an_empty_catalogue(tmp_path):
+    open_database(datasets={"prodcom": str(tmp_path / "missing.parquet")})
+    assert prodcom_catalogue().items == []
+    assert embedding_autocomplete("steel", "prodcom") == []
+    close_database()
+
+
+def test_products_endpoint_serves_prodcom_from_the_catalogue(api_client, tmp_path):
+    client = api_client({"prodcom": write_prodcom_parquet(str(tmp_path / "prodcom.parquet"))}, common_router)
+
+    params = {"product_type": "prodcom", "type": "Industry", "limit": 5}
+    results = client.get("/api/products", params=params).json()
+    assert [item["code"] for item in results] == ["10000000", "10010000", "10020000", "10030000", "10040000"]
+    assert all(item["type"] == "Industry" for item in results)
+
+    results = client.get("/api/products", params={**params, "search": "100"}).json()
+    assert results and all(item["code"].startswith("100") and item["type"] == "Industry" for item in results)
@@ -0,0 +1,62 @@
+import duckdb
+import pytest
+
+from tradelens.cache import RESULTS
+from tradelens.data_models import ProdcomSeriesResponse
+from tradelens.prodcom_service import router as prodcom_router
+from synthetic import write_prodcom_parquet
+
+
+@pytest.fixture()
+def client(api_client, tmp_path):
+    RESULTS.clear()
+    path = write_prodcom_parquet(str(tmp_path / "prodcom.parquet"), years=range(2016, 2025))
+    return api_client({"prodcom": path}, prodcom_router)
+
+
+def test_series_match_paged_query(client):
+    codes = ["10017000", "10001000", "99999999"]
+    params = {"product_codes": ",".join(codes), "year_from": 2014, "year_to": 2024}
+    response = client.get("/api/prodcom-query/series", params=params)
+    assert response.status_code == 200
+    body = ProdcomSeriesResponse.model_validate(response.json())
+
+    assert body.codes == codes
+    assert body.years == list(range(2014, 2025))
+    assert body.descriptions == ["Synthetic product 17", "Synthetic product 1", None]
+    assert set(body.series) == {"Value", "Volume", "Other"}
+    assert body.series["Volume"].units == ["Volume (kg)", "Volume (kg)", None]
+
+    # Years before the data starts, and unknown codes, are null
+    value = body.series["Value"].values
+    assert value[0][:2] == [None, None] and value[2] == [None] * 11
+
+    rows = client.get("/api/prodcom-query", params={**params, "product_codes": "10017000", "page_size": 100}).json()["data"]
+    expected = {row["year"]: row["value"] for row in rows}
+    assert {year: v for year, v in zip(body.years, value[0]) if v is not None} == expected
+
+
+def test_series_measures_and_validation(client):
+    params = {"product_codes": "10001000", "year_from": 2020, "year_to": 2022, "measures": "Other"}
+    body = client.get("/api/prodcom-query/series", params=params).json()
+    assert list(body["series"]) == ["Other"]
+    assert len(body["series"]["Other"]["values"][0]) == 3
+
+    assert client.get("/api/prodcom-query/series", params={**params, "measures": "Price"}).status_code == 400
+    assert client.get("/api/prodcom-query/series", params={**params, "year_from": 2023}).status_code == 400
+
+
+def test_duplicate_rows_sum_values_but_not_prices(api_client, tmp_path):
+    single = write_prodcom_parquet(str(tmp_path / "single.parquet"), codes=5, years=range(2020, 2022))
+    doubled = str(tmp_path / "doubled.parquet")
+    duckdb.execute(f"COPY (SELECT * FROM '{single}' UNION ALL SELECT * FROM '{single}') TO '{doubled}' (FORMAT PARQUET)")
+    RESULTS.clear()
+    client = api_client({"prodcom": doubled}, prodcom_router)
+    params = {"product_codes": "10001000", "year_from": 2020, "year_to": 2021}
+    body = client.get("/api/prodcom-query/series", params=params).json()
+
+    expected = dict(duckdb.execute(f"""
+        SELECT measure, list(value ORDER BY year) FROM '{single}' WHERE code = '10001000' GROUP BY measure
+    """).fetchall())
+    assert body["series"]["Value"]["values"][0] == pytest.approx([2 * v for v in expected["Value"]])
+    assert body["series"]["Other"]["values"][0] == pytest.approx(expected["Average price/Other"])
@@ -0,0 +1,79 @@
+"""
+Building a trade page as pydantic TradeRecord objects versus serialising DuckDB
+result columns straight to JSON.
+
+Both paths run the same query over a synthetic BACI file; the fast path must
+produce exactly the JSON the pydantic path does. Their rows/sec are compared by
+the serialization benchmark of `python -m tradelens.benchmark micro`.
+"""
+
+import json
+
+import duckdb
+import pytest
+
+from tradelens.baci_service import TRADE_FIELDS, TRADE_ORDER_BY, build_trade_query
+from tradelens.data_models import TradeDataResponse, TradeRecord
+from tradelens.paging import fetch_columns, order_clause
+from tradelens.serialization import paged_response_json, records_json
+from synthetic import write_baci_parquet
+
+
+PAGE_SIZE = 10000
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    path = write_baci_parquet(str(tmp_path_factory.mktemp("fast_path") / "baci.parquet"), rows=50000)
+    conn = duckdb.connect()
+    conn.execute(f"CREATE VIEW baci AS SELECT * FROM read_parquet('{path}')")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def page_query():
+    query, params = build_trade_query("exports", list(range(10000, 110000, 100)), [], [], 2017, 2022)
+    return f"SELECT * FROM ({query}) q ORDER BY {order_clause(TRADE_ORDER_BY)} LIMIT {PAGE_SIZE}", params
+
+
+def pydantic_page(conn, query, params) -> bytes:
+    """The row-by-row path the endpoint used before: fetchall, one TradeRecord per row, model JSON."""
+    data = []
+    for row in conn.execute(query, params).fetchall():
+        data.append(TradeRecord(
+            product_code=str(row[0]),
+            product=str(row[1]),
+            year=int(row[2]),
+            importer_id=str(row[3]),
+            importer_name=str(row[4]),
+            exporter_id=str(row[5]),
+            exporter_name=str(row[6]),
+            trade_flow=str(row[7]),
+            value=float(row[8]),
+            quantity=float(row[9]),
+            unit=str(row[10]),
+        ))
+    response = TradeDataResponse(
+        total_records=len(data), page=1, page_size=PAGE_SIZE, total_pages=1, data=data, execution_time_ms=0.0
+    )
+    return response.model_dump_json().encode()
+
+
+def columnar_page(conn, query, params) -> bytes:
+    columns = fetch_columns(conn, query, params)
+    data_json = records_json({field: columns[column] for field, column in TRADE_FIELDS.items()})
+    total = len(columns["year"])
+    return paged_response_json(total, 1, PAGE_SIZE, data_json, 0.0, next_cursor=None)
+
+
+def test_columnar_json_matches_pydantic(conn, page_query):
+    query, params = page_query
+    expected = json.loads(pydantic_page(conn, query, params))
+    actual = json.loads(columnar_page(conn, query, params))
+
+    assert len(actual["data"]) == PAGE_SIZE
+    assert actual == expected
+    assert list(actual) == list(expected)
+    assert list(actual["data"][0]) == list(expected["data"][0])
+
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from tradelens.baci_build import build_dataset, parquet_source
+from tradelens.baci_service import build_trade_query, plan_rollup, router as baci_router
+from tradelens.cache import TOTALS
+from synthetic import write_baci_parquet
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    root = tmp_path_factory.mktemp("rollups")
+    legacy = write_baci_parquet(str(root / "baci.parquet"), rows=30000)
+    build_dataset(parquet_source(legacy), str(root / "baci_hs17"), rollup_dir=str(root / "rollups"))
+    return {
+        "baci": str(root / "baci_hs17"),
+        "baci_exporter_totals": str(root / "rollups" / "exporter_totals.parquet"),
+        "baci_importer_totals": str(root / "rollups" / "importer_totals.parquet"),
+    }
+
+
+WORLD_QUERY = {
+    "product_codes": "10000,10100,10200",
+    "from_country": "1,5,9",
+    "to_country": "world",
+    "year_from": 2018,
+    "year_to": 2021,
+    "page_size": 1000,
+}
+
+WORLD_IMPORTER_QUERY = {**WORLD_QUERY, "from_country": "everywhere", "world_totals": "importer"}
+
+
+def world_rows(api_client, datasets, params=WORLD_QUERY):
+    TOTALS.clear()
+    response = api_client(datasets, baci_router).get("/api/trade-query", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_rollup_files_written(built):
+    assert os.path.exists(built["baci_exporter_totals"])
+    assert os.path.exists(built["baci_importer_totals"])
+
+
+def test_plan_rollup():
+    views = {"baci", "baci_exporter_totals", "baci_importer_totals"}
+    assert plan_rollup({"year", "product", "exporter"}, views) == "baci_exporter_totals"
+    assert plan_rollup({"year", "product", "importer"}, views) == "baci_importer_totals"
+    assert plan_rollup({"year", "product", "exporter", "importer"}, views) is None
+    assert plan_rollup({"year", "product", "exporter"}, {"baci"}) is None
+
+
+def test_world_query_reads_rollup():
+    query, _ = build_trade_query("exports", [10000], [1], [], 2018, 2021, True, {"baci_exporter_totals"})
+    assert "FROM baci_exporter_totals" in query
+    assert "GROUP BY" not in query
+
+    query, _ = build_trade_query("exports", [10000], [1], [], 2018, 2021, True, set())
+    assert "FROM baci\n" in query
+    assert "GROUP BY product, year, exporter" in query
+
+    # The rollup follows the grouping, not the trade type; from_country always filters exporters
+    views = {"baci_exporter_totals", "baci_importer_totals"}
+    query, _ = build_trade_query("imports", [10000], [1], [], 2018, 2021, True, views)
+    assert "FROM baci_exporter_totals" in query
+    assert "exporter IN" in query
+
+    query, _ = build_trade_query("imports", [10000], [], [], 2018, 2021, True, views, "importer")
+    assert "FROM baci_importer_totals" in query
+
+    # Importer totals over chosen exporters need the exporter column
+    query, _ = build_trade_query("imports", [10000], [1], [], 2018, 2021, True, views, "importer")
+    assert "FROM baci\n" in query
+    assert "exporter IN" in query
+    assert "GROUP BY product, year, importer" in query
+
+
+@pytest.mark.parametrize("params", [WORLD_QUERY, WORLD_IMPORTER_QUERY], ids=["exporter", "importer"])
+def test_rollup_matches_raw_aggregation(api_client, built, params):
+    from_rollup = world_rows(api_client, built, params)
+    from_raw = world_rows(api_client, {"baci": built["baci"]}, params)
+
+    def key(row):
+        return (row["year"], row["exporter_id"], row["importer_id"], row["product_code"])
+
+    assert from_rollup["total_records"] == from_raw["total_records"] > 0
+    raw = {key(row): row for row in from_raw["data"]}
+    for row in from_rollup["data"]:
+        assert row["value"] == pytest.approx(raw[key(row)]["value"])
+        assert row["quantity"] == pytest.approx(raw[key(row)]["quantity"])
+        assert row["exporter_name"] == raw[key(row)]["exporter_name"]
+        assert row["importer_name"] == raw[key(row)]["importer_name"]
@@ -0,0 +1,43 @@
+"""
+Importing the app must stay cheap: the embedding model and catalogues load in
+the background warm-up or on first use, never at import. The import time itself
+is measured by the startup benchmark of `python -m tradelens.benchmark micro`.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import json, sys
+import main
+print(json.dumps({"heavy_modules": [m for m in ("torch", "sentence_transformers") if m in sys.modules]}))
+"""
+
+
+def test_import_is_lazy():
+    env = {**os.environ, "PYTHONPATH": os.path.join(API_DIR, "src")}
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", IMPORT_SCRIPT], cwd=API_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    imported = json.loads(result.stdout.strip().splitlines()[-1])
+    assert imported["heavy_modules"] == []
+
+
+def test_not_ready_before_warm_up(monkeypatch):
+    monkeypatch.chdir(API_DIR)
+    from main import app
+
+    response = TestClient(app).get("/health/ready")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["ready"] is False
+    assert body["embedding"]["warm_up"]["state"] in ("pending", "running", "failed")
+    assert set(body["embedding"]["catalogues"]) == {"countries", "hs6_products", "cn8_products"}
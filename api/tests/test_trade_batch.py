@@ -0,0 +1,90 @@
+import pytest
+
+from tradelens.baci_build import build_dataset, parquet_source
+from tradelens.baci_service import router as baci_router
+from tradelens.cache import RESULTS, TOTALS
+from tradelens.data_models import TradeBatchResponse
+from synthetic import write_baci_parquet
+
+
+QUERIES = [
+    {"product_codes": "10000,10100,10200,10300", "from_country": "everywhere", "to_country": "everywhere",
+     "year_from": 2018, "year_to": 2021},
+    {"product_codes": "10100,10400", "from_country": "1,5,9", "to_country": "2,6,10,14", "year_from": 2017, "year_to": 2022,
+     "trade_type": "exports", "page_size": 10},
+    {"product_codes": "10000,10100,10200,10300", "from_country": "everywhere", "to_country": "everywhere",
+     "year_from": 2018, "year_to": 2021, "page": 3, "page_size": 10},
+    {"product_codes": "10000,10200", "from_country": "1,9", "to_country": "world", "year_from": 2017, "year_to": 2022},
+    {"product_codes": "10200", "from_country": "9", "to_country": "world", "year_from": 2019, "year_to": 2019,
+     "page": 50, "page_size": 10},
+    {"product_codes": "10000,10200", "from_country": "everywhere", "to_country": "world", "year_from": 2017,
+     "year_to": 2022, "world_totals": "importer"},
+]
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    root = tmp_path_factory.mktemp("batch")
+    legacy = write_baci_parquet(str(root / "baci.parquet"), rows=30000)
+    build_dataset(parquet_source(legacy), str(root / "baci_hs17"), rollup_dir=str(root / "rollups"))
+    return {
+        "legacy": {"baci": legacy},
+        "built": {
+            "baci": str(root / "baci_hs17"),
+            "baci_exporter_totals": str(root / "rollups" / "exporter_totals.parquet"),
+            "baci_importer_totals": str(root / "rollups" / "importer_totals.parquet"),
+        },
+    }
+
+
+@pytest.fixture(params=["legacy", "built"])
+def client(request, api_client, built):
+    RESULTS.clear()
+    TOTALS.clear()
+    return api_client(built[request.param], baci_router)
+
+
+def without_timing(body):
+    return {key: value for key, value in body.items() if key not in ("execution_time_ms", "next_cursor")}
+
+
+def test_batch_matches_single_queries(client):
+    response = client.post("/api/trade-query/batch", json={"queries": QUERIES})
+    assert response.status_code == 200
+    body = TradeBatchResponse.model_validate(response.json())
+    # Bilateral queries, world exporter totals and world importer totals
+    assert body.scans == 3
+
+    results = response.json()["results"]
+    for query, result in zip(QUERIES, results):
+        expected = client.get("/api/trade-query", params=query).json()
+        assert without_timing(result) == without_timing(expected)
+    assert results[2]["data"] and results[0]["total_records"] == results[2]["total_records"]
+    # Pages past the end still report the total
+    assert results[4]["data"] == [] and results[4]["total_records"] > 0
+    assert results[5]["data"] and {row["exporter_name"] for row in results[5]["data"]} == {"World"}
+
+    # Repeated queries are answered from the cache
+    again = client.post("/api/trade-query/batch", json={"queries": QUERIES[:2]}).json()
+    assert again["scans"] == 0
+    assert [without_timing(r) for r in again["results"]] == [without_timing(r) for r in results[:2]]
+
+
+def test_batch_validation(client):
+    bad = [QUERIES[0], {**QUERIES[1], "product_codes": "abc"}]
+    response = client.post("/api/trade-query/batch", json={"queries": bad})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Query 1:")
+    assert client.post("/api/trade-query/batch", json={"queries": []}).status_code == 422
+
+
+def test_repeated_codes_match_single_queries(client):
+    queries = [
+        {**QUERIES[0], "product_codes": "10000,10000,10100"},
+        {**QUERIES[3], "product_codes": "10000,10000", "from_country": "1,1,9"},
+    ]
+    results = client.post("/api/trade-query/batch", json={"queries": queries}).json()["results"]
+    for query, result in zip(queries, results):
+        expected = client.get("/api/trade-query", params=query).json()
+        assert result["total_records"] > 0
+        assert without_timing(result) == without_timing(expected)
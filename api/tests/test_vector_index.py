@@ -0,0 +1,104 @@
+"""
+Recall of the autocomplete indexes against exact search on a clustered synthetic
+catalogue the size of CN8. Latency is machine-dependent and measured outside the
+tests: `python -m tradelens.vector_index <dump.json>` on a real catalogue, or the
+vector-index benchmark of `python -m tradelens.benchmark micro`.
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from tradelens.vector_index import ExactIndex, IVFIndex, benchmark_indexes, build_index, normalize, top_k
+
+
+DIM = 384
+K = 50
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    rng = np.random.default_rng(42)
+    centres = rng.normal(size=(150, DIM))
+    vectors = normalize(centres[rng.integers(0, 150, 15000)] + rng.normal(scale=0.6, size=(15000, DIM)))
+    rows = rng.choice(len(vectors), 100, replace=False)
+    queries = normalize(vectors[rows] + rng.normal(scale=0.02, size=(100, DIM)))
+    return vectors, queries
+
+
+def test_top_k_matches_argsort():
+    scores = np.random.default_rng(0).random(1000).astype(np.float32)
+    assert top_k(scores, 10).tolist() == np.argsort(scores)[::-1][:10].tolist()
+    assert top_k(scores, 5000).tolist() == np.argsort(scores)[::-1].tolist()
+    assert len(top_k(scores, 0)) == 0
+
+
+def test_normalize_is_float32_unit_length():
+    vectors = normalize([[3.0, 4.0], [0.0, 0.0]])
+    assert vectors.dtype == np.float32
+    assert np.allclose(vectors, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_exact_matches_cosine_argsort(catalogue):
+    vectors, queries = catalogue
+    raw = vectors * 3.0
+    query = queries[0]
+    cosine = (raw @ query) / (np.linalg.norm(raw, axis=1) * np.linalg.norm(query))
+    ids, scores = ExactIndex(vectors).search(query, K)
+    assert ids.tolist() == np.argsort(cosine)[::-1][:K].tolist()
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_ivf_returns_ids_in_catalogue_order(catalogue):
+    vectors, queries = catalogue
+    index = IVFIndex(vectors, n_lists=8, n_probe=8)
+    ids, scores = index.search(queries[0], K)
+    # Probing every list is exact
+    assert ids.tolist() == ExactIndex(vectors).search(queries[0], K)[0].tolist()
+    assert np.allclose(scores, vectors[ids] @ queries[0])
+
+
+def test_indexes_over_rows_share_the_matrix(catalogue):
+    vectors, queries = catalogue
+    rows = np.arange(0, len(vectors), 3)
+    expected = ExactIndex(np.ascontiguousarray(vectors[rows])).search(queries[0], K)[0].tolist()
+    for index in (ExactIndex(vectors, rows=rows), IVFIndex(vectors, rows=rows, n_lists=8, n_probe=8)):
+        assert len(index) == len(rows)
+        assert index.search(queries[0], K)[0].tolist() == expected
+        assert index.vectors is vectors
+    # Searching a partition allocates scores, not a copy of its rows
+    index = ExactIndex(vectors, rows=rows)
+    tracemalloc.start()
+    index.search(queries[0], K)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < vectors[rows].nbytes / 4
+    # Contiguous rows become a slice view
+    view = ExactIndex(vectors, rows=np.arange(100, 200))
+    assert view.rows is None and np.shares_memory(view.vectors, vectors)
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        build_index(np.zeros((2, 2), np.float32), "lsh")
+
+
+def test_recall(catalogue):
+    vectors, queries = catalogue
+    results = benchmark_indexes(vectors, queries, K)
+
+    by_kind = {row["kind"]: row for row in results}
+    assert by_kind["exact"]["recall"] == 1.0
+    assert by_kind["ivf"]["recall"] >= 0.8
+    if "hnsw" in by_kind:
+        assert by_kind["hnsw"]["recall"] >= 0.9
+
+
+def test_ivf_scores_only_the_probed_lists(catalogue):
+    vectors, queries = catalogue
+    index = IVFIndex(vectors, n_probe=8)
+    for query in queries[:10]:
+        probes = top_k(index.centroids @ query, index.n_probe)
+        scored = sum(index.offsets[p + 1] - index.offsets[p] for p in probes)
+        assert scored < len(vectors) / 4
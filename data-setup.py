@@ -2,8 +2,17 @@
 # This script downloads necessary data files from the S3 bucket to the local filesystem.
 # It sets up the complete data directory structure with BACI, PRODCOM, and shared data files.
 #
+# Files are streamed to disk in chunks, several at a time. Each download goes to a
+# ".part" file that is resumed with an HTTP Range request if the script is interrupted,
+# checked against the manifest of sizes and SHA-256 hashes (or, without a manifest,
+# the size the server reports), and only then renamed into place - so a file at its
+# final path is always complete.
+#
 # Usage:
-#   python data-setup.py
+#   python data-setup.py                          # download missing or incomplete files
+#   python data-setup.py --workers 8              # more concurrent downloads
+#   python data-setup.py --manifest manifest.json # verify against a local manifest
+#   python data-setup.py --write-manifest manifest.json  # record sizes/hashes of the local files
 #
 # Requirements:
 #   pip install requests
@@ -22,11 +31,27 @@
 #     ├── countries.json                  # Country codes and names
 #     └── country_embeddings.json         # Vector embeddings for countries
 
-import requests
+import argparse
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 base = "https://eco-temp-cache.s3.eu-west-2.amazonaws.com/tradelens_data/"
 
+# Manifest of {"<remote path>": {"size": bytes, "sha256": hex}} published next to the data files
+MANIFEST = "manifest.json"
+
+CHUNK_SIZE = 1024 * 1024
+WORKERS = 4
+RETRIES = 3
+# (connect, read) timeouts - the read timeout applies per chunk, not to the whole download
+TIMEOUT = (10, 60)
+
 # List of all data files to download from S3
 # Each file contains the remote S3 path and local filesystem path
 files = [
@@ -35,13 +60,13 @@ files = [
         "remote": "BACI/baci_hs17_2017_2022.parquet",
         "local": "api/data/BACI/baci_hs17_2017_2022.parquet"
     },
-    
+
     # PRODCOM dataset files
     {
         "remote": "prodcom/prodcom.parquet",
         "local": "api/data/prodcom/prodcom.parquet"
     },
-    
+
     # Shared data files (product and country taxonomies)
     {
         "remote": "shared/HS6_product_embeddings.json",
@@ -70,58 +95,191 @@ files = [
 ]
 
 
+class DownloadError(Exception):
+    """Raised when a file cannot be downloaded or does not match the manifest."""
+
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(session, base_url, path=None):
+    """Expected sizes and hashes by remote path - from `path`, else from the bucket; empty if neither exists."""
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    try:
+        response = session.get(base_url + MANIFEST, timeout=TIMEOUT)
+        if response.status_code == 200:
+            return response.json()
+        print(f"⚠ No manifest at {base_url + MANIFEST} (HTTP {response.status_code}) - checking sizes only")
+    except (requests.RequestException, ValueError) as e:
+        print(f"⚠ Could not read manifest: {e} - checking sizes only")
+    return {}
+
+
+def write_manifest(path, file_list=files):
+    """Record the size and SHA-256 of the local copies, for publishing next to the data files."""
+    manifest = {}
+    for file in file_list:
+        if os.path.exists(file["local"]):
+            manifest[file["remote"]] = {"size": os.path.getsize(file["local"]), "sha256": file_sha256(file["local"])}
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def remote_size(session, url):
+    """Content-Length of a remote file, or None if the server does not report it."""
+    response = session.head(url, timeout=TIMEOUT, allow_redirects=True)
+    response.raise_for_status()
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def verify(path, expected):
+    """Raise DownloadError if `path` does not have the expected size or SHA-256."""
+    size = os.path.getsize(path)
+    if expected.get("size") is not None and size != expected["size"]:
+        raise DownloadError(f"size {size:,} bytes, expected {expected['size']:,}")
+    if expected.get("sha256") and file_sha256(path) != expected["sha256"]:
+        raise DownloadError("SHA-256 does not match the manifest")
+
+
+def is_complete(session, url, local_path, expected):
+    """
+    Whether an existing file matches the manifest, or the remote size when there is
+    no manifest entry. A file with neither to check against is never assumed complete.
+    """
+    if not os.path.exists(local_path):
+        return False
+    if not expected.get("size") and not expected.get("sha256"):
+        expected = {"size": remote_size(session, url)}
+        if expected["size"] is None:
+            return False
+    try:
+        verify(local_path, expected)
+        return True
+    except DownloadError:
+        return False
+
+
+def fetch(session, url, part_path, chunk_size=CHUNK_SIZE):
+    """Stream `url` into `part_path`, resuming from its current length. Returns the bytes transferred."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code == 416:
+            # Nothing left to fetch - the part file already holds the whole file
+            return 0
+        if response.status_code == 200 and offset:
+            # Server ignored the Range header - start over
+            offset = 0
+        elif response.status_code not in (200, 206):
+            raise DownloadError(f"HTTP {response.status_code}")
+
+        transferred = 0
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                transferred += len(chunk)
+        return transferred
+
+
+def download_file(session, base_url, file, manifest, retries=RETRIES, chunk_size=CHUNK_SIZE):
+    """
+    Make `file["local"]` a verified copy of the remote file. Returns "skipped" or
+    "downloaded"; raises DownloadError after `retries` failed attempts.
+    """
+    url = base_url + file["remote"]
+    local_path = file["local"]
+    part_path = local_path + ".part"
+    expected = {**manifest.get(file["remote"], {}), **{k: file[k] for k in ("size", "sha256") if k in file}}
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+
+    if is_complete(session, url, local_path, expected):
+        return "skipped"
+
+    for attempt in range(1, retries + 1):
+        try:
+            fetch(session, url, part_path, chunk_size)
+            if not expected.get("size"):
+                length = remote_size(session, url)
+                expected = {**expected, "size": length} if length is not None else expected
+            try:
+                verify(part_path, expected)
+            except DownloadError:
+                # A corrupt part file cannot be resumed - fetch it again from the start
+                os.remove(part_path)
+                raise
+            os.replace(part_path, local_path)
+            return "downloaded"
+        except (requests.RequestException, DownloadError) as e:
+            if attempt == retries:
+                raise DownloadError(f"{file['remote']}: {e}") from e
+            time.sleep(min(2 ** attempt, 30) * 0.5)
+
+
+def download_all(base_url=base, file_list=files, workers=WORKERS, manifest_path=None, retries=RETRIES, chunk_size=CHUNK_SIZE):
+    """Download every file concurrently; returns counts of downloaded, skipped and failed files."""
+    counts = {"downloaded": 0, "skipped": 0, "failed": 0}
+    lock = threading.Lock()
+    session = requests.Session()
+    manifest = load_manifest(session, base_url, manifest_path)
+
+    def run(file):
+        try:
+            outcome = download_file(session, base_url, file, manifest, retries, chunk_size)
+            size = os.path.getsize(file["local"])
+            message = f"  ✓ {'Already complete' if outcome == 'skipped' else 'Downloaded'}: {file['local']} ({size:,} bytes)"
+        except (requests.RequestException, DownloadError, OSError) as e:
+            outcome = "failed"
+            message = f"  ✗ Error downloading {file['remote']}: {str(e)}"
+        with lock:
+            counts[outcome] += 1
+            print(message)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(run, file_list))
+    session.close()
+    return counts
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the TradeLens data files.")
+    parser.add_argument("--base-url", default=base, help="Bucket URL the remote paths are relative to")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent downloads")
+    parser.add_argument("--manifest", help="Local manifest of sizes/SHA-256 hashes (default: manifest.json in the bucket)")
+    parser.add_argument("--write-manifest", metavar="PATH", help="Write a manifest of the local files and exit")
+    args = parser.parse_args()
+
+    if args.write_manifest:
+        manifest = write_manifest(args.write_manifest)
+        print(f"✓ Wrote {len(manifest)} entries to {args.write_manifest}")
+        raise SystemExit(0)
+
     print("TradeLens Data Setup")
     print("===================")
-    print(f"Downloading {len(files)} data files from S3...")
+    print(f"Downloading {len(files)} data files from S3 ({args.workers} at a time)...")
     print()
-    
-    downloaded = 0
-    skipped = 0
-    failed = 0
-    
-    for i, file in enumerate(files, 1):
-        remote_url = base + file["remote"]
-        local_path = file["local"]
-        
-        print(f"[{i}/{len(files)}] Processing {file['remote']}")
-
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-
-        # If the file already exists, skip downloading
-        if os.path.exists(local_path):
-            print(f"  ✓ Already exists: {local_path}")
-            skipped += 1
-            continue
-
-        # Download the file
-        try:
-            print(f"  → Downloading from {remote_url}")
-            response = requests.get(remote_url, timeout=30)
-            
-            if response.status_code == 200:
-                with open(local_path, 'wb') as f:
-                    f.write(response.content)
-                file_size = len(response.content)
-                print(f"  ✓ Downloaded to {local_path} ({file_size:,} bytes)")
-                downloaded += 1
-            else:
-                print(f"  ✗ Failed to download: HTTP {response.status_code}")
-                failed += 1
-        except Exception as e:
-            print(f"  ✗ Error downloading {file['remote']}: {str(e)}")
-            failed += 1
-    
+
+    counts = download_all(args.base_url, files, args.workers, args.manifest)
+
     print()
     print("Summary:")
-    print(f"  Downloaded: {downloaded} files")
-    print(f"  Skipped (already exists): {skipped} files")
-    print(f"  Failed: {failed} files")
+    print(f"  Downloaded: {counts['downloaded']} files")
+    print(f"  Skipped (already complete): {counts['skipped']} files")
+    print(f"  Failed: {counts['failed']} files")
     print()
-    
-    if failed == 0:
+
+    if counts["failed"] == 0:
         print("✓ Data setup completed successfully!")
     else:
-        print(f"⚠ Data setup completed with {failed} failures.")
-        print("Please check network connectivity and S3 bucket accessibility.")
\ No newline at end of file
+        print(f"⚠ Data setup completed with {counts['failed']} failures.")
+        print("Please check network connectivity and S3 bucket accessibility. Re-run to resume partial downloads.")
+        raise SystemExit(1)